@@ -0,0 +1,181 @@
+"""
+Per-agent analytics rollup.
+
+Dashboards want each agent's win rate, average votes received, critique
+coverage and win streaks. Derived from the raw tables that means joining
+every vote to every proposal, so ``agent_stats`` keeps one row per agent
+instead: score_round() folds each closing round into it (apply_round), and
+``GET /agents/{id}/stats`` reads that row.
+
+Only closed rounds in which the agent submitted a proposal count. A round is
+won by the proposals with the most votes, ties included, when any votes were
+cast; streaks count consecutive wins in closing order. rebuild() recomputes
+every row from the history, e.g. for a database that predates the table::
+
+    python -m app.agent_stats rebuild
+"""
+
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import and_, case, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app import database, shards
+from app.models import AgentStats, Critique, Proposal, Round, Vote
+
+
+def empty_stats(agent_id: int) -> AgentStats:
+    """A zeroed row for an agent that has not played a closed round."""
+    return AgentStats(
+        agent_id=agent_id, rounds_played=0, rounds_won=0, votes_received=0, rounds_critiqued=0,
+        current_win_streak=0, longest_win_streak=0,
+    )
+
+
+def apply_round(
+    db: Session, round_id: int, votes: dict[int, int], winners: Iterable[int], critiqued: Iterable[int]
+) -> None:
+    """Fold one closing round into its proposers' rows.
+
+    *votes* maps each proposing agent to the votes its proposal received;
+    *winners* and *critiqued* are the proposers that won and that critiqued.
+    One upsert adds the round to existing rows and inserts the rest, so two
+    rounds closing at once cannot lose each other's counts or both insert.
+    """
+    if not votes:
+        return
+    winners, critiqued = set(winners), set(critiqued)
+    now = datetime.utcnow()
+    stats = AgentStats.__table__
+    new = database.upsert(db, stats)
+    won = new.excluded.rounds_won > 0
+    streak = stats.c.current_win_streak + 1
+    db.execute(
+        new.on_conflict_do_update(
+            index_elements=[stats.c.agent_id],
+            set_={
+                "rounds_played": stats.c.rounds_played + new.excluded.rounds_played,
+                "rounds_won": stats.c.rounds_won + new.excluded.rounds_won,
+                "votes_received": stats.c.votes_received + new.excluded.votes_received,
+                "rounds_critiqued": stats.c.rounds_critiqued + new.excluded.rounds_critiqued,
+                "current_win_streak": case((won, streak), else_=0),
+                "longest_win_streak": case(
+                    (and_(won, streak > stats.c.longest_win_streak), streak), else_=stats.c.longest_win_streak
+                ),
+                "last_round_id": new.excluded.last_round_id,
+                "updated_at": new.excluded.updated_at,
+            },
+        ),
+        [
+            {
+                "agent_id": agent_id, "rounds_played": 1, "rounds_won": int(agent_id in winners),
+                "votes_received": received, "rounds_critiqued": int(agent_id in critiqued),
+                "current_win_streak": int(agent_id in winners), "longest_win_streak": int(agent_id in winners),
+                "last_round_id": round_id, "updated_at": now,
+            }
+            for agent_id, received in votes.items()
+        ],
+    )
+
+
+def _history(session: Session) -> tuple[list, set]:
+    """(closed_at, round_id, agent_id, votes) per proposal in a closed round,
+    and the (round_id, agent_id) pairs of proposers who also critiqued."""
+    closed = and_(Round.id == Proposal.round_id, Round.phase == "closed")
+    tallies = (
+        session.execute(
+            select(Round.closed_at, Proposal.round_id, Proposal.agent_id, func.count(Vote.id))
+            .join(Round, closed)
+            .outerjoin(Vote, Vote.proposal_id == Proposal.id)
+            .group_by(Proposal.id, Proposal.round_id, Proposal.agent_id, Round.closed_at)
+        ).all()
+    )
+    critiqued = set(
+        session.execute(
+            select(Critique.round_id, Critique.agent_id)
+            .join(Proposal, and_(Proposal.round_id == Critique.round_id, Proposal.agent_id == Critique.agent_id))
+            .join(Round, closed)
+            .distinct()
+        ).all()
+    )
+    return tallies, critiqued
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every agent_stats row from the closed rounds.
+
+    One aggregate query per shard, then array operations over all proposals
+    at once; the rows are rewritten in bulk. Returns the number of agents
+    with stats. The caller commits.
+    """
+    import numpy as np
+
+    tallies, critiqued = [], set()
+    with shards.round_sessions(db) as sessions:
+        for session in sessions:
+            rows, pairs = _history(session)
+            tallies.extend(rows)
+            critiqued |= pairs
+    # Closing order; a round's proposals end up next to each other
+    tallies.sort(key=lambda r: (r[0] or datetime.min, r[1]))
+
+    db.execute(delete(AgentStats))
+    if not tallies:
+        return 0
+    n = len(tallies)
+    round_ids = np.fromiter((r[1] for r in tallies), dtype=np.int64, count=n)
+    agents = np.fromiter((r[2] for r in tallies), dtype=np.int64, count=n)
+    votes = np.fromiter((r[3] for r in tallies), dtype=np.int64, count=n)
+    did_critique = np.fromiter(((r[1], r[2]) in critiqued for r in tallies), dtype=bool, count=n)
+
+    starts = np.flatnonzero(np.r_[True, round_ids[1:] != round_ids[:-1]])
+    most = np.repeat(np.maximum.reduceat(votes, starts), np.diff(np.r_[starts, n]))
+    won = (votes == most) & (most > 0)
+
+    # Regroup by agent, keeping closing order within each agent
+    order = np.lexsort((np.arange(n), agents))
+    agents, round_ids, votes = agents[order], round_ids[order], votes[order]
+    won, did_critique = won[order], did_critique[order]
+    first = np.r_[True, agents[1:] != agents[:-1]]
+    starts = np.flatnonzero(first)
+    ends = np.r_[starts[1:], n] - 1
+
+    # Wins in a row ending at each position: distance to the last loss, or
+    # to just before the agent's first round
+    index = np.arange(n)
+    reset = np.where(~won, index, np.where(first, index - 1, -1))
+    streak = index - np.maximum.accumulate(reset)
+
+    columns = {
+        "agent_id": agents[starts],
+        "rounds_played": np.diff(np.r_[starts, n]),
+        "rounds_won": np.add.reduceat(won.astype(np.int64), starts),
+        "votes_received": np.add.reduceat(votes, starts),
+        "rounds_critiqued": np.add.reduceat(did_critique.astype(np.int64), starts),
+        "current_win_streak": streak[ends],
+        "longest_win_streak": np.maximum.reduceat(streak, starts),
+        "last_round_id": round_ids[ends],
+    }
+    now = datetime.utcnow()
+    db.execute(insert(AgentStats.__table__), [
+        {**dict(zip(columns, values)), "updated_at": now}
+        for values in zip(*(column.tolist() for column in columns.values()))
+    ])
+    return len(starts)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild the agent_stats rollup from the round history.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    database.sync_schema()
+    db = database.SessionLocal()
+    try:
+        agents = rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rebuilt stats for {agents} agents")
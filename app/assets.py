@@ -0,0 +1,199 @@
+"""
+In-memory static assets with precompressed variants.
+
+Each file under app/static plus SKILL.md is read once, given a content-hash
+ETag and, when it pays off, gzip and brotli variants. Responses are negotiated
+on Accept-Encoding and answer If-None-Match with 304.
+
+index.html is rewritten so its /static/ references carry ``?v=<hash>``; a
+request for an asset with the current hash is cached for a year as immutable,
+anything else (the page itself, SKILL.md, unversioned asset URLs) must be
+revalidated, which is a cheap 304 once the client holds the ETag.
+
+Assets are built on first use, or ahead of time by the startup warm-up.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(APP_DIR, "static")
+SKILL_PATH = os.path.join(os.path.dirname(APP_DIR), "SKILL.md")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Preferred first when the client accepts several with equal q
+ENCODINGS = ("br", "gzip")
+_ETAG_SUFFIX = {"br": "-br", "gzip": "-gz"}
+_STATIC_REF = re.compile(r'((?:src|href)=")/static/([^"?#]+)(")')
+
+
+@dataclass
+class Asset:
+    body: bytes
+    media_type: str
+    digest: str
+    variants: dict = field(default_factory=dict)
+
+    @property
+    def version(self) -> str:
+        return self.digest[:12]
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        # Each content-coding is a different representation, so a different strong ETag
+        return f'"{self.digest[:32]}{_ETAG_SUFFIX.get(encoding, "")}"'
+
+
+def _compress(body: bytes) -> dict:
+    variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=11)
+    # Tiny files can grow when compressed; only keep variants that are smaller
+    return {enc: data for enc, data in variants.items() if len(data) < len(body)}
+
+
+def build_asset(body: bytes, media_type: str) -> Asset:
+    return Asset(
+        body=body,
+        media_type=media_type,
+        digest=hashlib.sha256(body).hexdigest(),
+        variants=_compress(body),
+    )
+
+
+def _media_type(path: str) -> str:
+    if path.endswith(".md"):
+        return "text/markdown; charset=utf-8"
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+_assets: dict[str, Asset] = {}
+_lock = threading.Lock()
+
+
+def load() -> dict[str, Asset]:
+    """Read and compress every asset. Keys are URL paths."""
+    with _lock:
+        if _assets:
+            return _assets
+        built = {}
+        for name in sorted(os.listdir(STATIC_DIR)):
+            path = os.path.join(STATIC_DIR, name)
+            if os.path.isfile(path) and name != "index.html":
+                built[f"/static/{name}"] = build_asset(_read(path), _media_type(path))
+
+        def versioned(match):
+            url = f"/static/{match.group(2)}"
+            asset = built.get(url)
+            suffix = f"?v={asset.version}" if asset else ""
+            return f"{match.group(1)}{url}{suffix}{match.group(3)}"
+
+        index = _read(os.path.join(STATIC_DIR, "index.html")).decode()
+        built["/"] = build_asset(_STATIC_REF.sub(versioned, index).encode(), "text/html; charset=utf-8")
+        built["/SKILL.md"] = build_asset(_read(SKILL_PATH), _media_type(SKILL_PATH))
+        _assets.update(built)
+        return _assets
+
+
+def get(url_path: str) -> Optional[Asset]:
+    return (_assets or load()).get(url_path)
+
+
+def reset() -> None:
+    """Drop built assets so the next request re-reads them from disk."""
+    with _lock:
+        _assets.clear()
+
+
+# ── Negotiation ───────────────────────────────────────────────────────────────
+
+def accepted_encodings(header: str) -> dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header: str, available, preference=ENCODINGS) -> Optional[str]:
+    """Best encoding in *available* the client accepts, or None for identity.
+
+    Ties on q are broken by the order of *preference*.
+    """
+    accepted = accepted_encodings(header)
+    best, best_q = None, 0.0
+    for coding in preference:
+        if coding not in available:
+            continue
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _etag_matches(if_none_match: str, asset: Asset) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    tags = {asset.etag(None)} | {asset.etag(enc) for enc in asset.variants}
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in tags:
+            return True
+    return False
+
+
+def asset_response(request: Request, asset: Asset, immutable: bool = False) -> Response:
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""), asset.variants)
+    headers = {
+        "ETag": asset.etag(encoding),
+        "Cache-Control": IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(request.headers.get("if-none-match", ""), asset):
+        return Response(status_code=304, headers=headers)
+
+    body = asset.body
+    if encoding is not None:
+        body = asset.variants[encoding]
+        headers["Content-Encoding"] = encoding
+    if request.method == "HEAD":
+        headers["Content-Length"] = str(len(body))
+        return Response(status_code=200, headers=headers, media_type=asset.media_type)
+    return Response(body, headers=headers, media_type=asset.media_type)
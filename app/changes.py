@@ -0,0 +1,103 @@
+"""
+Per-round change log for delta polling.
+
+Every write to a round bumps ``rounds.last_seq`` and adds a ``round_events``
+row with that sequence number in the same transaction, so
+``GET /rounds/{id}/changes?since=<seq>`` can answer from the
+(round_id, seq) unique index and only load the rows that changed. The
+increment is a single UPDATE, which takes the round's row lock and so
+serialises concurrent writers to the same round; the new value is read back
+with a SELECT in the same transaction rather than UPDATE ... RETURNING,
+which SQLite only has from 3.35.
+
+Closing a round rewrites every proposal's vote_count (score_round), so a
+delta that includes the ``closed`` phase change returns all of the round's
+proposals with their final tallies.
+"""
+
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, joinedload
+
+from app import response_cache
+from app.models import Critique, Proposal, Round, RoundEvent, Vote
+from app.schemas import (
+    CritiqueOut,
+    PhaseChange,
+    ProposalOut,
+    RoundChanges,
+    RoundOut,
+    VoteOut,
+)
+
+
+def record(db: Session, round_: Round, kind: str, entity_id: Optional[int] = None) -> int:
+    """Log a change to *round_* and return its sequence number. Does not commit."""
+    db.execute(update(Round).where(Round.id == round_.id).values(last_seq=Round.last_seq + 1))
+    seq = db.execute(select(Round.last_seq).where(Round.id == round_.id)).scalar_one()
+    db.add(RoundEvent(
+        round_id=round_.id,
+        seq=seq,
+        kind=kind,
+        entity_id=entity_id,
+        phase=round_.phase if kind == "phase" else None,
+    ))
+    # Removals change no cached response: activity counts include removed
+    # content, and a round's score events are only written at close.
+    if kind in ("proposal", "critique", "vote"):
+        response_cache.invalidate_on_commit(db, "agents")  # activity counts
+    return seq
+
+
+def changes_since(db: Session, round_: Round, since: int) -> RoundChanges:
+    events = []
+    if since < round_.last_seq:
+        events = (
+            db.query(RoundEvent)
+            .filter(RoundEvent.round_id == round_.id, RoundEvent.seq > since)
+            .order_by(RoundEvent.seq)
+            .all()
+        )
+
+    ids: dict[str, list[int]] = {}
+    for ev in events:
+        if ev.entity_id is not None:
+            ids.setdefault(ev.kind, []).append(ev.entity_id)
+
+    closed = any(ev.kind == "phase" and ev.phase == "closed" for ev in events)
+    proposals, critiques, votes = [], [], []
+    if ids.get("proposal") or closed:
+        query = db.query(Proposal).options(joinedload(Proposal.agent)).filter(
+            Proposal.is_removed == False  # noqa: E712
+        )
+        if closed:
+            query = query.filter(Proposal.round_id == round_.id)  # final vote counts
+        else:
+            query = query.filter(Proposal.id.in_(ids["proposal"]))
+        proposals = query.order_by(Proposal.id).all()
+    if ids.get("critique"):
+        critiques = (
+            db.query(Critique)
+            .options(joinedload(Critique.agent))
+            .filter(Critique.id.in_(ids["critique"]), Critique.is_removed == False)  # noqa: E712
+            .order_by(Critique.id)
+            .all()
+        )
+    if ids.get("vote"):
+        votes = db.query(Vote).filter(Vote.id.in_(ids["vote"])).order_by(Vote.id).all()
+
+    return RoundChanges(
+        round=RoundOut.model_validate(round_),
+        since=since,
+        last_seq=round_.last_seq,
+        proposals=[ProposalOut.from_orm_with_name(p) for p in proposals],
+        critiques=[CritiqueOut.from_orm_with_name(c) for c in critiques],
+        votes=[VoteOut.model_validate(v) for v in votes],
+        removed_proposal_ids=ids.get("proposal_removed", []),
+        removed_critique_ids=ids.get("critique_removed", []),
+        phase_changes=[
+            PhaseChange(seq=ev.seq, phase=ev.phase, at=ev.created_at)
+            for ev in events if ev.kind == "phase"
+        ],
+    )
@@ -0,0 +1,226 @@
+"""
+Vote-ring detection on the agent-to-agent vote graph.
+
+``vote_edges`` holds the nonzeros of the vote matrix: how many times each
+agent has voted for another agent's proposal in closed rounds. score_round()
+adds each closing round's votes to it (apply_round) and rebuild() recomputes
+it from the votes table::
+
+    python -m app.collusion rebuild
+
+analyse() loads the nonzeros into coordinate arrays and works on those only,
+so memory grows with the number of distinct voter/author pairs, never with
+agents squared:
+
+* reciprocity: the share of an agent's votes that went to agents who voted
+  back, counting each pair's votes up to what was returned;
+* rings: connected groups of agents joined by mutual votes of at least
+  ``min_mutual`` each way. A ring's density is the share of its member pairs
+  that vote for each other, its insularity the share of its members' votes
+  that stay inside it, and its clique score the product of the two: 1.0 for
+  a group that votes only, and all, for each other.
+
+``GET /ops/collusion`` reports both.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from sqlalchemy import and_, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app import database, shards
+from app.models import Proposal, Round, Vote, VoteEdge
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def apply_round(db: Session, pairs: Counter) -> None:
+    """Add a closing round's votes, as (voter_id, author_id) counts, in one
+    upsert so rounds closing at once add up instead of overwriting."""
+    if not pairs:
+        return
+    edges = VoteEdge.__table__
+    new = database.upsert(db, edges)
+    db.execute(
+        new.on_conflict_do_update(
+            index_elements=[edges.c.voter_id, edges.c.author_id],
+            set_={"votes": edges.c.votes + new.excluded.votes},
+        ),
+        [{"voter_id": voter, "author_id": author, "votes": votes} for (voter, author), votes in pairs.items()],
+    )
+
+
+def rebuild(db: Session) -> int:
+    """Recompute vote_edges from the votes in closed rounds. Returns the
+    number of edges; the caller commits."""
+    counts: Counter = Counter()
+    with shards.round_sessions(db) as sessions:
+        for session in sessions:
+            counts.update(dict(
+                ((voter, author), votes)
+                for voter, author, votes in session.execute(
+                    select(Vote.agent_id, Proposal.agent_id, func.count(Vote.id))
+                    .join(Proposal, Proposal.id == Vote.proposal_id)
+                    .join(Round, and_(Round.id == Vote.round_id, Round.phase == "closed"))
+                    .group_by(Vote.agent_id, Proposal.agent_id)
+                )
+            ))
+    db.execute(delete(VoteEdge))
+    if counts:
+        db.execute(insert(VoteEdge.__table__), [
+            {"voter_id": voter, "author_id": author, "votes": votes}
+            for (voter, author), votes in counts.items()
+        ])
+    return len(counts)
+
+
+@dataclass
+class VoteGraph:
+    """The vote matrix in coordinate form over agents ``ids``: entry k says
+    ids[voter[k]] voted ids[author[k]]'s proposals votes[k] times."""
+
+    ids: np.ndarray
+    voter: np.ndarray
+    author: np.ndarray
+    votes: np.ndarray
+
+    @classmethod
+    def from_edges(cls, voter_ids, author_ids, votes) -> "VoteGraph":
+        import numpy as np
+
+        voter_ids = np.asarray(voter_ids, dtype=np.int64)
+        author_ids = np.asarray(author_ids, dtype=np.int64)
+        ids, index = np.unique(np.concatenate([voter_ids, author_ids]), return_inverse=True)
+        index = index.ravel()
+        n = len(voter_ids)
+        return cls(ids, index[:n], index[n:], np.asarray(votes, dtype=np.int64))
+
+    @classmethod
+    def load(cls, db: Session) -> "VoteGraph":
+        import numpy as np
+
+        rows = db.execute(select(VoteEdge.voter_id, VoteEdge.author_id, VoteEdge.votes)).all()
+        flat = np.fromiter((value for row in rows for value in row), dtype=np.int64, count=3 * len(rows))
+        flat = flat.reshape(-1, 3)
+        return cls.from_edges(flat[:, 0], flat[:, 1], flat[:, 2])
+
+    def returned_votes(self) -> np.ndarray:
+        """For each entry (i, j), the votes j gave i (0 if none)."""
+        import numpy as np
+
+        if not len(self.votes):
+            return np.zeros(0, dtype=np.int64)
+        n = np.int64(len(self.ids))
+        keys = self.voter * n + self.author
+        order = np.argsort(keys)
+        reverse = self.author * n + self.voter
+        pos = np.minimum(np.searchsorted(keys, reverse, sorter=order), len(keys) - 1)
+        found = order[pos]
+        return np.where(keys[found] == reverse, self.votes[found], 0)
+
+
+def _components(u: np.ndarray, v: np.ndarray, size: int) -> np.ndarray:
+    """Component label (smallest member) of each of *size* nodes joined by
+    the undirected edges (u, v): min-label propagation with pointer jumping."""
+    import numpy as np
+
+    labels = np.arange(size)
+    while True:
+        low = np.minimum(labels[u], labels[v])
+        new = labels.copy()
+        np.minimum.at(new, u, low)
+        np.minimum.at(new, v, low)
+        new = new[new]
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+
+def analyse(graph: VoteGraph, min_mutual: int = 2) -> dict:
+    """Per-agent reciprocity and the vote rings of *graph*.
+
+    Returns ``agents`` (ids, votes_cast, reciprocated, reciprocity,
+    clique_score and ring index per agent, as arrays aligned with
+    graph.ids) and ``rings`` (members, mutual_pairs, density, insularity,
+    score), strongest first.
+    """
+    import numpy as np
+
+    n = len(graph.ids)
+    returned = graph.returned_votes()
+    cast = np.bincount(graph.voter, weights=graph.votes, minlength=n)
+    reciprocated = np.bincount(graph.voter, weights=np.minimum(graph.votes, returned), minlength=n)
+    reciprocity = np.divide(reciprocated, cast, out=np.zeros(n), where=cast > 0)
+
+    # Undirected mutual edges strong enough in both directions, once per pair
+    strong = (graph.voter < graph.author) & (np.minimum(graph.votes, returned) >= min_mutual)
+    u, v = graph.voter[strong], graph.author[strong]
+    members, inverse = np.unique(np.concatenate([u, v]), return_inverse=True)
+    inverse = inverse.ravel()
+    labels = _components(inverse[:len(u)], inverse[len(u):], len(members))
+    # Ring index per agent, -1 outside any ring
+    roots, ring_of_member = np.unique(labels, return_inverse=True)
+    ring = np.full(n, -1)
+    ring[members] = ring_of_member.ravel()
+
+    count = len(roots)
+    size = np.bincount(ring[members], minlength=count)
+    pairs = np.bincount(ring[u], minlength=count)
+    density = pairs / np.maximum(size * (size - 1) / 2, 1)
+    in_ring = ring[graph.voter] >= 0
+    outgoing = np.bincount(ring[graph.voter[in_ring]], weights=graph.votes[in_ring], minlength=count)
+    inside = in_ring & (ring[graph.voter] == ring[graph.author])
+    internal = np.bincount(ring[graph.voter[inside]], weights=graph.votes[inside], minlength=count)
+    insularity = np.divide(internal, outgoing, out=np.zeros(count), where=outgoing > 0)
+    score = density * insularity
+
+    clique_score = np.zeros(n)
+    clique_score[members] = score[ring[members]]
+    by_ring = np.argsort(ring[members], kind="stable")
+    ring_members = np.split(graph.ids[members[by_ring]], np.cumsum(size)[:-1]) if count else []
+    rings = sorted(
+        (
+            {
+                "index": i,
+                "members": ring_members[i].tolist(),
+                "mutual_pairs": int(pairs[i]),
+                "density": float(density[i]),
+                "insularity": float(insularity[i]),
+                "score": float(score[i]),
+            }
+            for i in range(count)
+        ),
+        key=lambda r: (-r["score"], -len(r["members"]), r["members"][0]),
+    )
+    return {
+        "agents": {
+            "ids": graph.ids,
+            "votes_cast": cast.astype(np.int64),
+            "reciprocated": reciprocated.astype(np.int64),
+            "reciprocity": reciprocity,
+            "clique_score": clique_score,
+            "ring": ring,
+        },
+        "rings": rings,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild the agent-to-agent vote matrix from closed rounds.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    database.sync_schema()
+    db = database.SessionLocal()
+    try:
+        edges = rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rebuilt {edges} vote edges")
@@ -0,0 +1,208 @@
+"""
+Negotiated compression of API responses.
+
+Text and JSON responses of at least COMPRESSION_MIN_SIZE bytes are encoded
+with the best of zstd, brotli and gzip that the client accepts. Whole bodies
+larger than COMPRESSION_THREAD_MIN_SIZE are compressed in the threadpool so a
+big RoundState does not stall the event loop. Streaming responses are
+compressed chunk by chunk and flushed after each chunk, so clients keep
+receiving data as it is produced.
+
+Responses that already carry a Content-Encoding (the precompressed static
+assets), 204/304s and ``Cache-Control: no-transform`` pass through untouched.
+"""
+
+import os
+import zlib
+
+import anyio
+
+from app.assets import choose_encoding
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION", "1").lower() not in ("0", "false", "no")
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_THREAD_MIN_SIZE = int(os.environ.get("COMPRESSION_THREAD_MIN_SIZE", str(64 * 1024)))
+# Levels trade CPU for size; the defaults favour speed for per-request work
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.environ.get("COMPRESSION_ZSTD_LEVEL", "3"))
+
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/xml",
+)
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Supported encodings, most preferred first."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return tuple(encodings)
+
+
+class Encoder:
+    """Incremental encoder with a uniform interface over the three codecs."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Encode *data*; with *flush* also emit everything buffered so far."""
+        if self.encoding == "br":
+            out = self._obj.process(data)
+            return out + self._obj.flush() if flush else out
+        out = self._obj.compress(data)
+        if not flush:
+            return out
+        if self.encoding == "gzip":
+            return out + self._obj.flush(zlib.Z_SYNC_FLUSH)
+        return out + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    encoder = Encoder(encoding)
+    return encoder.compress(data) + encoder.finish()
+
+
+def _compressible(headers: dict) -> bool:
+    if b"content-encoding" in headers:
+        return False
+    if b"no-transform" in headers.get(b"cache-control", b"").lower():
+        return False
+    content_type = headers.get(b"content-type", b"").decode("latin-1").split(";")[0].strip().lower()
+    return (
+        content_type.startswith("text/")
+        or content_type in _COMPRESSIBLE_TYPES
+        or content_type.endswith("+json")
+    )
+
+
+def _add_vary(headers: list) -> list:
+    for i, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[i] = (name, value + b", Accept-Encoding")
+            return headers
+    headers.append((b"vary", b"Accept-Encoding"))
+    return headers
+
+
+def _encoded_headers(headers: list, encoding: str, length=None) -> list:
+    out = []
+    for name, value in headers:
+        lname = name.lower()
+        if lname == b"content-length":
+            continue
+        if lname == b"etag" and not value.startswith(b"W/"):
+            # The encoded bytes differ from the identity representation
+            value = b"W/" + value
+        out.append((name, value))
+    out.append((b"content-encoding", encoding.encode()))
+    if length is not None:
+        out.append((b"content-length", str(length).encode()))
+    return out
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept = dict(scope.get("headers", [])).get(b"accept-encoding", b"").decode("latin-1")
+        encoding = choose_encoding(accept, available_encodings(), available_encodings())
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, encoder, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = dict((k.lower(), v) for k, v in message.get("headers", []))
+                if message["status"] in (204, 304) or not _compressible(headers):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold the start until the first body chunk shows the size
+                    start = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                headers = _add_vary(list(start.get("headers", [])))
+                if not more_body and len(body) < COMPRESSION_MIN_SIZE:
+                    passthrough = True
+                    await send({**start, "headers": headers})
+                    await send(message)
+                    return
+
+                if not more_body:
+                    # Whole body in hand: compress it in one go
+                    if len(body) >= COMPRESSION_THREAD_MIN_SIZE:
+                        data = await anyio.to_thread.run_sync(compress, body, encoding)
+                    else:
+                        data = compress(body, encoding)
+                    await send({**start, "headers": _encoded_headers(headers, encoding, len(data))})
+                    await send({"type": "http.response.body", "body": data})
+                    passthrough = True
+                    return
+
+                encoder = Encoder(encoding)
+                await send({**start, "headers": _encoded_headers(headers, encoding)})
+
+            if more_body:
+                if len(body) >= COMPRESSION_THREAD_MIN_SIZE:
+                    data = await anyio.to_thread.run_sync(encoder.compress, body, True)
+                else:
+                    data = encoder.compress(body, flush=True)
+            else:
+                data = encoder.compress(body) + encoder.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
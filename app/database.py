@@ -1,7 +1,19 @@
+import hashlib
 import logging
 import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from time import monotonic, perf_counter
+from typing import Optional
 
-from sqlalchemy import create_engine, text
+from fastapi import Request
+from sqlalchemy import Column, DateTime, String, Table, create_engine, delete, event, inspect, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 logger = logging.getLogger(__name__)
@@ -19,26 +31,350 @@ engine = create_engine(DATABASE_URL, connect_args=connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# ── Read replica ──────────────────────────────────────────────────────────────
 
-def run_schema_migrations():
+# GET endpoints can read through a second engine so they stop competing with
+# writes for pool slots and locks. READ_DATABASE_URL is a replica's URL, or
+# "sqlite-readonly" for read-only connections to the primary SQLite file (which
+# is then switched to WAL so readers and the writer don't block each other).
+# Unset, reads use the primary.
+READ_DATABASE_URL = os.environ.get("READ_DATABASE_URL", "")
+# An agent's own reads go to the primary this long after its last write, so
+# it never sees a replica that hasn't caught up with it yet.
+READ_YOUR_WRITES_SECONDS = float(os.environ.get("READ_YOUR_WRITES_SECONDS", "5"))
+
+
+def read_only_sqlite_url(url: str) -> str:
+    """URL opening the same SQLite file as *url* with mode=ro."""
+    path = url.split("///", 1)[1]
+    return f"sqlite:///file:{path}?mode=ro&uri=true"
+
+
+def _create_read_engine(url: str) -> Engine:
+    if url == "sqlite-readonly":
+        if not DATABASE_URL.startswith("sqlite"):
+            raise RuntimeError("READ_DATABASE_URL=sqlite-readonly needs a SQLite DATABASE_URL")
+
+        @event.listens_for(engine, "connect")
+        def _use_wal(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+        url = read_only_sqlite_url(DATABASE_URL)
+    elif url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    read_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    return create_engine(url, connect_args=read_args)
+
+
+read_engine = _create_read_engine(READ_DATABASE_URL) if READ_DATABASE_URL else None
+ReadSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=read_engine) if read_engine else None
+)
+
+# Agent name -> monotonic time of the end of its last write request
+_recent_writes: dict[str, float] = {}
+_recent_writes_lock = threading.Lock()
+
+
+def mark_write(agent_name: str) -> None:
+    now = monotonic()
+    with _recent_writes_lock:
+        _recent_writes[agent_name] = now
+        if len(_recent_writes) > 10_000:
+            cutoff = now - READ_YOUR_WRITES_SECONDS
+            for name in [n for n, t in _recent_writes.items() if t < cutoff]:
+                del _recent_writes[name]
+
+
+def wrote_recently(agent_name: str) -> bool:
+    written = _recent_writes.get(agent_name)
+    return written is not None and monotonic() - written < READ_YOUR_WRITES_SECONDS
+
+
+def reset_recent_writes() -> None:
+    with _recent_writes_lock:
+        _recent_writes.clear()
+
+
+# Lifetime connection-pool checkout/checkin counts for the main engine
+pool_counters = {"checkouts": 0, "checkins": 0}
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_counters["checkouts"] += 1
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    pool_counters["checkins"] += 1
+
+
+def pool_stats(bind=None) -> dict:
+    """Snapshot of the connection pool behind *bind* (default: the main engine)."""
+    pool = (bind or engine).pool
+    stats = {
+        "status": pool.status(),
+        "checkouts_total": pool_counters["checkouts"],
+        "checkins_total": pool_counters["checkins"],
+    }
+    # QueuePool exposes live gauges; SingletonThreadPool/StaticPool don't
+    for name in ("size", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        stats[name] = fn() if callable(fn) else None
+    return stats
+
+
+def upsert(db, table: Table):
+    """An INSERT into *table* that supports on_conflict_do_update(), for the
+    dialect *db* is bound to (SQLite 3.24+ or PostgreSQL)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+# ── Per-request query accounting ──────────────────────────────────────────────
+
+# Strict mode (for tests): raise as soon as one request issues the same SELECT,
+# modulo bound parameters, REPEATED_QUERY_LIMIT times. That is the signature of
+# an N+1 pattern such as lazy-loading `agent` per row. DML is not counted: the
+# ORM flush legitimately emits one INSERT per row on SQLite.
+STRICT_QUERIES = os.environ.get("STRICT_QUERIES", "").lower() in ("1", "true", "yes")
+REPEATED_QUERY_LIMIT = int(os.environ.get("REPEATED_QUERY_LIMIT", "3"))
+
+
+class RepeatedQueryError(RuntimeError):
+    """Raised in strict mode when a request repeats a structurally identical statement."""
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+    strict: bool = False
+    selects: Counter = field(default_factory=Counter)
+
+    def most_repeated(self) -> tuple[str, int]:
+        if not self.selects:
+            return "", 0
+        return self.selects.most_common(1)[0]
+
+
+# Set by the instrumentation middleware for the duration of a request. Sync
+# endpoints run in a threadpool with a copy of the context, so they share the
+# same QueryStats object.
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries():
+    """Count statements and DB time issued (on any engine) inside the block."""
+    stats = QueryStats(strict=STRICT_QUERIES)
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _query_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _query_stats.get()
+    if stats is None or not conn.info.get("query_start"):
+        return
+    stats.count += 1
+    stats.duration += perf_counter() - conn.info["query_start"].pop()
+    if statement.lstrip()[:6].upper() != "SELECT":
+        return
+    # Statements carry placeholders, not values, so identical text means
+    # identical structure.
+    stats.selects[statement] += 1
+    if stats.strict and stats.selects[statement] >= REPEATED_QUERY_LIMIT:
+        raise RepeatedQueryError(
+            f"Statement issued {stats.selects[statement]} times in one request "
+            f"(possible N+1): {' '.join(statement.split())[:200]}"
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+# (table, column, DDL type) for columns added after a table was first created.
+# create_all() only creates missing tables, so existing deployments need these.
+COLUMN_MIGRATIONS = [
+    ("proposals", "is_removed", "BOOLEAN NOT NULL DEFAULT FALSE"),
+    ("critiques", "is_removed", "BOOLEAN NOT NULL DEFAULT FALSE"),
+    ("rounds", "proposal_seconds", "INTEGER"),
+    ("rounds", "critique_seconds", "INTEGER"),
+    ("rounds", "voting_seconds", "INTEGER"),
+    ("rounds", "phase_deadline", "TIMESTAMP"),
+    ("agents", "webhook_url", "VARCHAR(512)"),
+    ("rounds", "last_seq", "INTEGER NOT NULL DEFAULT 0"),
+    ("proposals", "duplicate_of", "INTEGER"),
+    ("agents", "rating", "FLOAT NOT NULL DEFAULT 1500"),
+    ("agents", "rated_rounds", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+# (table, index, columns) for indexes added to a table after it was first
+# created; create_all() only indexes the tables it creates.
+INDEX_MIGRATIONS = [
+    ("score_events", "ix_score_events_round_id", "round_id"),
+]
+
+
+# DDL kept outside the ORM models (e.g. full-text search indexes) as
+# (name, install) pairs. install(connection) must be idempotent: it runs after
+# every create_all(). Names are part of the schema fingerprint, so adding one
+# makes existing deployments sync once.
+SCHEMA_EXTENSIONS: list = []
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_schema_extensions(target, connection, **kw):
+    for _, install in SCHEMA_EXTENSIONS:
+        install(connection)
+
+
+def run_schema_migrations(bind=None):
     """Add missing columns to existing tables (e.g. after deploy to DB created before is_removed existed)."""
-    # Postgres supports ADD COLUMN IF NOT EXISTS; SQLite 3.35+ does too
-    migrations = [
-        "ALTER TABLE proposals ADD COLUMN IF NOT EXISTS is_removed BOOLEAN NOT NULL DEFAULT FALSE",
-        "ALTER TABLE critiques ADD COLUMN IF NOT EXISTS is_removed BOOLEAN NOT NULL DEFAULT FALSE",
-    ]
-    for sql in migrations:
+    # Inspect rather than rely on ADD COLUMN IF NOT EXISTS, which SQLite lacks
+    bind = bind or engine
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    for table, column, ddl in COLUMN_MIGRATIONS:
+        if table not in existing_tables:
+            continue
+        if column in {c["name"] for c in inspector.get_columns(table)}:
+            continue
+        sql = f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"
         try:
-            with engine.begin() as conn:
+            with bind.begin() as conn:
                 conn.execute(text(sql))
-            logger.info("Migration applied: %s", sql[:60] + "...")
+            logger.info("Migration applied: %s", sql)
         except Exception as e:
-            # SQLite < 3.35 lacks IF NOT EXISTS; column may already exist; table may not exist yet
-            logger.debug("Migration skip or fail (may be ok): %s", e)
+            logger.warning("Migration failed: %s (%s)", sql, e)
+    for table, index, columns in INDEX_MIGRATIONS:
+        if table not in existing_tables:
+            continue
+        if index in {i["name"] for i in inspector.get_indexes(table)}:
+            continue
+        sql = f"CREATE INDEX {index} ON {table} ({columns})"
+        try:
+            with bind.begin() as conn:
+                conn.execute(text(sql))
+            logger.info("Migration applied: %s", sql)
+        except Exception as e:
+            logger.warning("Migration failed: %s (%s)", sql, e)
+
+
+# "auto" skips create_all() and the column migrations at startup when the
+# stored schema version matches the models; "always" runs them every time.
+SCHEMA_SYNC = os.environ.get("SCHEMA_SYNC", "auto").lower()
+
+schema_version = Table(
+    "schema_version",
+    Base.metadata,
+    Column("version", String(64), primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def schema_fingerprint(metadata=None) -> str:
+    """Hash of every table, column, index, column migration and schema extension."""
+    metadata = metadata or Base.metadata
+    parts = []
+    for name in sorted(metadata.tables):
+        table = metadata.tables[name]
+        parts.append(f"table {name}")
+        for col in table.columns:
+            parts.append(f"  {col.name} {col.type} null={col.nullable} pk={col.primary_key}")
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            cols = ",".join(c.name for c in index.columns)
+            parts.append(f"  index {index.name} ({cols}) unique={index.unique}")
+        for constraint in sorted(table.constraints, key=lambda c: c.name or ""):
+            cols = ",".join(c.name for c in getattr(constraint, "columns", []))
+            parts.append(f"  {type(constraint).__name__} {constraint.name} ({cols})")
+    parts.extend(f"migration {t}.{c} {ddl}" for t, c, ddl in COLUMN_MIGRATIONS)
+    parts.extend(f"migration {t} index {i} ({c})" for t, i, c in INDEX_MIGRATIONS)
+    parts.extend(f"extension {name}" for name, _ in SCHEMA_EXTENSIONS)
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def stored_schema_version(bind=None) -> Optional[str]:
+    """The fingerprint recorded by the last schema sync, or None."""
+    bind = bind or engine
+    try:
+        with bind.connect() as conn:
+            return conn.execute(select(schema_version.c.version)).scalar()
+    except SQLAlchemyError:
+        # Fresh database without the schema_version table
+        return None
+
+
+def sync_schema(bind=None, force: Optional[bool] = None, metadata=None, tables=None) -> bool:
+    """Create missing tables and columns unless the stored version is current.
+
+    Returns True when the schema work ran. On a warm database this costs one
+    SELECT instead of create_all()'s per-table reflection and the migrations.
+    *metadata* and *tables* restrict what is created, e.g. for shard files
+    (see app/shards.py); the version recorded is always that of the models.
+    """
+    bind = bind or engine
+    force = SCHEMA_SYNC == "always" if force is None else force
+    version = schema_fingerprint()
+    if not force and stored_schema_version(bind) == version:
+        return False
+
+    (metadata or Base.metadata).create_all(bind=bind, tables=tables)
+    run_schema_migrations(bind)
+    with bind.begin() as conn:
+        conn.execute(delete(schema_version))
+        conn.execute(schema_version.insert().values(version=version, applied_at=datetime.utcnow()))
+    logger.info("Schema synced to version %s", version[:12])
+    return True
+
+
+def get_db(request: Request):
+    """Session for the request; under sharding, on the shard holding the
+    ``round_id`` path parameter if there is one."""
+    from app import shards
+
+    db = shards.session_for(request.path_params.get("round_id"))
+    try:
+        yield db
+    finally:
+        db.close()
+        agent_name = request.headers.get("x-agent-name")
+        if agent_name and request.method not in ("GET", "HEAD", "OPTIONS"):
+            mark_write(agent_name)
+
 
+def get_read_db(request: Request):
+    """Session for a read-only endpoint: on the read engine when one is
+    configured, unless the calling agent wrote within READ_YOUR_WRITES_SECONDS
+    or the response is going into the response cache (``read_primary``).
+    Round shards (app/shards.py) have no replicas and are read directly."""
+    from app import shards
 
-def get_db():
-    db = SessionLocal()
+    agent_name = request.headers.get("x-agent-name")
+    primary = getattr(request.state, "read_primary", False) or (agent_name and wrote_recently(agent_name))
+    if ReadSessionLocal is None or shards.enabled() or primary:
+        db = shards.session_for(request.path_params.get("round_id"))
+    else:
+        db = ReadSessionLocal()
     try:
         yield db
     finally:
@@ -0,0 +1,215 @@
+"""
+Near-duplicate proposal detection with MinHash and LSH banding.
+
+Each proposal is reduced to the set of its word 3-grams and summarised by a
+MinHash signature of DEDUP_NUM_PERM 32-bit values; the fraction of equal
+positions in two signatures estimates the Jaccard similarity of the sets.
+Signatures are split into bands and each band is hashed into a bucket, so a
+lookup only compares against proposals sharing at least one bucket instead of
+every stored proposal. Band sizes are chosen so that pairs at
+DEDUP_THRESHOLD similarity almost always collide; candidates are then checked
+against the threshold on their full signatures.
+
+DEDUP_MODE decides what submit_proposal does with a match: "flag" stores the
+original's id in ``proposals.duplicate_of``, "reject" answers 422 before
+moderation runs, "off" skips the check. The index lives in process memory; it
+is loaded from the database on first use (or by the startup warm-up) and
+updated as proposals are committed. numpy is imported on first use, like
+the moderation word list, so it stays off the cold-start path.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import zlib
+from collections import defaultdict
+from typing import TYPE_CHECKING, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app import diagnostics, metrics, shards
+from app.models import Proposal
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEDUP_MODE = os.environ.get("DEDUP_MODE", "flag").lower()  # off | flag | reject
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.8"))
+DEDUP_NUM_PERM = int(os.environ.get("DEDUP_NUM_PERM", "128"))
+
+SHINGLE_SIZE = 3
+_SEED = 0x5EED
+_WORD = re.compile(r"\w+")
+# Odd 64-bit multipliers mixing the three word hashes of a shingle into one key
+_MIX = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F)
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """Distinct 64-bit hashes of the word 3-grams of *text*.
+
+    Each word is hashed once and neighbours are combined arithmetically rather
+    than by building the shingle strings, which dominated the cost on long
+    texts. Texts of fewer than three words are padded to a single shingle.
+    """
+    import numpy as np
+
+    words = _WORD.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    hashed = np.fromiter(map(zlib.crc32, map(str.encode, words)), dtype=np.uint64, count=len(words))
+    if len(hashed) < SHINGLE_SIZE:
+        hashed = np.pad(hashed, (0, SHINGLE_SIZE - len(hashed)))
+    mix = np.array(_MIX, dtype=np.uint64)
+    return np.unique(hashed[:-2] * mix[0] + hashed[1:-1] * mix[1] + hashed[2:])
+
+
+def choose_bands(threshold: float, num_perm: int) -> tuple[int, int]:
+    """(bands, rows) with bands * rows == num_perm whose S-curve midpoint,
+    (1 / bands) ** (1 / rows), sits just below *threshold*."""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        # Prefer midpoints under the threshold: missing a true duplicate is worse
+        # than verifying a few extra candidates.
+        penalty = abs(threshold - midpoint) + (0.5 if midpoint > threshold else 0)
+        if best is None or penalty < best[0]:
+            best = (penalty, bands, rows)
+    return best[1], best[2]
+
+
+class MinHashLSH:
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, seed: int = _SEED):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self._seed = seed
+        self._hash_params = None  # (a, b), drawn on first use
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+        self._buckets = [defaultdict(set) for _ in range(self.bands)]
+        self._signatures: dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _params(self) -> tuple[np.ndarray, np.ndarray]:
+        import numpy as np
+
+        if self._hash_params is None:
+            rng = np.random.default_rng(self._seed)
+            # Multiply-shift hash family: h(x) = (a * x + b) >> 32 with odd a, mod 2**64
+            a = rng.integers(1, 2**63, size=self.num_perm, dtype=np.uint64) | np.uint64(1)
+            b = rng.integers(0, 2**63, size=self.num_perm, dtype=np.uint64)
+            self._hash_params = (a, b)
+        return self._hash_params
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of *text*, or None if it has no words."""
+        import numpy as np
+
+        hashes = shingle_hashes(text)
+        if not len(hashes):
+            return None
+        a, b = self._params()
+        permuted = np.multiply.outer(hashes, a)
+        permuted += b
+        # The shift is monotonic, so it can be applied after taking the minimum
+        return (permuted.min(axis=0) >> np.uint64(32)).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray):
+        for band in range(self.bands):
+            yield band, sig[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key: int, sig: np.ndarray) -> None:
+        with self._lock:
+            self._signatures[key] = sig
+            for band, band_key in self._band_keys(sig):
+                self._buckets[band][band_key].add(key)
+
+    def query(self, sig: np.ndarray) -> list[tuple[int, float]]:
+        """(key, estimated similarity) of stored entries at or above the threshold,
+        most similar first."""
+        with self._lock:
+            candidates = set()
+            for band, band_key in self._band_keys(sig):
+                candidates |= self._buckets[band].get(band_key, set())
+            matches = []
+            for key in candidates:
+                similarity = float((self._signatures[key] == sig).sum()) / self.num_perm
+                if similarity >= self.threshold:
+                    matches.append((key, similarity))
+        return sorted(matches, key=lambda m: (-m[1], m[0]))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._signatures.clear()
+            for buckets in self._buckets:
+                buckets.clear()
+
+
+index = MinHashLSH(DEDUP_THRESHOLD, DEDUP_NUM_PERM)
+_loaded = False
+_load_lock = threading.Lock()
+diagnostics.register_cache("dedup_signatures", lambda: len(index))
+
+
+def ensure_loaded(db: Session) -> None:
+    """Index every stored proposal once per process."""
+    global _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if _loaded:
+            return
+        with shards.round_sessions(db) as sessions:
+            for session in sessions:
+                for proposal_id, content in session.query(Proposal.id, Proposal.content):
+                    sig = index.signature(content)
+                    if sig is not None:
+                        index.add(proposal_id, sig)
+        _loaded = True
+
+
+def reset() -> None:
+    """Empty the index; it reloads from the database on next use. For tests."""
+    global _loaded
+    with _load_lock:
+        index.clear()
+        _loaded = False
+
+
+def check(db: Session, content: str) -> tuple[Optional[np.ndarray], Optional[int]]:
+    """Look *content* up before it is stored.
+
+    Returns (signature, duplicate_of). Raises HTTP 422 in reject mode. Pass the
+    signature to remember() once the proposal is committed.
+    """
+    if DEDUP_MODE == "off":
+        return None, None
+    ensure_loaded(db)
+    sig = index.signature(content)
+    if sig is None:
+        return None, None
+    matches = index.query(sig)
+    if not matches:
+        return sig, None
+    original, similarity = matches[0]
+    metrics.DUPLICATE_PROPOSALS.inc(DEDUP_MODE)
+    if DEDUP_MODE == "reject":
+        raise HTTPException(
+            status_code=422,
+            detail=f"Proposal is a near-duplicate of proposal {original} ({similarity:.0%} similar).",
+        )
+    return sig, original
+
+
+def remember(proposal_id: int, sig: Optional[np.ndarray]) -> None:
+    if sig is not None and _loaded:
+        index.add(proposal_id, sig)
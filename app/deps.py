@@ -1,11 +1,18 @@
+import hmac
+import os
 import uuid
+from typing import Optional
 
-from fastapi import Depends, Header
+from fastapi import Depends, Header, HTTPException
 from sqlalchemy.orm import Session
 
+from app import response_cache
 from app.database import get_db
 from app.models import Agent
 
+# Shared secret for operator-only endpoints under /ops. Unset disables them.
+OPS_TOKEN = os.environ.get("OPS_TOKEN", "")
+
 
 def get_current_agent(
     x_agent_name: str = Header(..., description="Agent name (auto-registered on first use)"),
@@ -15,6 +22,14 @@ def get_current_agent(
     if not agent:
         agent = Agent(name=x_agent_name, api_key=str(uuid.uuid4()))
         db.add(agent)
+        response_cache.invalidate_on_commit(db, "agents", "leaderboard")
         db.commit()
         db.refresh(agent)
     return agent
+
+
+def require_ops_token(x_ops_token: Optional[str] = Header(None)) -> None:
+    if not OPS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not x_ops_token or not hmac.compare_digest(x_ops_token, OPS_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Ops-Token")
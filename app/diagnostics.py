@@ -0,0 +1,122 @@
+"""
+Memory diagnostics for long-running workers.
+
+Modules that keep in-process state register a size function with
+:func:`register_cache` so operators can watch it grow. Allocation tracking
+uses tracemalloc; it is started on the first report (or at boot with
+PYTHONTRACEMALLOC=<frames>), and every report is diffed against the previous
+one so a leak shows up as a location whose size keeps increasing.
+"""
+
+import gc
+import os
+import threading
+import tracemalloc
+from typing import Callable
+
+TRACEMALLOC_FRAMES = int(os.environ.get("TRACEMALLOC_FRAMES", "1"))
+
+_caches: dict[str, Callable[[], int]] = {}
+_snapshot_lock = threading.Lock()
+_last_snapshot: tracemalloc.Snapshot | None = None
+
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def register_cache(name: str, size_fn: Callable[[], int]) -> None:
+    """Report ``size_fn()`` under *name* in the diagnostics cache table."""
+    _caches[name] = size_fn
+
+
+def cache_sizes() -> dict[str, int]:
+    return {name: size_fn() for name, size_fn in sorted(_caches.items())}
+
+
+def gc_stats() -> list[dict]:
+    counts = gc.get_count()
+    thresholds = gc.get_threshold()
+    return [
+        {
+            "generation": gen,
+            "collections": stats["collections"],
+            "collected": stats["collected"],
+            "uncollectable": stats["uncollectable"],
+            "pending": counts[gen],
+            "threshold": thresholds[gen],
+        }
+        for gen, stats in enumerate(gc.get_stats())
+    ]
+
+
+def rss_bytes() -> int | None:
+    """Current resident set size, where /proc is available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def live_object_counts(types: dict[str, type]) -> dict[str, int]:
+    """Count live instances of each type in *types* (walks the whole GC heap)."""
+    counts = dict.fromkeys(types, 0)
+    lookup = tuple(types.items())
+    for obj in gc.get_objects():
+        for name, cls in lookup:
+            if isinstance(obj, cls):
+                counts[name] += 1
+    return counts
+
+
+def _format_stat(stat) -> dict:
+    frame = stat.traceback[0]
+    entry = {
+        "location": f"{frame.filename}:{frame.lineno}",
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+    if hasattr(stat, "size_diff"):
+        entry["size_diff_bytes"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+def allocation_report(top: int = 20) -> dict:
+    """Top allocators now, and the biggest movers since the previous call."""
+    global _last_snapshot
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+    with _snapshot_lock:
+        previous, _last_snapshot = _last_snapshot, snapshot
+
+    current, peak = tracemalloc.get_traced_memory()
+    diff = []
+    if previous is not None:
+        diff = [
+            _format_stat(s)
+            for s in snapshot.compare_to(previous, "lineno")[:top]
+            if s.size_diff or s.count_diff
+        ]
+    return {
+        "tracing": True,
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "top_allocations": [_format_stat(s) for s in snapshot.statistics("lineno")[:top]],
+        "diff_since_last": diff,
+    }
+
+
+def reset() -> None:
+    """Forget the stored snapshot and stop tracing. Intended for use in tests."""
+    global _last_snapshot
+    with _snapshot_lock:
+        _last_snapshot = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
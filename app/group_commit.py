@@ -0,0 +1,190 @@
+"""
+Group commit for votes.
+
+When a voting phase opens every agent votes within seconds, and each vote
+would otherwise be its own transaction with its own commit (an fsync on
+SQLite). With VOTE_GROUP_COMMIT on, cast_vote hands the vote to a single
+writer thread instead. The writer collects everything queued within
+VOTE_BATCH_WINDOW_MS of the first vote, up to VOTE_BATCH_MAX_SIZE votes. It
+validates them with one query each for rounds, proposals and existing votes,
+inserts the valid ones and commits once. Each waiting request then gets its
+own outcome: the stored vote, or the same 404/409/422 the direct path would
+raise, including a second vote by the same agent in the same batch. A
+request that times out waiting withdraws its vote, so the 503 it answers is
+safe to retry.
+
+Batches are committed per shard (app/shards.py). If the insert still hits
+the one-vote-per-round constraint, e.g. because another process wrote a vote
+in between, the batch is rolled back and its votes are retried one per
+transaction, so only the conflicting vote fails.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import changes, metrics, shards
+from app.models import Proposal, Round, Vote
+from app.schemas import VoteOut
+
+logger = logging.getLogger(__name__)
+
+VOTE_GROUP_COMMIT = os.environ.get("VOTE_GROUP_COMMIT", "").lower() in ("1", "true", "yes")
+VOTE_BATCH_WINDOW_MS = float(os.environ.get("VOTE_BATCH_WINDOW_MS", "5"))
+VOTE_BATCH_MAX_SIZE = int(os.environ.get("VOTE_BATCH_MAX_SIZE", "100"))
+# How long a request waits for its batch before giving up with 503
+VOTE_BATCH_TIMEOUT_SECONDS = 30.0
+
+
+@dataclass
+class PendingVote:
+    round_id: int
+    agent_id: int
+    proposal_id: int
+    result: Future = field(default_factory=Future)
+
+
+class VoteBatcher:
+    def __init__(self):
+        self._queue: "queue.Queue[PendingVote]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, round_id: int, agent_id: int, proposal_id: int) -> VoteOut:
+        """Queue a vote and block until its batch is committed."""
+        pending = PendingVote(round_id, agent_id, proposal_id)
+        self._ensure_started()
+        self._queue.put(pending)
+        try:
+            return pending.result.result(timeout=VOTE_BATCH_TIMEOUT_SECONDS)
+        except TimeoutError:
+            # Withdraw the vote so a retry can't collide with it. If the writer
+            # has already picked it up, its outcome is moments away.
+            if not pending.result.cancel():
+                return pending.result.result()
+            raise HTTPException(status_code=503, detail="Vote could not be committed in time; retry")
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="vote-group-commit", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> list[PendingVote]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + VOTE_BATCH_WINDOW_MS / 1000
+        while len(batch) < VOTE_BATCH_MAX_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            self.commit(self._collect())
+
+    def commit(self, batch: list[PendingVote]) -> None:
+        """Commit *batch*, one transaction per shard, and resolve every vote.
+        Votes whose requests gave up waiting (cancelled) are skipped."""
+        by_shard: dict[int, list[PendingVote]] = {}
+        for pending in batch:
+            if not pending.result.set_running_or_notify_cancel():
+                continue
+            key = shards.router.shard_of(pending.round_id) if shards.router else 0
+            by_shard.setdefault(key, []).append(pending)
+        for group in by_shard.values():
+            self._commit_group(group)
+
+    def _commit_group(self, group: list[PendingVote]) -> None:
+        db = shards.session_for(group[0].round_id)
+        try:
+            try:
+                outcomes = _apply(db, group)
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                if len(group) > 1:
+                    for pending in group:
+                        self._commit_group([pending])
+                    return
+                outcomes = [HTTPException(status_code=409, detail="You have already voted in this round")]
+            metrics.VOTE_BATCH_SIZE.observe(len(group))
+            for pending, outcome in zip(group, outcomes):
+                if isinstance(outcome, Exception):
+                    pending.result.set_exception(outcome)
+                else:
+                    pending.result.set_result(outcome)
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Vote group commit failed")
+            for pending in group:
+                if not pending.result.done():
+                    pending.result.set_exception(exc)
+        finally:
+            db.close()
+
+
+def _apply(db: Session, group: list[PendingVote]) -> list:
+    """Validate and stage *group*; return a VoteOut or HTTPException per vote.
+
+    Checks run in the same order, with the same messages, as cast_vote.
+    """
+    round_ids = {p.round_id for p in group}
+    rounds = {r.id: r for r in db.query(Round).filter(Round.id.in_(round_ids))}
+    proposals = {
+        p.id: p
+        for p in db.query(Proposal).filter(Proposal.id.in_({p.proposal_id for p in group}))
+    }
+    voted = set(
+        db.query(Vote.round_id, Vote.agent_id).filter(
+            Vote.round_id.in_(round_ids), Vote.agent_id.in_({p.agent_id for p in group})
+        )
+    )
+
+    outcomes: list = []
+    staged: list[tuple[int, Vote]] = []
+    for pending in group:
+        round_ = rounds.get(pending.round_id)
+        proposal = proposals.get(pending.proposal_id)
+        if round_ is None:
+            outcomes.append(HTTPException(status_code=404, detail="Round not found"))
+        elif round_.phase != "voting":
+            outcomes.append(HTTPException(
+                status_code=409,
+                detail=f"Votes can only be cast during the voting phase (current: {round_.phase})",
+            ))
+        elif proposal is None or proposal.round_id != pending.round_id:
+            outcomes.append(HTTPException(status_code=404, detail="Proposal not found in this round"))
+        elif proposal.agent_id == pending.agent_id:
+            outcomes.append(HTTPException(status_code=422, detail="You cannot vote for your own proposal"))
+        elif (pending.round_id, pending.agent_id) in voted:
+            outcomes.append(HTTPException(status_code=409, detail="You have already voted in this round"))
+        else:
+            voted.add((pending.round_id, pending.agent_id))
+            vote = Vote(round_id=pending.round_id, agent_id=pending.agent_id, proposal_id=pending.proposal_id)
+            db.add(vote)
+            staged.append((len(outcomes), vote))
+            outcomes.append(None)
+
+    if staged:
+        db.flush()
+        for index, vote in staged:
+            changes.record(db, rounds[vote.round_id], "vote", vote.id)
+            # Built before commit, which would expire the attributes
+            outcomes[index] = VoteOut.model_validate(vote)
+    return outcomes
+
+
+batcher = VoteBatcher()
@@ -0,0 +1,207 @@
+"""
+Idempotency-Key support for POST endpoints under /rounds.
+
+A client that retries a write after a timeout sends the same
+``Idempotency-Key`` header. The first response for (agent, path, key) is kept
+in a TTL-bounded in-memory store and replayed byte-for-byte on retries, with
+``Idempotent-Replayed: true``, without running the endpoint again. A retry
+that arrives while the original is still running waits for it. Reusing a key
+with a different body is rejected with 422. Only successes and 4xx answers
+that a retry would get again (REPLAYED_ERRORS) are stored; 5xx, 429 and
+other transient errors are discarded so the retry runs for real.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app import diagnostics
+
+IDEMPOTENCY_TTL_SECONDS = float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "3600"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.environ.get("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+# How long a retry waits for the original request to finish before giving up
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", "30"))
+
+IDEMPOTENT_PATH_PREFIXES = ("/rounds",)
+# Client errors that depend only on the request, so replaying them is safe.
+# 409 (phase and uniqueness conflicts) and 429 (rate limits) can clear up.
+REPLAYED_ERRORS = frozenset({400, 401, 403, 404, 405, 410, 413, 422})
+MAX_KEY_LENGTH = 255
+
+_KEY_HEADER = b"idempotency-key"
+_AGENT_HEADER = b"x-agent-name"
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    expires_at: float
+    status: Optional[int] = None
+    headers: list = field(default_factory=list)
+    body: bytes = b""
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class IdempotencyStore:
+    """LRU dict of responses that also drops entries older than the TTL."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, StoredResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float) -> None:
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+    def get_or_reserve(self, key: tuple, fingerprint: str,
+                       now: Optional[float] = None) -> tuple[StoredResponse, bool]:
+        """Return (entry, created). A new entry is reserved as in-flight."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                return entry, False
+            entry = StoredResponse(fingerprint=fingerprint, expires_at=now + self.ttl)
+            self._entries[key] = entry
+            self._evict(now)
+            return entry, True
+
+    def discard(self, key: tuple) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+store = IdempotencyStore(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_ENTRIES)
+diagnostics.register_cache("idempotency_responses", lambda: len(store))
+
+
+def reset() -> None:
+    """Forget all stored responses. Intended for use in tests."""
+    store.clear()
+
+
+async def _send_json(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _replay(send, entry: StoredResponse) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": entry.status,
+        "headers": entry.headers + [(b"idempotent-replayed", b"true")],
+    })
+    await send({"type": "http.response.body", "body": entry.body})
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].startswith(IDEMPOTENT_PATH_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        raw_key = headers.get(_KEY_HEADER)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            return
+
+        # Buffer the request body so it can be fingerprinted and replayed downstream
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+
+        key = (headers.get(_AGENT_HEADER, b""), scope["path"], raw_key)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        entry, created = store.get_or_reserve(key, fingerprint)
+
+        if not created:
+            if entry.fingerprint != fingerprint:
+                await _send_json(send, 422, "Idempotency-Key was already used with a different request body")
+                return
+            try:
+                await asyncio.wait_for(entry.done.wait(), IDEMPOTENCY_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                await _send_json(send, 409, "A request with this Idempotency-Key is still in progress")
+                return
+            if entry.status is None:
+                # The original's response wasn't stored; let the caller retry
+                await _send_json(send, 409, "The original request with this Idempotency-Key failed; retry")
+                return
+            await _replay(send, entry)
+            return
+
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status = None
+        response_headers: list = []
+        response_body: list[bytes] = []
+
+        async def capture_send(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response_body.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        finally:
+            if status is not None and (200 <= status < 300 or status in REPLAYED_ERRORS):
+                entry.status = status
+                entry.headers = [(k, v) for k, v in response_headers
+                                 if k.lower() not in (b"server-timing", b"x-profile-id")]
+                entry.body = b"".join(response_body)
+            else:
+                store.discard(key)
+            entry.done.set()
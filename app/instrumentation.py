@@ -0,0 +1,95 @@
+"""
+ASGI middleware that records per-request metrics and SQL timings.
+
+Labels requests by route template (e.g. ``/rounds/{round_id}/votes``) rather
+than the raw path so metric cardinality stays bounded. Every response carries
+a ``Server-Timing`` header with the DB time and statement count, and each
+request is written to the ``app.access`` log with the same numbers.
+"""
+
+import logging
+from time import perf_counter
+
+from app import metrics
+from app.database import track_queries
+
+access_logger = logging.getLogger("app.access")
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope) -> str:
+    """Rebuild the matched route's path template from the concrete path.
+
+    Path parameters are substituted right-to-left so that a value equal to a
+    literal segment earlier in the path (``/rounds/rounds``) is not mistaken
+    for it. Nested routers don't expose the full prefixed template on every
+    FastAPI version, so this is derived from ``path_params`` instead.
+    """
+    if scope.get("route") is None:
+        return UNMATCHED_ROUTE
+    segments = scope["path"].split("/")
+    pending = list((scope.get("path_params") or {}).items())
+    for i in range(len(segments) - 1, -1, -1):
+        if not pending:
+            break
+        name, value = pending[-1]
+        if segments[i] == str(value):
+            segments[i] = "{%s}" % name
+            pending.pop()
+    return "/".join(segments)
+
+
+class InstrumentationMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timing = server_timing(db_stats, perf_counter() - start)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        start = perf_counter()
+        with track_queries() as db_stats:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed = perf_counter() - start
+                method = scope["method"]
+                route = route_template(scope)
+                metrics.HTTP_REQUESTS.inc(method, route, status_code)
+                metrics.HTTP_LATENCY.observe(elapsed, method, route)
+                metrics.DB_STATEMENTS.observe(db_stats.count, method, route)
+                metrics.DB_TIME.observe(db_stats.duration, method, route)
+                _, repeated = db_stats.most_repeated()
+                access_logger.info(
+                    "%s %s %s %.1fms db=%.1fms db_count=%d max_repeat=%d",
+                    method,
+                    scope["path"],
+                    status_code,
+                    elapsed * 1000,
+                    db_stats.duration * 1000,
+                    db_stats.count,
+                    repeated,
+                )
+
+
+def server_timing(db_stats, elapsed: float) -> str:
+    """Format a Server-Timing header value for the work done so far."""
+    return (
+        f"db;dur={db_stats.duration * 1000:.2f}, "
+        f'db-count;desc="{db_stats.count} statements", '
+        f"app;dur={elapsed * 1000:.2f}"
+    )
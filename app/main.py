@@ -1,29 +1,47 @@
 import logging
-import os
 import traceback
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
 
 logger = logging.getLogger(__name__)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, PlainTextResponse
-from fastapi.staticfiles import StaticFiles
-
-from app.database import Base, engine, run_schema_migrations
+from fastapi.responses import PlainTextResponse
+
+from app import assets, metrics, shards, warmup, webhooks
+from app.compression import CompressionMiddleware
+from app.database import sync_schema
+from app.idempotency import IdempotencyMiddleware
+from app.instrumentation import InstrumentationMiddleware
+from app.profiling import ProfilingMiddleware
+from app.response_cache import ResponseCacheMiddleware
 from app.routers.agents import router as agents_router
+from app.routers.export import router as export_router
 from app.routers.leaderboard import router as leaderboard_router
+from app.routers.ops import router as ops_router
 from app.routers.rounds import router as rounds_router
-
-STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
-
+from app.routers.search import router as search_router
+from app.scheduler import PHASE_SCHEDULER_ENABLED, scheduler
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
-    run_schema_migrations()
+    shard_router = shards.configure()
+    if shard_router:
+        shard_router.sync_schema()
+    else:
+        sync_schema()
+    if PHASE_SCHEDULER_ENABLED:
+        scheduler.start()
+    if webhooks.WEBHOOKS_ENABLED:
+        webhooks.dispatcher.start()
+    if warmup.WARMUP_ENABLED:
+        warmup.start()
     yield
+    if webhooks.WEBHOOKS_ENABLED:
+        webhooks.dispatcher.stop()
+    if PHASE_SCHEDULER_ENABLED:
+        scheduler.stop()
 
 
 app = FastAPI(
@@ -56,13 +74,18 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(ResponseCacheMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(InstrumentationMiddleware)
 
 app.include_router(agents_router, prefix="/agents", tags=["Agents"])
 app.include_router(rounds_router, prefix="/rounds", tags=["Rounds"])
 app.include_router(leaderboard_router, prefix="/leaderboard", tags=["Leaderboard"])
-
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
-
+app.include_router(search_router, prefix="/search", tags=["Search"])
+app.include_router(export_router, prefix="/export", tags=["Export"])
+app.include_router(ops_router, prefix="/ops", tags=["Operations"], include_in_schema=False)
 
 @app.get("/health", include_in_schema=False)
 def health():
@@ -70,14 +93,26 @@ def health():
     return {"status": "ok"}
 
 
-@app.get("/", include_in_schema=False)
-def root():
-    return FileResponse(os.path.join(STATIC_DIR, "index.html"))
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    """Prometheus scrape target."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.api_route("/", methods=["GET", "HEAD"], include_in_schema=False)
+def root(request: Request):
+    return assets.asset_response(request, assets.get("/"))
+
+
+@app.api_route("/SKILL.md", methods=["GET", "HEAD"], include_in_schema=False)
+def skill(request: Request):
+    return assets.asset_response(request, assets.get("/SKILL.md"))
 
 
-@app.get("/SKILL.md", include_in_schema=False)
-def skill():
-    skill_path = os.path.join(os.path.dirname(__file__), "..", "SKILL.md")
-    with open(os.path.abspath(skill_path)) as f:
-        content = f.read()
-    return PlainTextResponse(content)
+@app.api_route("/static/{name}", methods=["GET", "HEAD"], include_in_schema=False)
+def static_file(name: str, request: Request):
+    asset = assets.get(f"/static/{name}")
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    versioned = request.query_params.get("v") == asset.version
+    return assets.asset_response(request, asset, immutable=versioned)
@@ -0,0 +1,190 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Counters and histograms are sharded per thread: each writer thread records
+into its own dict, so the hot path never takes a lock (the shard list lock is
+only taken the first time a thread writes to a metric). A scrape snapshots and
+sums every shard.
+"""
+
+import threading
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry: list["_Metric"] = []
+_shards_lock = threading.Lock()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        _registry.append(self)
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values: dict = {}
+            with _shards_lock:
+                self._shards.append(values)
+            self._local.values = values
+            return values
+
+    def _snapshots(self) -> list[dict]:
+        with _shards_lock:
+            shards = list(self._shards)
+        # dict.copy() is atomic under the GIL, so a concurrent writer can't
+        # change a shard's size while it is being read.
+        return [shard.copy() for shard in shards]
+
+    def clear(self) -> None:
+        with _shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+    def _labels(self, values: tuple, extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(str(v))}"' for k, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> dict[tuple, float]:
+        totals: dict[tuple, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{self._labels(labels)} {_fmt(value)}"
+            for labels, value in sorted(self.values().items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        shard = self._shard()
+        slots = shard.get(labels)
+        if slots is None:
+            # one slot per bucket, one for +Inf, then sum and count
+            slots = shard[labels] = [0] * (len(self.buckets) + 3)
+        slots[bisect_left(self.buckets, value)] += 1
+        slots[-2] += value
+        slots[-1] += 1
+
+    def values(self) -> dict[tuple, list]:
+        totals: dict[tuple, list] = {}
+        for shard in self._snapshots():
+            for labels, slots in shard.items():
+                slots = list(slots)
+                acc = totals.get(labels)
+                totals[labels] = slots if acc is None else [a + b for a, b in zip(acc, slots)]
+        return totals
+
+    def render(self) -> list[str]:
+        lines = []
+        for labels, slots in sorted(self.values().items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), slots):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else _fmt(bound)
+                bucket_labels = self._labels(labels, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {_fmt(slots[-2])}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {slots[-1]}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render() -> str:
+    """Render every registered metric in the Prometheus text format."""
+    lines: list[str] = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Zero all metrics. Intended for use in tests."""
+    for metric in _registry:
+        metric.clear()
+
+
+# ── Application metrics ───────────────────────────────────────────────────────
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status code.",
+    ("method", "route", "status"),
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route"),
+)
+DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements issued per HTTP request.",
+    ("method", "route"), buckets=COUNT_BUCKETS,
+)
+DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per HTTP request.",
+    ("method", "route"),
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total", "Requests rejected by check_rate_limit, by action.",
+    ("action",),
+)
+MODERATION_REJECTIONS = Counter(
+    "moderation_rejections_total", "Content rejected by the moderation filter.",
+)
+DUPLICATE_PROPOSALS = Counter(
+    "duplicate_proposals_total", "Near-duplicate proposals detected, by action (flag or reject).",
+    ("action",),
+)
+VOTE_BATCH_SIZE = Histogram(
+    "vote_commit_batch_size", "Votes committed per group-commit transaction.",
+    buckets=COUNT_BUCKETS,
+)
+PHASE_TRANSITIONS = Counter(
+    "phase_transitions_total", "Round phase transitions.",
+    ("from_phase", "to_phase"),
+)
+RESPONSE_CACHE = Counter(
+    "response_cache_requests_total", "Cacheable GET requests by result (hit, stale, miss or refresh).",
+    ("result",),
+)
@@ -5,10 +5,12 @@ from sqlalchemy import (
     CheckConstraint,
     Column,
     DateTime,
+    Float,
     ForeignKey,
     Integer,
     String,
     Text,
+    Index,
     UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
@@ -23,7 +25,11 @@ class Agent(Base):
     name = Column(String(64), unique=True, nullable=False, index=True)
     api_key = Column(String(36), unique=True, nullable=False, index=True)
     total_score = Column(Integer, default=0, nullable=False)
+    # Elo skill rating, see app/ratings.py
+    rating = Column(Float, default=1500.0, server_default="1500", nullable=False)
+    rated_rounds = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    webhook_url = Column(String(512), nullable=True)
 
     proposals = relationship("Proposal", back_populates="agent")
     critiques = relationship("Critique", back_populates="agent")
@@ -40,6 +46,14 @@ class Round(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     closed_at = Column(DateTime, nullable=True)
     created_by = Column(Integer, ForeignKey("agents.id"), nullable=False)
+    # Optional per-phase durations; the scheduler advances the round when
+    # phase_deadline (end of the current phase) passes.
+    proposal_seconds = Column(Integer, nullable=True)
+    critique_seconds = Column(Integer, nullable=True)
+    voting_seconds = Column(Integer, nullable=True)
+    phase_deadline = Column(DateTime, nullable=True, index=True)
+    # Sequence number of the latest round_events row; see app/changes.py
+    last_seq = Column(Integer, nullable=False, default=0)
 
     proposals = relationship("Proposal", back_populates="round")
     score_events = relationship("ScoreEvent", back_populates="round")
@@ -55,6 +69,8 @@ class Proposal(Base):
     submitted_at = Column(DateTime, default=datetime.utcnow)
     vote_count = Column(Integer, default=0, nullable=False)
     is_removed = Column(Boolean, default=False, nullable=False)
+    # Earlier proposal this one nearly duplicates (see app/dedup.py)
+    duplicate_of = Column(Integer, ForeignKey("proposals.id"), nullable=True)
 
     round = relationship("Round", back_populates="proposals")
     agent = relationship("Agent", back_populates="proposals")
@@ -132,10 +148,79 @@ class ScoreEvent(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     agent_id = Column(Integer, ForeignKey("agents.id"), nullable=False)
-    round_id = Column(Integer, ForeignKey("rounds.id"), nullable=False)
+    round_id = Column(Integer, ForeignKey("rounds.id"), nullable=False, index=True)
     reason = Column(String(32), nullable=False)  # participation | win | critique_bonus
     points = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     agent = relationship("Agent", back_populates="score_events")
     round = relationship("Round", back_populates="score_events")
+
+
+class AgentStats(Base):
+    """Per-agent rollup over closed rounds, see app/agent_stats.py."""
+
+    __tablename__ = "agent_stats"
+
+    agent_id = Column(Integer, ForeignKey("agents.id"), primary_key=True)
+    rounds_played = Column(Integer, nullable=False, default=0)  # closed rounds with a proposal
+    rounds_won = Column(Integer, nullable=False, default=0)
+    votes_received = Column(Integer, nullable=False, default=0)
+    rounds_critiqued = Column(Integer, nullable=False, default=0)  # ... in which it also critiqued
+    current_win_streak = Column(Integer, nullable=False, default=0)
+    longest_win_streak = Column(Integer, nullable=False, default=0)
+    last_round_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class VoteEdge(Base):
+    """Votes one agent has given another's proposals in closed rounds: one
+    nonzero of the sparse vote matrix analysed by app/collusion.py."""
+
+    __tablename__ = "vote_edges"
+
+    voter_id = Column(Integer, ForeignKey("agents.id"), primary_key=True)
+    author_id = Column(Integer, ForeignKey("agents.id"), primary_key=True)
+    votes = Column(Integer, nullable=False, default=0)
+
+
+class RoundEvent(Base):
+    """One row per write to a round, numbered per round for delta polling."""
+
+    __tablename__ = "round_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    round_id = Column(Integer, ForeignKey("rounds.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    # proposal | critique | vote | proposal_removed | critique_removed | phase
+    kind = Column(String(24), nullable=False)
+    entity_id = Column(Integer, nullable=True)
+    phase = Column(String(16), nullable=True)  # new phase, for kind == "phase"
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("round_id", "seq", name="uq_round_event_seq"),
+    )
+
+
+class WebhookEvent(Base):
+    __tablename__ = "webhook_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    agent_id = Column(Integer, ForeignKey("agents.id"), nullable=False)
+    # phase_changed | critique_requested | round_results
+    event_type = Column(String(32), nullable=False)
+    round_id = Column(Integer, ForeignKey("rounds.id"), nullable=True)
+    payload = Column(Text, nullable=False)  # JSON
+    # pending | delivered | failed
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(String(256), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_webhook_events_pending", "status", "next_attempt_at"),
+        Index("ix_webhook_events_agent_status", "agent_id", "status"),
+    )
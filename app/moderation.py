@@ -4,16 +4,34 @@ Uses `better-profanity`, which ships its own trained word list inside the
 package. No blocked terms are stored in this repository.
 """
 
-from better_profanity import profanity
 from fastapi import HTTPException
 
+from app import metrics
+
 # Number of distinct-agent reports needed to auto-remove a piece of content.
 REMOVAL_THRESHOLD = 2
 
 
+_profanity = None
+
+
+def load_filter():
+    """Import better-profanity and its word list on first use.
+
+    Deferred so a cold start does not pay for it before the port is bound.
+    """
+    global _profanity
+    if _profanity is None:
+        from better_profanity import profanity
+
+        _profanity = profanity
+    return _profanity
+
+
 def check_content(text: str) -> None:
     """Raise HTTP 422 if *text* is flagged as toxic."""
-    if profanity.contains_profanity(text):
+    if load_filter().contains_profanity(text):
+        metrics.MODERATION_REJECTIONS.inc()
         raise HTTPException(
             status_code=422,
             detail="Content was rejected by the moderation filter.",
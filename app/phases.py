@@ -0,0 +1,185 @@
+"""
+Round phase transitions.
+
+Shared by the advance endpoint and the deadline scheduler so both apply the
+same guards and scoring. Functions here mutate the round and add rows but
+never commit; the caller owns the transaction.
+
+An advance first checks its guard with aggregate reads only, so a
+premature advance (an agent polling until the phase can move) answers 409
+without taking the write lock. Once the guard passes, the transition is
+claimed with a compare-and-set UPDATE on ``rounds.phase``: of several
+concurrent advances from the same phase, only the one whose UPDATE matched
+goes on to score; the others get a 409. Guards only ever go from unmet to
+met within a phase, so one that passed before the claim still holds.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import changes, webhooks
+from app.models import Agent, Critique, Proposal, Round, Vote
+from app.scoring import score_round
+
+# Rounds in these phases accept no more actions or transitions.
+TERMINAL_PHASES = ("closed", "expired")
+
+# Phase an advance moves to from each active phase
+NEXT_PHASE = {"proposal": "critique", "critique": "voting", "voting": "closed"}
+
+# Round column holding the configured duration of each timed phase
+_DURATION_COLUMNS = {
+    "proposal": "proposal_seconds",
+    "critique": "critique_seconds",
+    "voting": "voting_seconds",
+}
+
+
+def deadline_for(round_: Round, phase: str, start: datetime) -> Optional[datetime]:
+    """When *phase* should end if it starts at *start*, or None if untimed."""
+    column = _DURATION_COLUMNS.get(phase)
+    seconds = getattr(round_, column) if column else None
+    return start + timedelta(seconds=seconds) if seconds else None
+
+
+def claim_transition(db: Session, round_: Round, phase: str, now: Optional[datetime] = None) -> None:
+    """Move *round_* from its loaded phase to *phase* if nobody else has.
+
+    A conditional UPDATE (``WHERE id = ? AND phase = <loaded phase>``), so
+    exactly one of several concurrent callers matches a row. The others get
+    a 409. On success *round_* is updated in place.
+    """
+    now = now or datetime.utcnow()
+    previous_phase = round_.phase
+    values = {"phase": phase, "phase_deadline": deadline_for(round_, phase, now)}
+    if phase in TERMINAL_PHASES:
+        values["closed_at"] = now
+    result = db.execute(
+        update(Round)
+        .where(Round.id == round_.id, Round.phase == previous_phase)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Round has already moved on from the {previous_phase} phase",
+        )
+    for key, value in values.items():
+        set_committed_value(round_, key, value)
+
+
+def _close(db: Session, round_: Round) -> str:
+    """Score a round whose move to "closed" has just been claimed."""
+    events = score_round(db, round_.id)
+
+    win_events = [e for e in events if e.reason == "win"]
+    if not win_events:
+        return "Round closed. No votes were cast; participation points awarded."
+    # Flush so IDs are available, then build winner summary
+    db.flush()
+    winner_agent_ids = {e.agent_id for e in win_events}
+    winner_names = [
+        name for (name,) in db.query(Agent.name).filter(Agent.id.in_(winner_agent_ids))
+    ]
+    return f"Round closed. Winner(s): {', '.join(winner_names)}. Scores awarded."
+
+
+def advance(db: Session, round_: Round) -> str:
+    """Move *round_* to its next phase if the guards allow it.
+
+    Raises HTTP 409 when the round is terminal or a guard is not met.
+    Returns a human-readable summary of the transition.
+    """
+    previous_phase = round_.phase
+    message = _advance(db, round_)
+    changes.record(db, round_, "phase")
+    webhooks.emit_transition(db, round_, previous_phase)
+    return message
+
+
+def advance_blocker(db: Session, round_: Round, phase: Optional[str] = None) -> Optional[str]:
+    """Why the advance guard of *phase* (default: the round's current phase)
+    is not met, or None if it is.
+
+    Uses aggregate queries only, so it is cheap enough to report on every poll.
+    """
+    round_id = round_.id
+    phase = phase or round_.phase
+    if phase == "proposal":
+        # Removed proposals can't be critiqued or voted for, so they don't count
+        count = (
+            db.query(func.count(Proposal.id))
+            .filter(Proposal.round_id == round_id, Proposal.is_removed == False)  # noqa: E712
+            .scalar()
+        )
+        if count < 2:
+            return f"need at least 2 proposals (have {count})"
+    elif phase == "critique":
+        # Each critiquing agent must have critiqued a proposal that isn't theirs
+        # (enforced at submission time, so we just check coverage)
+        proposers = db.query(Proposal.agent_id).filter(Proposal.round_id == round_id)
+        critiquers = db.query(Critique.agent_id).filter(Critique.round_id == round_id)
+        missing_names = [
+            name for (name,) in db.query(Agent.name).filter(
+                Agent.id.in_(proposers.scalar_subquery()),
+                Agent.id.notin_(critiquers.scalar_subquery()),
+            )
+        ]
+        if missing_names:
+            return (
+                f"the following agents have not submitted a critique yet: "
+                f"{', '.join(missing_names)}"
+            )
+    elif phase == "voting":
+        if not db.query(db.query(Vote.id).filter(Vote.round_id == round_id).exists()).scalar():
+            return "no votes have been cast yet"
+    return None
+
+
+def _advance(db: Session, round_: Round) -> str:
+    previous_phase = round_.phase
+
+    if previous_phase == "closed":
+        raise HTTPException(status_code=409, detail="Round is already closed")
+    if previous_phase == "expired":
+        raise HTTPException(status_code=409, detail="Round has expired")
+    if previous_phase not in ("proposal", "critique", "voting"):
+        raise HTTPException(status_code=500, detail=f"Unknown phase: {previous_phase}")
+
+    blocker = advance_blocker(db, round_)
+    if blocker:
+        raise HTTPException(status_code=409, detail=f"Cannot advance: {blocker}")
+    claim_transition(db, round_, NEXT_PHASE[previous_phase])
+
+    if previous_phase == "proposal":
+        count = db.query(func.count(Proposal.id)).filter(Proposal.round_id == round_.id).scalar()
+        return f"Advanced to critique phase with {count} proposals."
+
+    if previous_phase == "critique":
+        return "Advanced to voting phase."
+
+    return _close(db, round_)
+
+
+def resolve_stalled(db: Session, round_: Round) -> str:
+    """Finish a round whose phase deadline passed with its guards unmet.
+
+    A round that never gathered enough proposals expires without scoring;
+    one stalled in critique or voting is closed and scored as it stands.
+    """
+    previous_phase = round_.phase
+    if previous_phase == "proposal":
+        claim_transition(db, round_, "expired")
+        message = "Round expired: not enough proposals before the deadline."
+    else:
+        claim_transition(db, round_, "closed")
+        message = _close(db, round_)
+    changes.record(db, round_, "phase")
+    webhooks.emit_transition(db, round_, previous_phase)
+    return message
@@ -0,0 +1,199 @@
+"""
+Opt-in sampling profiler for individual requests.
+
+A request is profiled when either
+  • a random draw falls under PROFILE_SAMPLE_RATE (0.0 disables sampling), or
+  • it carries a valid ``X-Profile-Signature`` header, ``<expires>:<hmac>``
+    where hmac = HMAC-SHA256(PROFILE_SECRET, f"{expires}:{path}"). Generate
+    one with ``python -m app.profiling sign /rounds/42``.
+
+While a profiled request runs, a sampler thread snapshots every thread's stack
+each PROFILE_INTERVAL seconds and keeps the stacks that pass through app code
+(so threadpool workers running sync endpoints are included). Samples are
+written to PROFILE_DIR in collapsed-stack format (``frame;frame;frame count``,
+readable by flamegraph.pl and speedscope). Concurrent requests may show up in
+each other's profiles; sample at a low rate. The directory is capped at
+PROFILE_MAX_BYTES by deleting the oldest profiles first.
+"""
+
+import hashlib
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+import anyio
+
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SECRET = os.environ.get("PROFILE_SECRET", "")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "./profiles")
+PROFILE_MAX_BYTES = int(os.environ.get("PROFILE_MAX_BYTES", str(50 * 1024 * 1024)))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
+
+SIGNATURE_HEADER = b"x-profile-signature"
+
+_THIS_FILE = os.path.abspath(__file__)
+APP_DIR = os.path.dirname(_THIS_FILE)
+_ROOT_DIR = os.path.dirname(APP_DIR)
+
+
+# ── Request selection ─────────────────────────────────────────────────────────
+
+def sign(path: str, ttl_seconds: int = 300, secret: str | None = None) -> str:
+    """Return an X-Profile-Signature value for *path* valid for *ttl_seconds*."""
+    expires = int(time.time()) + ttl_seconds
+    key = (secret if secret is not None else PROFILE_SECRET).encode()
+    digest = hmac.new(key, f"{expires}:{path}".encode(), hashlib.sha256).hexdigest()
+    return f"{expires}:{digest}"
+
+
+def _valid_signature(value: str, path: str) -> bool:
+    if not PROFILE_SECRET:
+        return False
+    expires, _, digest = value.partition(":")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(
+        PROFILE_SECRET.encode(), f"{expires}:{path}".encode(), hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(expected, digest)
+
+
+def should_profile(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == SIGNATURE_HEADER:
+            return _valid_signature(value.decode("latin-1"), scope["path"])
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+# ── Sampler ───────────────────────────────────────────────────────────────────
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_ROOT_DIR):
+        filename = os.path.relpath(filename, _ROOT_DIR)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Background thread that counts collapsed stacks touching app code."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack = []
+            in_app = False
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename.startswith(APP_DIR) and code.co_filename != _THIS_FILE:
+                    in_app = True
+                stack.append(_frame_label(code))
+                frame = frame.f_back
+            if in_app:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        while True:
+            self._sample()
+            if self._stop.wait(self.interval):
+                return
+
+
+# ── Output and retention ──────────────────────────────────────────────────────
+
+def _profile_name(method: str, path: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    return f"{stamp}-{time.time_ns() % 10**9:09d}-{method}-{slug[:80]}.collapsed"
+
+
+def enforce_retention(directory: str, max_bytes: int) -> None:
+    """Delete the oldest profiles until *directory* holds at most *max_bytes*."""
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith(".collapsed") and os.path.isfile(path):
+            st = os.stat(path)
+            entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def write_profile(name: str, samples: Counter) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, name)
+    with open(path, "w") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    enforce_retention(PROFILE_DIR, PROFILE_MAX_BYTES)
+    return path
+
+
+# ── Middleware ────────────────────────────────────────────────────────────────
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        name = _profile_name(scope["method"], scope["path"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", name.encode("latin-1"))
+                ]
+            await send(message)
+
+        sampler = StackSampler(PROFILE_INTERVAL)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            await anyio.to_thread.run_sync(sampler.stop)
+            await anyio.to_thread.run_sync(write_profile, name, sampler.samples)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate an X-Profile-Signature header value.")
+    parser.add_argument("command", choices=["sign"])
+    parser.add_argument("path", help="request path, e.g. /rounds/42")
+    parser.add_argument("--ttl", type=int, default=300, help="seconds the signature stays valid")
+    args = parser.parse_args()
+    if not PROFILE_SECRET:
+        sys.exit("PROFILE_SECRET is not set")
+    print(sign(args.path, args.ttl))
@@ -3,6 +3,8 @@ Simple in-memory sliding-window rate limiter.
 
 Keyed on arbitrary strings (e.g. "create_round:42") so it is per-agent per-action.
 Thread-safe via a single Lock; suitable for a single-process uvicorn deployment.
+Keys whose newest call has aged out of the longest window in use are pruned
+periodically so the table doesn't grow with every agent that ever called.
 """
 
 from collections import defaultdict, deque
@@ -11,25 +13,60 @@ from time import time
 
 from fastapi import HTTPException
 
+from app import diagnostics, metrics
+
 _windows: dict[str, deque] = defaultdict(deque)
 _lock = Lock()
 
+PRUNE_INTERVAL_SECONDS = 60
+_max_window = 0
+_last_prune = 0.0
+
 
 def reset() -> None:
     """Clear all rate-limit state. Intended for use in tests."""
+    global _max_window, _last_prune
     with _lock:
         _windows.clear()
+        _max_window = 0
+        _last_prune = 0.0
+
+
+def size() -> int:
+    """Number of keys currently tracked."""
+    return len(_windows)
+
+
+def prune(now: float | None = None) -> int:
+    """Drop keys with no calls inside the longest window seen. Returns keys removed."""
+    global _last_prune
+    now = time() if now is None else now
+    with _lock:
+        _last_prune = now
+        cutoff = now - _max_window
+        stale = [key for key, dq in _windows.items() if not dq or dq[-1] < cutoff]
+        for key in stale:
+            del _windows[key]
+    return len(stale)
+
+
+diagnostics.register_cache("rate_limit_windows", size)
 
 
 def check_rate_limit(key: str, max_calls: int, window_seconds: int) -> None:
     """Raise HTTP 429 if *key* has been called ≥ max_calls times in the last window_seconds."""
+    global _max_window
     now = time()
+    if now - _last_prune >= PRUNE_INTERVAL_SECONDS:
+        prune(now)
     cutoff = now - window_seconds
     with _lock:
+        _max_window = max(_max_window, window_seconds)
         dq = _windows[key]
         while dq and dq[0] < cutoff:
             dq.popleft()
         if len(dq) >= max_calls:
+            metrics.RATE_LIMIT_REJECTIONS.inc(key.split(":", 1)[0])
             raise HTTPException(
                 status_code=429,
                 detail=(
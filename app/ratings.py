@@ -0,0 +1,147 @@
+"""
+Elo skill ratings.
+
+``Agent.total_score`` only ever grows, so it rewards longevity as much as
+quality. Ratings instead track how an agent's proposals fare against the
+others in the same round: each closed round is treated as a round-robin in
+which every pair of proposals is a game won by the one with more votes (equal
+tallies draw). An agent's change is the sum of its pairwise Elo updates scaled
+by K / (n - 1), so a round moves ratings about as much as a single game
+regardless of its size, and the total over the round is zero.
+
+score_round() applies a round's update as it closes. recompute() replays the
+whole history of closed rounds from the votes table, e.g. after changing
+RATING_K or to backfill a database that predates ratings::
+
+    python -m app.ratings recompute [--k 24]
+
+Rounds in which no votes were cast carry no information and are skipped.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app import shards
+from app.models import Agent, Proposal, Round, Vote
+
+if TYPE_CHECKING:
+    import numpy as np
+
+RATING_INITIAL = 1500.0  # the Agent.rating column default
+RATING_K = float(os.environ.get("RATING_K", "32"))
+
+
+def elo_deltas(ratings: np.ndarray, votes: np.ndarray, k: float = RATING_K) -> Optional[np.ndarray]:
+    """Rating changes for one round's participants.
+
+    *ratings* and *votes* are aligned per participant. Returns None when the
+    round is not rated: fewer than two participants or nobody voted.
+    """
+    import numpy as np
+
+    n = len(ratings)
+    if n < 2 or not votes.any():
+        return None
+    # expected[i, j]: probability that i beats j; the diagonal is 0.5 on both
+    # sides and cancels out
+    expected = 1 / (1 + 10 ** ((ratings[None, :] - ratings[:, None]) / 400))
+    actual = (np.sign(votes[:, None] - votes[None, :]) + 1) / 2
+    return k / (n - 1) * (actual - expected).sum(axis=1)
+
+
+def apply_round(
+    agents: Iterable[Agent], votes: Iterable[int], k: Optional[float] = None
+) -> None:
+    """Update *agents* in place from their proposals' vote tallies.
+
+    Called by score_round() with one entry per proposal in the closing round.
+    """
+    import numpy as np
+
+    agents = list(agents)
+    tallies = np.fromiter(votes, dtype=float, count=len(agents))
+    ratings = np.array([a.rating if a.rating is not None else RATING_INITIAL for a in agents])
+    deltas = elo_deltas(ratings, tallies, RATING_K if k is None else k)
+    if deltas is None:
+        return
+    for agent, rating in zip(agents, ratings + deltas):
+        agent.rating = float(rating)
+        agent.rated_rounds = (agent.rated_rounds or 0) + 1
+
+
+def recompute(db: Session, k: Optional[float] = None) -> dict:
+    """Reset every rating and replay all closed rounds in closing order.
+
+    History is read with one aggregate query (per shard); each round is then
+    a handful of vectorised operations on a ratings array, and the results are
+    written back in one bulk UPDATE. The caller commits.
+    """
+    import numpy as np
+
+    k = RATING_K if k is None else k
+    rows = []
+    with shards.round_sessions(db) as sessions:
+        for session in sessions:
+            rows.extend(
+                session.query(Round.closed_at, Proposal.round_id, Proposal.id, Proposal.agent_id,
+                              func.count(Vote.id))
+                .join(Round, Round.id == Proposal.round_id)
+                .outerjoin(Vote, Vote.proposal_id == Proposal.id)
+                .filter(Round.phase == "closed")
+                .group_by(Proposal.id, Proposal.round_id, Proposal.agent_id, Round.closed_at)
+                .all()
+            )
+    rows.sort(key=lambda r: (r[0], r[1], r[2]))
+    agent_ids = [agent_id for (agent_id,) in db.query(Agent.id).order_by(Agent.id)]
+    column = {agent_id: i for i, agent_id in enumerate(agent_ids)}
+    ratings = np.full(len(agent_ids), RATING_INITIAL)
+    rated_rounds = np.zeros(len(agent_ids), dtype=np.int64)
+
+    rounds = 0
+    if rows:
+        round_ids = np.array([r[1] for r in rows])
+        members = np.array([column[r[3]] for r in rows])
+        tallies = np.array([r[4] for r in rows], dtype=float)
+        # Rows are grouped by round; split at every change of round id
+        starts = np.flatnonzero(np.diff(round_ids)) + 1
+        for idx, votes in zip(np.split(members, starts), np.split(tallies, starts)):
+            deltas = elo_deltas(ratings[idx], votes, k)
+            if deltas is not None:
+                ratings[idx] += deltas
+                rated_rounds[idx] += 1
+                rounds += 1
+
+    if agent_ids:
+        db.execute(
+            update(Agent),
+            [
+                {"id": agent_id, "rating": float(ratings[i]), "rated_rounds": int(rated_rounds[i])}
+                for i, agent_id in enumerate(agent_ids)
+            ],
+        )
+    return {"agents": len(agent_ids), "rounds": rounds, "k": k}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app import database
+
+    parser = argparse.ArgumentParser(description="Rebuild Elo ratings from the vote history.")
+    parser.add_argument("command", choices=["recompute"])
+    parser.add_argument("--k", type=float, default=None, help=f"K-factor (default {RATING_K:g})")
+    args = parser.parse_args()
+    database.sync_schema()
+    db = database.SessionLocal()
+    try:
+        summary = recompute(db, args.k)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rated {summary['rounds']} rounds for {summary['agents']} agents (K={summary['k']:g})")
@@ -0,0 +1,279 @@
+"""
+Bulk re-scoring and ``total_score`` reconciliation.
+
+``Agent.total_score`` is a running sum that score_round() adds to as rounds
+close, and ``score_events`` records what was awarded under the points in
+force at the time. Neither is ever checked against the other, and changing
+POINTS_* in app/scoring.py only affects rounds closed afterwards. This module
+replays scoring for every closed round and brings both back in line::
+
+    python -m app.rescoring --dry-run   # report what would change
+    python -m app.rescoring             # rewrite events, reconcile totals
+
+The replay applies the rules of score_round() to whole-table aggregates: one
+query per shard for vote tallies per proposal and one for critique bonuses,
+then array operations to find each round's winners. Expected and stored
+events are compared by (round, agent, reason) so only rounds whose events
+differ are rewritten, in chunks. Every agent's ``total_score`` is then set to
+the sum of its events with one UPDATE.
+
+Rounds are scored as they stand, so content removed by moderation still
+counts, as it does when a round closes. Ratings are rebuilt separately, see
+app/ratings.py.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import and_, case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app import scoring, shards
+from app.models import Agent, Critique, Proposal, Round, ScoreEvent, Vote
+
+if TYPE_CHECKING:
+    import numpy as np
+
+REASONS = ("participation", "win", "critique_bonus")
+# Rounds whose events are deleted per statement, and events inserted per
+# executemany, when rewriting
+DELETE_CHUNK = 500
+INSERT_CHUNK = 10_000
+
+# Event arrays have one row per event: round_id, agent_id, reason, points,
+# with reason an index into REASONS (-1 for anything else).
+_COLUMNS = 4
+
+
+def _points() -> np.ndarray:
+    """Current points per reason, read at call time."""
+    import numpy as np
+
+    return np.array([scoring.POINTS_PARTICIPATION, scoring.POINTS_WIN, scoring.POINTS_CRITIQUE])
+
+
+def _array(rows, width: int) -> np.ndarray:
+    import numpy as np
+
+    # Flattened through fromiter: np.array() on a list of Row objects goes
+    # through the sequence protocol per element and is ~100x slower
+    flat = np.fromiter((value for row in rows for value in row), dtype=np.int64, count=len(rows) * width)
+    return flat.reshape(-1, width)
+
+
+def _group(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Group the rows of *keys*: the group index of each row, and the
+    distinct rows in sorted order. Like np.unique(axis=0), without its
+    byte-wise sort of the whole row."""
+    import numpy as np
+
+    order = np.lexsort(keys.T[::-1])
+    ordered = keys[order]
+    first = np.r_[True, (ordered[1:] != ordered[:-1]).any(axis=1)]
+    groups = np.empty(len(keys), dtype=np.int64)
+    groups[order] = np.cumsum(first) - 1
+    return groups, ordered[first]
+
+
+def _events(pairs: np.ndarray, reason: int, points: np.ndarray) -> np.ndarray:
+    """Event rows for the unique (round_id, agent_id) *pairs*."""
+    import numpy as np
+
+    pairs = _group(pairs)[1]
+    out = np.empty((len(pairs), _COLUMNS), dtype=np.int64)
+    out[:, :2] = pairs
+    out[:, 2] = reason
+    out[:, 3] = points[reason]
+    return out
+
+
+def expected_events(session: Session, points: np.ndarray) -> np.ndarray:
+    """Events score_round() would emit for the closed rounds in *session*."""
+    import numpy as np
+
+    closed = and_(Round.id == Proposal.round_id, Round.phase == "closed")
+    tallies = _array(
+        session.execute(
+            select(Proposal.round_id, Proposal.agent_id, func.count(Vote.id))
+            .join(Round, closed)
+            .outerjoin(Vote, Vote.proposal_id == Proposal.id)
+            .group_by(Proposal.id, Proposal.round_id, Proposal.agent_id)
+            .order_by(Proposal.round_id)
+        ).all(),
+        3,
+    )
+    bonus = _array(
+        session.execute(
+            select(Critique.round_id, Critique.agent_id)
+            .join(Proposal, and_(Proposal.round_id == Critique.round_id, Proposal.agent_id == Critique.agent_id))
+            .join(Round, closed)
+            .distinct()
+        ).all(),
+        2,
+    )
+
+    wins = tallies[:0, :2]
+    if len(tallies):
+        round_ids, votes = tallies[:, 0], tallies[:, 2]
+        starts = np.flatnonzero(np.r_[True, round_ids[1:] != round_ids[:-1]])
+        most = np.repeat(np.maximum.reduceat(votes, starts), np.diff(np.r_[starts, len(votes)]))
+        wins = tallies[(votes == most) & (most > 0), :2]
+    return np.concatenate([
+        _events(tallies[:, :2], 0, points),
+        _events(wins, 1, points),
+        _events(bonus, 2, points),
+    ])
+
+
+def stored_events(db: Session) -> np.ndarray:
+    reason = case({name: i for i, name in enumerate(REASONS)}, value=ScoreEvent.reason, else_=-1)
+    return _array(
+        db.execute(select(ScoreEvent.round_id, ScoreEvent.agent_id, reason, ScoreEvent.points)).all(),
+        _COLUMNS,
+    )
+
+
+def changed_rounds(expected: np.ndarray, stored: np.ndarray) -> np.ndarray:
+    """Ids of rounds whose stored events differ from the expected ones.
+
+    Compares the number of events and points per (round, agent, reason), so
+    a missing, extra, duplicated or re-priced event all mark the round.
+    """
+    import numpy as np
+
+    both = np.concatenate([expected, stored])
+    if not len(both):
+        return np.empty(0, dtype=np.int64)
+    inverse, keys = _group(both[:, :3])
+    n, size = len(expected), len(keys)
+    differs = (
+        np.bincount(inverse[:n], minlength=size) != np.bincount(inverse[n:], minlength=size)
+    ) | (
+        np.bincount(inverse[:n], weights=both[:n, 3], minlength=size)
+        != np.bincount(inverse[n:], weights=both[n:, 3], minlength=size)
+    )
+    return np.unique(keys[differs, 0])
+
+
+def _totals(events: np.ndarray) -> dict[int, int]:
+    import numpy as np
+
+    agents, inverse = np.unique(events[:, 1], return_inverse=True)
+    sums = np.bincount(inverse.ravel(), weights=events[:, 3], minlength=len(agents))
+    return dict(zip(agents.tolist(), sums.astype(np.int64).tolist()))
+
+
+def _rewrite(db: Session, changed: np.ndarray, events: np.ndarray, closed_at: dict) -> None:
+    for start in range(0, len(changed), DELETE_CHUNK):
+        chunk = changed[start:start + DELETE_CHUNK].tolist()
+        db.execute(delete(ScoreEvent).where(ScoreEvent.round_id.in_(chunk)))
+    for start in range(0, len(events), INSERT_CHUNK):
+        db.execute(insert(ScoreEvent.__table__), [
+            {
+                "round_id": round_id,
+                "agent_id": agent_id,
+                "reason": REASONS[reason],
+                "points": points,
+                "created_at": closed_at.get(round_id) or datetime.utcnow(),
+            }
+            for round_id, agent_id, reason, points in events[start:start + INSERT_CHUNK].tolist()
+        ])
+
+
+def reconcile_totals(db: Session) -> int:
+    """Set every agent's total_score to the sum of its score events.
+
+    One UPDATE with a correlated aggregate; returns the number of agents
+    whose total changed.
+    """
+    total = (
+        select(func.coalesce(func.sum(ScoreEvent.points), 0))
+        .where(ScoreEvent.agent_id == Agent.id)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(Agent)
+        .where(Agent.total_score != total)
+        .values(total_score=total)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def rescore(db: Session, dry_run: bool = False) -> dict:
+    """Replay scoring for all closed rounds with the current POINTS_*.
+
+    Returns a summary: closed rounds and expected events, the ids of rounds
+    whose events differ, how many events would be removed and added, and
+    every agent whose total_score is off (``id``, ``name``, ``total_score``,
+    ``expected``). Unless *dry_run*, rewrites the differing rounds' events
+    and reconciles totals; the caller commits.
+    """
+    import numpy as np
+
+    points = _points()
+    expected, closed_at = [], {}
+    with shards.round_sessions(db) as sessions:
+        for session in sessions:
+            expected.append(expected_events(session, points))
+            closed_at.update(session.execute(
+                select(Round.id, Round.closed_at).where(Round.phase == "closed")
+            ).all())
+    expected = np.concatenate(expected)
+    stored = stored_events(db)
+
+    changed = changed_rounds(expected, stored)
+    removed = stored[np.isin(stored[:, 0], changed)]
+    added = expected[np.isin(expected[:, 0], changed)]
+    kept = stored[~np.isin(stored[:, 0], changed)]
+    totals = _totals(np.concatenate([kept, added]))
+    agents = [
+        {"id": agent_id, "name": name, "total_score": total_score, "expected": totals.get(agent_id, 0)}
+        for agent_id, name, total_score in db.execute(
+            select(Agent.id, Agent.name, Agent.total_score).order_by(Agent.id)
+        )
+        if total_score != totals.get(agent_id, 0)
+    ]
+
+    if not dry_run:
+        _rewrite(db, changed, added, closed_at)
+        reconcile_totals(db)
+    return {
+        "rounds": len(closed_at),
+        "events": len(expected),
+        "changed_rounds": changed.tolist(),
+        "events_removed": len(removed),
+        "events_added": len(added),
+        "agents": agents,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from app import database
+
+    parser = argparse.ArgumentParser(description="Replay scoring for closed rounds and reconcile total_score.")
+    parser.add_argument("--dry-run", action="store_true", help="report differences without writing")
+    args = parser.parse_args()
+    database.sync_schema()
+    started = time.perf_counter()
+    db = database.SessionLocal()
+    try:
+        summary = rescore(db, dry_run=args.dry_run)
+        db.commit()
+    finally:
+        db.close()
+
+    changed = summary["changed_rounds"]
+    print(f"{summary['rounds']} closed rounds, {summary['events']} score events expected")
+    print(f"{len(changed)} rounds differ: -{summary['events_removed']} +{summary['events_added']} events"
+          + (f" (rounds {', '.join(map(str, changed[:20]))}{', ...' if len(changed) > 20 else ''})"
+             if changed else ""))
+    for agent in summary["agents"]:
+        print(f"  {agent['name']} (#{agent['id']}): {agent['total_score']} -> {agent['expected']}")
+    verb = "Would update" if args.dry_run else "Updated"
+    print(f"{verb} {len(summary['agents'])} agent totals in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,255 @@
+"""
+Tagged response cache for read-mostly GET endpoints.
+
+The leaderboard, the agent list, agent details and a round's score events
+are read far more often than they change. CACHED_ROUTES lists those paths
+with the tags their responses depend on, e.g. ``leaderboard`` or
+``round:42``. A 200 response is kept for RESPONSE_CACHE_TTL_SECONDS and
+served to later requests for the same path and query string.
+
+Write paths call invalidate_on_commit() with the tags they affect
+(score_round(), registration and new round content); the tags are
+invalidated once the session commits, so a reader can't re-cache the
+pre-commit state. An invalidated or expired entry is served for up to
+RESPONSE_CACHE_STALE_SECONDS more while the first request to find it stale
+refreshes it (stale-while-revalidate). Requests that fill the cache read
+from the primary, never a replica that may not have caught up with the
+invalidating commit, and a response computed while one of its tags was
+invalidated is not stored. An agent that wrote within
+READ_YOUR_WRITES_SECONDS (app/database.py) bypasses the cache.
+
+Bodies are stored uncompressed: the middleware sits inside
+CompressionMiddleware, which encodes each response for its client.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import database, diagnostics, metrics
+
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE", "1").lower() not in ("0", "false", "no")
+RESPONSE_CACHE_TTL_SECONDS = float(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", "30"))
+RESPONSE_CACHE_STALE_SECONDS = float(os.environ.get("RESPONSE_CACHE_STALE_SECONDS", "30"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+
+# (path pattern, tags); "{id}" in a tag is the path's id
+CACHED_ROUTES = [
+    (re.compile(r"/leaderboard"), ("leaderboard",)),
+    (re.compile(r"/leaderboard/rounds/(?P<id>\d+)"), ("round:{id}",)),
+    (re.compile(r"/agents"), ("agents",)),
+    (re.compile(r"/agents/(?P<id>\d+)"), ("agent:{id}",)),
+]
+
+_SKIPPED_HEADERS = (b"server-timing", b"x-profile-id")
+_SESSION_TAGS = "response_cache_tags"
+
+
+@dataclass
+class CachedResponse:
+    tags: tuple
+    status: int
+    headers: list
+    body: bytes
+    fresh_until: float
+    stale_until: float
+    refreshing: bool = False
+
+
+@dataclass
+class ResponseCache:
+    """LRU of responses indexed by tag. Each tag has a version, bumped on
+    invalidation, so a response can be checked against the versions seen
+    when it started."""
+
+    max_entries: int
+    _entries: "OrderedDict[tuple, CachedResponse]" = field(default_factory=OrderedDict)
+    _by_tag: dict = field(default_factory=dict)
+    _versions: dict = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: tuple, now: float) -> tuple[Optional[CachedResponse], bool]:
+        """(entry to serve, whether the caller should refresh it instead).
+
+        A fresh entry is served. A stale one is served too, except to the
+        first caller to find it stale, who is told to refresh. Entries past
+        their stale window are dropped.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, True
+            if now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                return entry, False
+            if now < entry.stale_until:
+                if entry.refreshing:
+                    return entry, False
+                entry.refreshing = True
+                return entry, True
+            self._drop(key)
+            return None, True
+
+    def versions(self, tags: tuple) -> tuple:
+        with self._lock:
+            return tuple(self._versions.get(tag, 0) for tag in tags)
+
+    def store(self, key: tuple, tags: tuple, seen: tuple, status: int, headers: list, body: bytes,
+              now: float) -> bool:
+        """Keep a response unless one of *tags* was invalidated since *seen*."""
+        with self._lock:
+            if tuple(self._versions.get(tag, 0) for tag in tags) != seen:
+                return False
+            self._drop(key)
+            self._entries[key] = CachedResponse(
+                tags, status, headers, body,
+                fresh_until=now + RESPONSE_CACHE_TTL_SECONDS,
+                stale_until=now + RESPONSE_CACHE_TTL_SECONDS + RESPONSE_CACHE_STALE_SECONDS,
+            )
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            return True
+
+    def release(self, key: tuple) -> None:
+        """Let another request refresh *key* after a refresh that stored nothing."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refreshing = False
+
+    def invalidate(self, tags, now: Optional[float] = None) -> None:
+        """Mark every entry tagged with any of *tags* stale."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+                for key in self._by_tag.get(tag, ()):
+                    entry = self._entries[key]
+                    if entry.fresh_until > now:
+                        entry.fresh_until = now
+                        entry.stale_until = now + RESPONSE_CACHE_STALE_SECONDS
+
+    def _drop(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+            self._versions.clear()
+
+
+cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES)
+diagnostics.register_cache("response_cache", lambda: len(cache))
+
+
+def reset() -> None:
+    """Forget all cached responses. Intended for use in tests."""
+    cache.clear()
+
+
+def invalidate_on_commit(db: Session, *tags: str) -> None:
+    """Invalidate *tags* once *db* commits; dropped if it rolls back."""
+    db.info.setdefault(_SESSION_TAGS, set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    tags = session.info.pop(_SESSION_TAGS, None)
+    if tags:
+        cache.invalidate(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop(_SESSION_TAGS, None)
+
+
+def _route_tags(path: str) -> Optional[tuple]:
+    for pattern, tags in CACHED_ROUTES:
+        match = pattern.fullmatch(path)
+        if match:
+            return tuple(tag.format(**match.groupdict()) for tag in tags)
+    return None
+
+
+async def _replay(send, entry: CachedResponse, state: bytes) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": entry.status,
+        "headers": entry.headers + [(b"x-cache", state)],
+    })
+    await send({"type": "http.response.body", "body": entry.body})
+
+
+class ResponseCacheMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        tags = None
+        if RESPONSE_CACHE_ENABLED and scope["type"] == "http" and scope["method"] == "GET":
+            tags = _route_tags(scope["path"])
+        if tags is None:
+            await self.app(scope, receive, send)
+            return
+        agent = dict(scope.get("headers", [])).get(b"x-agent-name")
+        if agent and database.wrote_recently(agent.decode("latin-1")):
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["path"], scope.get("query_string", b""))
+        now = time.monotonic()
+        entry, refresh = cache.lookup(key, now)
+        if not refresh:
+            stale = now >= entry.fresh_until
+            metrics.RESPONSE_CACHE.inc("stale" if stale else "hit")
+            await _replay(send, entry, b"stale" if stale else b"hit")
+            return
+        result = "miss" if entry is None else "refresh"
+        metrics.RESPONSE_CACHE.inc(result)
+
+        seen = cache.versions(tags)
+        scope.setdefault("state", {})["read_primary"] = True  # see get_read_db()
+        status = None
+        headers: list = []
+        body: list[bytes] = []
+
+        async def capture_send(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() not in _SKIPPED_HEADERS]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-cache", result.encode())]
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+            await send(message)
+
+        stored = False
+        try:
+            await self.app(scope, receive, capture_send)
+            if status == 200:
+                stored = cache.store(key, tags, seen, status, headers, b"".join(body), time.monotonic())
+        finally:
+            if not stored:
+                cache.release(key)
@@ -1,18 +1,24 @@
 import uuid
+from collections import Counter
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import Agent, Critique, Proposal, ScoreEvent, Vote
+from app import agent_stats, response_cache, shards, webhooks
+from app.database import get_db, get_read_db
+from app.deps import get_current_agent
+from app.models import Agent, AgentStats, Critique, Proposal, ScoreEvent, Vote, WebhookEvent
 from app.schemas import (
     ActivityItem,
     AgentActivityOut,
     AgentCreate,
     AgentOut,
     AgentPublic,
+    AgentStatsOut,
     AgentSummary,
+    WebhookOut,
+    WebhookRegister,
 )
 
 router = APIRouter()
@@ -26,34 +32,41 @@ def register_agent(body: AgentCreate, db: Session = Depends(get_db)):
         return existing
     agent = Agent(name=body.name, api_key=str(uuid.uuid4()))
     db.add(agent)
+    response_cache.invalidate_on_commit(db, "agents", "leaderboard")
     db.commit()
     db.refresh(agent)
     return agent
 
 
 @router.get("", response_model=list[AgentSummary])
-def list_agents(db: Session = Depends(get_db)):
+def list_agents(db: Session = Depends(get_read_db)):
     """List all agents with participation stats, sorted by score."""
     agents = db.query(Agent).order_by(Agent.total_score.desc()).all()
     if not agents:
         return []
 
     # Bulk aggregate queries — O(1) DB round-trips instead of O(N)
-    proposal_counts = dict(
-        db.query(Proposal.agent_id, func.count(Proposal.id))
-        .group_by(Proposal.agent_id)
-        .all()
-    )
-    critique_counts = dict(
-        db.query(Critique.agent_id, func.count(Critique.id))
-        .group_by(Critique.agent_id)
-        .all()
-    )
-    vote_counts = dict(
-        db.query(Vote.agent_id, func.count(Vote.id))
-        .group_by(Vote.agent_id)
-        .all()
-    )
+    # (per shard when rounds are sharded)
+    proposal_counts: Counter = Counter()
+    critique_counts: Counter = Counter()
+    vote_counts: Counter = Counter()
+    with shards.round_sessions(db) as sessions:
+        for session in sessions:
+            proposal_counts.update(dict(
+                session.query(Proposal.agent_id, func.count(Proposal.id))
+                .group_by(Proposal.agent_id)
+                .all()
+            ))
+            critique_counts.update(dict(
+                session.query(Critique.agent_id, func.count(Critique.id))
+                .group_by(Critique.agent_id)
+                .all()
+            ))
+            vote_counts.update(dict(
+                session.query(Vote.agent_id, func.count(Vote.id))
+                .group_by(Vote.agent_id)
+                .all()
+            ))
     round_counts = dict(
         db.query(ScoreEvent.agent_id, func.count(ScoreEvent.round_id.distinct()))
         .filter(ScoreEvent.reason == "participation")
@@ -76,17 +89,62 @@ def list_agents(db: Session = Depends(get_db)):
     ]
 
 
-@router.get("/{agent_id}/activity", response_model=AgentActivityOut)
-def get_agent_activity(agent_id: int, db: Session = Depends(get_db)):
-    """Return the 20 most recent actions for an agent."""
-    agent = db.get(Agent, agent_id)
-    if not agent:
-        raise HTTPException(status_code=404, detail="Agent not found")
+def _webhook_status(db: Session, agent: Agent) -> WebhookOut:
+    counts = dict(
+        db.query(WebhookEvent.status, func.count(WebhookEvent.id))
+        .filter(WebhookEvent.agent_id == agent.id)
+        .group_by(WebhookEvent.status)
+        .all()
+    )
+    last_error = (
+        db.query(WebhookEvent.last_error)
+        .filter(WebhookEvent.agent_id == agent.id, WebhookEvent.last_error.isnot(None))
+        .order_by(WebhookEvent.id.desc())
+        .limit(1)
+        .scalar()
+    )
+    return WebhookOut(
+        url=agent.webhook_url,
+        pending=counts.get("pending", 0),
+        delivered=counts.get("delivered", 0),
+        failed=counts.get("failed", 0),
+        last_error=last_error,
+    )
 
-    items: list[ActivityItem] = []
 
+@router.put("/me/webhook", response_model=WebhookOut)
+def register_webhook(
+    body: WebhookRegister,
+    db: Session = Depends(get_db),
+    agent: Agent = Depends(get_current_agent),
+):
+    """Receive batched round events (phase changes, proposals to critique, results) at *url*."""
+    try:
+        webhooks.check_url(body.url)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=f"Webhook url rejected: {exc}")
+    agent.webhook_url = body.url
+    db.commit()
+    return _webhook_status(db, agent)
+
+
+@router.get("/me/webhook", response_model=WebhookOut)
+def get_webhook(db: Session = Depends(get_db), agent: Agent = Depends(get_current_agent)):
+    """Registered URL and delivery counts for the calling agent."""
+    return _webhook_status(db, agent)
+
+
+@router.delete("/me/webhook", status_code=204)
+def delete_webhook(db: Session = Depends(get_db), agent: Agent = Depends(get_current_agent)):
+    agent.webhook_url = None
+    db.commit()
+
+
+def _round_activity(session: Session, agent_id: int) -> list[ActivityItem]:
+    """An agent's latest proposals, critiques and votes in one database."""
+    items: list[ActivityItem] = []
     for p in (
-        db.query(Proposal)
+        session.query(Proposal)
         .filter(Proposal.agent_id == agent_id)
         .order_by(Proposal.submitted_at.desc())
         .limit(10)
@@ -102,7 +160,7 @@ def get_agent_activity(agent_id: int, db: Session = Depends(get_db)):
         )
 
     for c in (
-        db.query(Critique)
+        session.query(Critique)
         .filter(Critique.agent_id == agent_id)
         .order_by(Critique.submitted_at.desc())
         .limit(10)
@@ -119,7 +177,7 @@ def get_agent_activity(agent_id: int, db: Session = Depends(get_db)):
         )
 
     for v in (
-        db.query(Vote)
+        session.query(Vote)
         .filter(Vote.agent_id == agent_id)
         .order_by(Vote.submitted_at.desc())
         .limit(10)
@@ -133,6 +191,20 @@ def get_agent_activity(agent_id: int, db: Session = Depends(get_db)):
                 proposal_id=v.proposal_id,
             )
         )
+    return items
+
+
+@router.get("/{agent_id}/activity", response_model=AgentActivityOut)
+def get_agent_activity(agent_id: int, db: Session = Depends(get_read_db)):
+    """Return the 20 most recent actions for an agent."""
+    agent = db.get(Agent, agent_id)
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+
+    items: list[ActivityItem] = []
+    with shards.round_sessions(db) as sessions:
+        for session in sessions:
+            items.extend(_round_activity(session, agent_id))
 
     for e in (
         db.query(ScoreEvent)
@@ -155,8 +227,39 @@ def get_agent_activity(agent_id: int, db: Session = Depends(get_db)):
     return AgentActivityOut(agent_id=agent_id, name=agent.name, recent_events=items[:20])
 
 
+@router.get("/{agent_id}/stats", response_model=AgentStatsOut)
+def get_agent_stats(agent_id: int, db: Session = Depends(get_read_db)):
+    """Win rate, votes, critique coverage and streaks over closed rounds (app/agent_stats.py)."""
+    row = (
+        db.query(Agent.name, AgentStats)
+        .outerjoin(AgentStats, AgentStats.agent_id == Agent.id)
+        .filter(Agent.id == agent_id)
+        .one_or_none()
+    )
+    if row is None:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    name, stats = row
+    stats = stats or agent_stats.empty_stats(agent_id)
+    played = stats.rounds_played or 1
+    return AgentStatsOut(
+        agent_id=agent_id,
+        name=name,
+        rounds_played=stats.rounds_played,
+        rounds_won=stats.rounds_won,
+        win_rate=stats.rounds_won / played,
+        votes_received=stats.votes_received,
+        avg_votes_received=stats.votes_received / played,
+        rounds_critiqued=stats.rounds_critiqued,
+        critique_coverage=stats.rounds_critiqued / played,
+        current_win_streak=stats.current_win_streak,
+        longest_win_streak=stats.longest_win_streak,
+        last_round_id=stats.last_round_id,
+        updated_at=stats.updated_at,
+    )
+
+
 @router.get("/{agent_id}", response_model=AgentPublic)
-def get_agent(agent_id: int, db: Session = Depends(get_db)):
+def get_agent(agent_id: int, db: Session = Depends(get_read_db)):
     agent = db.get(Agent, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
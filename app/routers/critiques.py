@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
-from app.database import get_db
+from app import changes
+from app.database import get_db, get_read_db
 from app.deps import get_current_agent
 from app.moderation import REMOVAL_THRESHOLD, check_content
 from app.models import Agent, Critique, Proposal, Report, Round
@@ -52,19 +53,22 @@ def submit_critique(
     )
     db.add(critique)
     try:
-        db.commit()
+        db.flush()
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=409, detail="You have already critiqued this proposal")
+    changes.record(db, round_, "critique", critique.id)
+    db.commit()
     db.refresh(critique)
     return CritiqueOut.from_orm_with_name(critique)
 
 
 @router.get("", response_model=list[CritiqueOut])
-def list_critiques(round_id: int, db: Session = Depends(get_db)):
+def list_critiques(round_id: int, db: Session = Depends(get_read_db)):
     _get_round_or_404(round_id, db)
     critiques = (
         db.query(Critique)
+        .options(joinedload(Critique.agent))
         .filter(Critique.round_id == round_id, Critique.is_removed == False)  # noqa: E712
         .all()
     )
@@ -79,7 +83,7 @@ def report_critique(
     db: Session = Depends(get_db),
     agent: Agent = Depends(get_current_agent),
 ):
-    _get_round_or_404(round_id, db)
+    round_ = _get_round_or_404(round_id, db)
     critique = db.query(Critique).filter(
         Critique.id == critique_id, Critique.round_id == round_id
     ).first()
@@ -107,8 +111,9 @@ def report_critique(
         .filter(Report.content_type == "critique", Report.content_id == critique_id)
         .count()
     )
-    if report_count >= REMOVAL_THRESHOLD:
+    if report_count >= REMOVAL_THRESHOLD and not critique.is_removed:
         critique.is_removed = True
+        changes.record(db, round_, "critique_removed", critique.id)
         db.commit()
 
     return report
@@ -0,0 +1,96 @@
+"""
+Streaming NDJSON exports for analysts.
+
+``GET /export/{table}`` returns every row of rounds, proposals, critiques,
+votes or score_events, one JSON object per line in id order. Rows are read
+with ``yield_per`` and written out in batches of EXPORT_BATCH_SIZE, so memory
+use does not grow with the table. ``since`` limits the export to rows
+written at or after a timestamp (for rounds: created or closed), for
+incremental pulls; it is inclusive, so dedupe on ``id``.
+
+The stream opens its own sessions on the read engine (app/database.py), as
+it outlives the request's dependencies. Under sharding every shard is read
+and the streams are merged by id. Content removed by moderation is left out,
+as in the listing endpoints.
+"""
+
+import heapq
+import json
+import os
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Iterator, Literal, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import false, or_, select
+
+from app import database, shards
+from app.models import Critique, Proposal, Round, ScoreEvent, Vote
+
+router = APIRouter()
+
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+
+# table -> (model, timestamp columns matched by ?since)
+EXPORTS = {
+    "rounds": (Round, ("created_at", "closed_at")),
+    "proposals": (Proposal, ("submitted_at",)),
+    "critiques": (Critique, ("submitted_at",)),
+    "votes": (Vote, ("submitted_at",)),
+    "score_events": (ScoreEvent, ("created_at",)),
+}
+
+
+def _statement(name: str, since: Optional[datetime]):
+    model, timestamps = EXPORTS[name]
+    table = model.__table__
+    stmt = select(table).order_by(table.c.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    if "is_removed" in table.c:
+        stmt = stmt.where(table.c.is_removed == false())
+    if since is not None:
+        stmt = stmt.where(or_(*(table.c[column] >= since for column in timestamps)))
+    return stmt
+
+
+def _line(row) -> str:
+    return json.dumps(
+        {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row._mapping.items()},
+        separators=(",", ":"),
+    )
+
+
+def stream_rows(name: str, since: Optional[datetime] = None) -> Iterator[str]:
+    """NDJSON chunks of EXPORT_BATCH_SIZE lines for table *name*."""
+    db = (database.ReadSessionLocal or database.SessionLocal)()
+    try:
+        if name in shards.ROUND_TABLES:
+            with shards.round_sessions(db) as sessions:
+                yield from _chunks(
+                    heapq.merge(*(s.execute(_statement(name, since)) for s in sessions), key=lambda r: r.id)
+                )
+        else:
+            yield from _chunks(db.execute(_statement(name, since)))
+    finally:
+        db.close()
+
+
+def _chunks(rows) -> Iterator[str]:
+    rows = iter(rows)
+    while batch := list(islice(rows, EXPORT_BATCH_SIZE)):
+        yield "".join(_line(row) + "\n" for row in batch)
+
+
+@router.get(
+    "/{table}",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "One JSON object per row"}},
+)
+def export_table(
+    table: Literal["rounds", "proposals", "critiques", "votes", "score_events"],
+    since: Optional[datetime] = Query(None, description="Only rows written at or after this time (inclusive)"),
+):
+    """Every row of *table* as NDJSON, in id order."""
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)  # stored as naive UTC
+    return StreamingResponse(stream_rows(table, since), media_type="application/x-ndjson")
@@ -1,10 +1,11 @@
 from datetime import datetime
+from typing import Literal
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_read_db
 from app.models import Agent, Round, ScoreEvent
 from app.schemas import LeaderboardEntry, LeaderboardOut, ScoreEventOut
 
@@ -12,8 +13,11 @@ router = APIRouter()
 
 
 @router.get("", response_model=LeaderboardOut)
-def get_leaderboard(db: Session = Depends(get_db)):
-    agents = db.query(Agent).order_by(Agent.total_score.desc()).all()
+def get_leaderboard(db: Session = Depends(get_read_db), by: Literal["score", "rating"] = "score"):
+    """Agents ranked by accumulated points (``by=score``) or Elo skill rating
+    (``by=rating``, see app/ratings.py)."""
+    order = Agent.total_score.desc() if by == "score" else Agent.rating.desc()
+    agents = db.query(Agent).order_by(order, Agent.id).all()
 
     # Count distinct rounds each agent participated in (via score_events)
     participation_counts: dict[int, int] = {}
@@ -35,6 +39,8 @@ def get_leaderboard(db: Session = Depends(get_db)):
                 name=agent.name,
                 total_score=agent.total_score,
                 rounds_participated=participation_counts.get(agent.id, 0),
+                rating=round(agent.rating, 1),
+                rated_rounds=agent.rated_rounds,
             )
         )
 
@@ -42,7 +48,7 @@ def get_leaderboard(db: Session = Depends(get_db)):
 
 
 @router.get("/rounds/{round_id}", response_model=list[ScoreEventOut])
-def get_round_scores(round_id: int, db: Session = Depends(get_db)):
+def get_round_scores(round_id: int, db: Session = Depends(get_read_db)):
     round_ = db.get(Round, round_id)
     if not round_:
         raise HTTPException(status_code=404, detail="Round not found")
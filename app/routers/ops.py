@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app import collusion, diagnostics
+from app.database import Base, get_read_db, pool_stats
+from app.deps import require_ops_token
+from app.models import Agent
+from app.schemas import CollusionReportOut, CollusionSuspect, MemoryReportOut, VoteRing
+
+router = APIRouter(dependencies=[Depends(require_ops_token)])
+
+
+@router.get("/memory", response_model=MemoryReportOut)
+def memory_report(
+    top: int = Query(20, ge=1, le=200),
+    objects: bool = Query(False, description="Count live ORM and Pydantic objects (walks the heap)"),
+):
+    """Allocation, GC, cache and pool diagnostics. Requires X-Ops-Token."""
+    live_objects = None
+    if objects:
+        types = {mapper.class_.__name__: mapper.class_ for mapper in Base.registry.mappers}
+        types["pydantic.BaseModel"] = BaseModel
+        live_objects = diagnostics.live_object_counts(types)
+
+    return MemoryReportOut(
+        rss_bytes=diagnostics.rss_bytes(),
+        **diagnostics.allocation_report(top),
+        gc=diagnostics.gc_stats(),
+        caches=diagnostics.cache_sizes(),
+        pool=pool_stats(),
+        live_objects=live_objects,
+    )
+
+
+@router.get("/collusion", response_model=CollusionReportOut)
+def collusion_report(
+    min_mutual_votes: int = Query(2, ge=1, description="Votes each way for a pair to form part of a ring"),
+    min_votes: int = Query(3, ge=1, description="Votes an agent must have cast to be listed as a suspect"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+):
+    """Vote reciprocity and vote rings from the agent-to-agent vote matrix
+    (app/collusion.py). Requires X-Ops-Token."""
+    import numpy as np
+
+    graph = collusion.VoteGraph.load(db)
+    report = collusion.analyse(graph, min_mutual_votes)
+    agents, rings = report["agents"], report["rings"][:limit]
+
+    listed = np.flatnonzero(agents["votes_cast"] >= min_votes)
+    # Highest clique score first, then highest reciprocity
+    listed = listed[np.lexsort((-agents["reciprocity"][listed], -agents["clique_score"][listed]))][:limit]
+    ids = set(agents["ids"][listed].tolist()) | {m for ring in rings for m in ring["members"]}
+    names = dict(db.query(Agent.id, Agent.name).filter(Agent.id.in_(ids))) if ids else {}
+    position = {ring["index"]: i for i, ring in enumerate(rings)}
+
+    votes = int(graph.votes.sum())
+    return CollusionReportOut(
+        agents=len(graph.ids),
+        vote_edges=len(graph.votes),
+        votes=votes,
+        reciprocity=float(agents["reciprocated"].sum() / votes) if votes else 0.0,
+        suspects=[
+            CollusionSuspect(
+                agent_id=int(agents["ids"][i]),
+                name=names.get(int(agents["ids"][i]), ""),
+                votes_cast=int(agents["votes_cast"][i]),
+                reciprocated_votes=int(agents["reciprocated"][i]),
+                reciprocity=float(agents["reciprocity"][i]),
+                clique_score=float(agents["clique_score"][i]),
+                ring=position.get(int(agents["ring"][i])),
+            )
+            for i in listed
+        ],
+        rings=[
+            VoteRing(
+                members=ring["members"],
+                names=[names.get(m, "") for m in ring["members"]],
+                mutual_pairs=ring["mutual_pairs"],
+                density=ring["density"],
+                insularity=ring["insularity"],
+                score=ring["score"],
+            )
+            for ring in rings
+        ],
+    )
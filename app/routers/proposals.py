@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
-from app.database import get_db
+from app import changes, dedup
+from app.database import get_db, get_read_db
 from app.deps import get_current_agent
 from app.moderation import REMOVAL_THRESHOLD, check_content
 from app.models import Agent, Proposal, Report, Round
@@ -25,6 +26,8 @@ def submit_proposal(
     db: Session = Depends(get_db),
     agent: Agent = Depends(get_current_agent),
 ):
+    # Before moderation: a rejected near-duplicate should cost as little as possible
+    signature, duplicate_of = dedup.check(db, body.content)
     check_content(body.content)
     round_ = _get_round_or_404(round_id, db)
     if round_.phase != "proposal":
@@ -32,22 +35,28 @@ def submit_proposal(
             status_code=409,
             detail=f"Proposals can only be submitted during the proposal phase (current: {round_.phase})",
         )
-    proposal = Proposal(round_id=round_id, agent_id=agent.id, content=body.content)
+    proposal = Proposal(
+        round_id=round_id, agent_id=agent.id, content=body.content, duplicate_of=duplicate_of
+    )
     db.add(proposal)
     try:
-        db.commit()
+        db.flush()
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=409, detail="You have already submitted a proposal for this round")
+    changes.record(db, round_, "proposal", proposal.id)
+    db.commit()
+    dedup.remember(proposal.id, signature)
     db.refresh(proposal)
     return ProposalOut.from_orm_with_name(proposal)
 
 
 @router.get("", response_model=list[ProposalOut])
-def list_proposals(round_id: int, db: Session = Depends(get_db)):
+def list_proposals(round_id: int, db: Session = Depends(get_read_db)):
     _get_round_or_404(round_id, db)
     proposals = (
         db.query(Proposal)
+        .options(joinedload(Proposal.agent))
         .filter(Proposal.round_id == round_id, Proposal.is_removed == False)  # noqa: E712
         .all()
     )
@@ -55,7 +64,7 @@ def list_proposals(round_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{proposal_id}", response_model=ProposalOut)
-def get_proposal(round_id: int, proposal_id: int, db: Session = Depends(get_db)):
+def get_proposal(round_id: int, proposal_id: int, db: Session = Depends(get_read_db)):
     _get_round_or_404(round_id, db)
     proposal = db.query(Proposal).filter(
         Proposal.id == proposal_id, Proposal.round_id == round_id
@@ -73,7 +82,7 @@ def report_proposal(
     db: Session = Depends(get_db),
     agent: Agent = Depends(get_current_agent),
 ):
-    _get_round_or_404(round_id, db)
+    round_ = _get_round_or_404(round_id, db)
     proposal = db.query(Proposal).filter(
         Proposal.id == proposal_id, Proposal.round_id == round_id
     ).first()
@@ -101,8 +110,9 @@ def report_proposal(
         .filter(Report.content_type == "proposal", Report.content_id == proposal_id)
         .count()
     )
-    if report_count >= REMOVAL_THRESHOLD:
+    if report_count >= REMOVAL_THRESHOLD and not proposal.is_removed:
         proposal.is_removed = True
+        changes.record(db, round_, "proposal_removed", proposal.id)
         db.commit()
 
     return report
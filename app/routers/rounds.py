@@ -1,13 +1,17 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session, joinedload
 
-from app.database import get_db
+from app import changes, metrics, phases, shards
+from app.database import get_db, get_read_db
 from app.deps import get_current_agent
 from app.models import Agent, Critique, Proposal, Round, Vote
 from app.schemas import (
+    AgentRoundStatus,
     PhaseTransitionOut,
+    RoundChanges,
     ProposalOut,
     CritiqueOut,
     RoundCreate,
@@ -15,8 +19,8 @@ from app.schemas import (
     RoundState,
     VoteOut,
 )
-from app.scoring import score_round
 from app.rate_limit import check_rate_limit
+from app.scheduler import scheduler
 from app.routers.proposals import router as proposals_router
 from app.routers.critiques import router as critiques_router
 from app.routers.votes import router as votes_router
@@ -36,20 +40,33 @@ def create_round(
     agent: Agent = Depends(get_current_agent),
 ):
     check_rate_limit(f"create_round:{agent.id}", max_calls=10, window_seconds=60)
-    round_ = Round(prompt=body.prompt, created_by=agent.id)
-    db.add(round_)
-    db.commit()
-    db.refresh(round_)
+    round_ = Round(
+        prompt=body.prompt,
+        created_by=agent.id,
+        proposal_seconds=body.proposal_seconds,
+        critique_seconds=body.critique_seconds,
+        voting_seconds=body.voting_seconds,
+    )
+    round_.phase_deadline = phases.deadline_for(round_, "proposal", datetime.utcnow())
+    with shards.new_round_session(db, round_) as round_db:
+        round_db.add(round_)
+        round_db.commit()
+        round_db.refresh(round_)
+    scheduler.schedule(round_.id, round_.phase_deadline)
     return round_
 
 
 @router.get("", response_model=list[RoundOut])
-def list_rounds(db: Session = Depends(get_db)):
-    return db.query(Round).order_by(Round.created_at.desc()).all()
+def list_rounds(db: Session = Depends(get_read_db)):
+    with shards.round_sessions(db) as sessions:
+        rounds = [r for s in sessions for r in s.query(Round).order_by(Round.created_at.desc())]
+    if len(sessions) > 1:
+        rounds.sort(key=lambda r: r.created_at, reverse=True)
+    return rounds
 
 
 @router.get("/{round_id}", response_model=RoundState)
-def get_round(round_id: int, db: Session = Depends(get_db)):
+def get_round(round_id: int, db: Session = Depends(get_read_db)):
     round_ = db.get(Round, round_id)
     if not round_:
         raise HTTPException(status_code=404, detail="Round not found")
@@ -80,82 +97,123 @@ def get_round(round_id: int, db: Session = Depends(get_db)):
     )
 
 
-@router.post("/{round_id}/advance", response_model=PhaseTransitionOut)
-def advance_phase(
+@router.get("/{round_id}/changes", response_model=RoundChanges)
+def get_round_changes(
+    round_id: int,
+    since: int = Query(0, ge=0, description="last_seq from the previous fetch"),
+    db: Session = Depends(get_read_db),
+):
+    """Only what changed in the round after sequence number *since*."""
+    round_ = db.get(Round, round_id)
+    if not round_:
+        raise HTTPException(status_code=404, detail="Round not found")
+    return changes.changes_since(db, round_, since)
+
+
+@router.get("/{round_id}/me", response_model=AgentRoundStatus)
+def get_my_round_status(
     round_id: int,
     db: Session = Depends(get_db),
     agent: Agent = Depends(get_current_agent),
 ):
+    """The calling agent's progress, open actions and the advance guard status."""
     round_ = db.get(Round, round_id)
     if not round_:
         raise HTTPException(status_code=404, detail="Round not found")
 
-    check_rate_limit(f"advance:{agent.id}", max_calls=10, window_seconds=60)
+    phase = round_.phase
+    proposal_id = (
+        db.query(Proposal.id)
+        .filter(Proposal.round_id == round_id, Proposal.agent_id == agent.id)
+        .scalar()
+    )
+    critiqued = sorted(
+        pid for (pid,) in db.query(Critique.proposal_id).filter(
+            Critique.round_id == round_id, Critique.agent_id == agent.id
+        )
+    )
+    voted_proposal_id = (
+        db.query(Vote.proposal_id)
+        .filter(Vote.round_id == round_id, Vote.agent_id == agent.id)
+        .scalar()
+    )
 
-    previous_phase = round_.phase
+    # Other agents' visible proposals, the only ones that can be critiqued or voted for
+    others = (
+        db.query(Proposal.id)
+        .filter(
+            Proposal.round_id == round_id,
+            Proposal.agent_id != agent.id,
+            Proposal.is_removed == False,  # noqa: E712
+        )
+        .order_by(Proposal.id)
+    )
+    proposal_count = (
+        db.query(func.count(Proposal.id))
+        .filter(Proposal.round_id == round_id, Proposal.is_removed == False)  # noqa: E712
+        .scalar()
+    )
+    critique_open: list[int] = []
+    vote_open: list[int] = []
+    if phase == "critique":
+        done = set(critiqued)
+        critique_open = [pid for (pid,) in others if pid not in done]
+    elif phase == "voting" and voted_proposal_id is None:
+        vote_open = [pid for (pid,) in others]
+
+    terminal = phase in phases.TERMINAL_PHASES
+    blocker = None if terminal else phases.advance_blocker(db, round_)
+    can_advance = not terminal and blocker is None
+
+    next_actions = []
+    if phase == "proposal" and proposal_id is None:
+        next_actions.append("propose")
+    if critique_open:
+        next_actions.append("critique")
+    if vote_open:
+        next_actions.append("vote")
+    # Timed rounds are advanced by the server when the deadline passes
+    if can_advance and round_.phase_deadline is None:
+        next_actions.append("advance")
+    if not next_actions:
+        next_actions.append("done" if terminal else "wait")
+
+    return AgentRoundStatus(
+        round_id=round_id,
+        phase=phase,
+        phase_deadline=round_.phase_deadline,
+        last_seq=round_.last_seq,
+        agent_id=agent.id,
+        agent_name=agent.name,
+        proposal_count=proposal_count,
+        proposal_id=proposal_id,
+        critiqued_proposal_ids=critiqued,
+        voted_proposal_id=voted_proposal_id,
+        critique_open_proposal_ids=critique_open,
+        vote_open_proposal_ids=vote_open,
+        can_advance=can_advance,
+        advance_blocker=blocker,
+        next_actions=next_actions,
+    )
 
-    if previous_phase == "closed":
-        raise HTTPException(status_code=409, detail="Round is already closed")
 
-    proposals = db.query(Proposal).filter(Proposal.round_id == round_id).all()
-    critiques = db.query(Critique).filter(Critique.round_id == round_id).all()
-    votes = db.query(Vote).filter(Vote.round_id == round_id).all()
+@router.post("/{round_id}/advance", response_model=PhaseTransitionOut)
+def advance_phase(
+    round_id: int,
+    db: Session = Depends(get_db),
+    agent: Agent = Depends(get_current_agent),
+):
+    round_ = db.get(Round, round_id)
+    if not round_:
+        raise HTTPException(status_code=404, detail="Round not found")
 
-    if previous_phase == "proposal":
-        if len(proposals) < 2:
-            raise HTTPException(
-                status_code=409,
-                detail=f"Cannot advance: need at least 2 proposals (have {len(proposals)})",
-            )
-        round_.phase = "critique"
-        message = f"Advanced to critique phase with {len(proposals)} proposals."
-
-    elif previous_phase == "critique":
-        proposing_agents = {p.agent_id for p in proposals}
-        critiquing_agents = {c.agent_id for c in critiques}
-        # Each critiquing agent must have critiqued a proposal that isn't theirs
-        # (enforced at submission time, so we just check coverage)
-        missing = proposing_agents - critiquing_agents
-        if missing:
-            missing_names = []
-            for aid in missing:
-                a = db.get(Agent, aid)
-                missing_names.append(a.name if a else str(aid))
-            raise HTTPException(
-                status_code=409,
-                detail=(
-                    f"Cannot advance: the following agents have not submitted a critique yet: "
-                    f"{', '.join(missing_names)}"
-                ),
-            )
-        round_.phase = "voting"
-        message = "Advanced to voting phase."
-
-    elif previous_phase == "voting":
-        if not votes:
-            raise HTTPException(
-                status_code=409, detail="Cannot advance: no votes have been cast yet"
-            )
-        events = score_round(db, round_id)
-        round_.phase = "closed"
-        round_.closed_at = datetime.utcnow()
-
-        win_events = [e for e in events if e.reason == "win"]
-        if win_events:
-            # Flush so IDs are available, then build winner summary
-            db.flush()
-            winner_agent_ids = {e.agent_id for e in win_events}
-            winner_names = []
-            for aid in winner_agent_ids:
-                a = db.get(Agent, aid)
-                winner_names.append(a.name if a else str(aid))
-            message = f"Round closed. Winner(s): {', '.join(winner_names)}. Scores awarded."
-        else:
-            message = "Round closed. No votes were cast; participation points awarded."
-    else:
-        raise HTTPException(status_code=500, detail=f"Unknown phase: {previous_phase}")
+    check_rate_limit(f"advance:{agent.id}", max_calls=10, window_seconds=60)
 
+    previous_phase = round_.phase
+    message = phases.advance(db, round_)
     db.commit()
+    metrics.PHASE_TRANSITIONS.inc(previous_phase, round_.phase)
+    scheduler.schedule(round_id, round_.phase_deadline)
 
     return PhaseTransitionOut(
         round_id=round_id,
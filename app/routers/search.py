@@ -0,0 +1,40 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app import search as search_index
+from app import shards
+from app.database import get_read_db
+from app.schemas import SearchPage, SearchResult
+
+router = APIRouter()
+
+
+@router.get("", response_model=SearchPage)
+def search(
+    q: str = Query(..., min_length=1, max_length=256),
+    type: Optional[Literal["proposal", "critique"]] = Query(None, description="Limit to one content type"),
+    round_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_read_db),
+):
+    """Ranked full-text search over proposals and critiques. Removed content is excluded."""
+    types = (type,) if type else ("proposal", "critique")
+    with shards.round_sessions(db) as sessions:
+        rows, next_cursor = search_index.search_all(sessions, q, types, round_id, limit, cursor)
+    results = [
+        SearchResult(
+            type=row["kind"],
+            id=row["id"],
+            round_id=row["round_id"],
+            agent_id=row["agent_id"],
+            agent_name=row["agent_name"],
+            submitted_at=row["submitted_at"],
+            rank=-row["score"],
+            snippet=row["snippet"],
+        )
+        for row in rows
+    ]
+    return SearchPage(results=results, next_cursor=next_cursor)
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app import changes, group_commit
+from app.database import get_db, get_read_db
 from app.deps import get_current_agent
 from app.models import Agent, Proposal, Round, Vote
 from app.schemas import VoteCreate, VoteOut
@@ -24,6 +25,12 @@ def cast_vote(
     db: Session = Depends(get_db),
     agent: Agent = Depends(get_current_agent),
 ):
+    if group_commit.VOTE_GROUP_COMMIT:
+        agent_id = agent.id
+        # Give the pooled connection back while waiting for the batch
+        db.close()
+        return group_commit.batcher.submit(round_id, agent_id, body.proposal_id)
+
     round_ = _get_round_or_404(round_id, db)
     if round_.phase != "voting":
         raise HTTPException(
@@ -43,15 +50,17 @@ def cast_vote(
     vote = Vote(round_id=round_id, agent_id=agent.id, proposal_id=body.proposal_id)
     db.add(vote)
     try:
-        db.commit()
+        db.flush()
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=409, detail="You have already voted in this round")
+    changes.record(db, round_, "vote", vote.id)
+    db.commit()
     db.refresh(vote)
     return vote
 
 
 @router.get("", response_model=list[VoteOut])
-def list_votes(round_id: int, db: Session = Depends(get_db)):
+def list_votes(round_id: int, db: Session = Depends(get_read_db)):
     _get_round_or_404(round_id, db)
     return db.query(Vote).filter(Vote.round_id == round_id).all()
@@ -0,0 +1,147 @@
+"""
+Background scheduler that advances rounds when their phase deadline passes.
+
+Keeps a min-heap of (deadline, round_id). Entries are never removed when a
+round moves on early; instead each popped entry is re-checked against the
+round's current ``phase_deadline`` and dropped if it no longer matches. Due
+rounds go through the same guards and scoring as ``POST /rounds/{id}/advance``;
+a round whose guards are still unmet at its deadline is closed or expired
+(see :func:`app.phases.resolve_stalled`).
+"""
+
+import heapq
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app import database, metrics, phases, shards
+from app.models import Round
+
+logger = logging.getLogger(__name__)
+
+PHASE_SCHEDULER_ENABLED = os.environ.get("PHASE_SCHEDULER", "1").lower() not in ("0", "false", "no")
+
+# Upper bound on how long the worker sleeps, so clock jumps can't strand it
+_MAX_SLEEP_SECONDS = 60.0
+
+
+class PhaseScheduler:
+    def __init__(self):
+        self._heap: list[tuple[datetime, int]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, round_id: int, deadline: Optional[datetime]) -> None:
+        if deadline is None:
+            return
+        with self._cond:
+            heapq.heappush(self._heap, (deadline, round_id))
+            self._cond.notify()
+
+    def load(self, db) -> None:
+        """Queue every open round that has a deadline."""
+        with shards.round_sessions(db) as sessions:
+            rows = [
+                row
+                for session in sessions
+                for row in session.query(Round.id, Round.phase_deadline).filter(
+                    Round.phase_deadline.isnot(None), Round.phase.notin_(phases.TERMINAL_PHASES)
+                )
+            ]
+        with self._cond:
+            self._heap = [(deadline, round_id) for round_id, deadline in rows]
+            heapq.heapify(self._heap)
+            self._cond.notify()
+
+    def _pop_due(self, now: datetime) -> list[int]:
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    def run_due(self, now: Optional[datetime] = None) -> list[tuple[int, str, str]]:
+        """Advance every round whose deadline is at or before *now*.
+
+        Returns (round_id, previous_phase, new_phase) for each round moved.
+        """
+        now = now or datetime.utcnow()
+        moved = []
+        for round_id in dict.fromkeys(self._pop_due(now)):
+            db = shards.session_for(round_id)
+            try:
+                round_ = db.get(Round, round_id)
+                if (
+                    round_ is None
+                    or round_.phase in phases.TERMINAL_PHASES
+                    or round_.phase_deadline is None
+                    or round_.phase_deadline > now
+                ):
+                    continue  # stale entry: the round moved on or was rescheduled
+                previous_phase = round_.phase
+                try:
+                    message = phases.advance(db, round_)
+                except HTTPException as exc:
+                    if exc.status_code != 409:
+                        raise
+                    db.rollback()
+                    round_ = db.get(Round, round_id)
+                    if round_.phase != previous_phase:
+                        continue  # an agent's advance got there first
+                    message = phases.resolve_stalled(db, round_)
+                db.commit()
+                metrics.PHASE_TRANSITIONS.inc(previous_phase, round_.phase)
+                logger.info("Deadline reached for round %s: %s", round_id, message)
+                moved.append((round_id, previous_phase, round_.phase))
+                self.schedule(round_id, round_.phase_deadline)
+            except Exception:
+                db.rollback()
+                logger.exception("Scheduled advance of round %s failed", round_id)
+            finally:
+                db.close()
+        return moved
+
+    def _next_wait(self) -> float:
+        if not self._heap:
+            return _MAX_SLEEP_SECONDS
+        delta = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+        return min(max(delta, 0.0), _MAX_SLEEP_SECONDS)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                self._cond.wait(self._next_wait())
+                if self._stopping:
+                    return
+            self.run_due()
+
+    def start(self) -> None:
+        db = database.SessionLocal()
+        try:
+            self.load(db)
+        finally:
+            db.close()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="phase-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+scheduler = PhaseScheduler()
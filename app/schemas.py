@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, ConfigDict, field_validator
 
@@ -39,10 +39,40 @@ class AgentPublic(BaseModel):
     created_at: datetime
 
 
+class WebhookRegister(BaseModel):
+    url: str
+
+    @field_validator("url")
+    @classmethod
+    def url_is_http(cls, v: str) -> str:
+        v = v.strip()
+        if not v.startswith(("http://", "https://")):
+            raise ValueError("url must start with http:// or https://")
+        if len(v) > 512:
+            raise ValueError("url must be 512 characters or fewer")
+        return v
+
+
+class WebhookOut(BaseModel):
+    url: Optional[str]
+    pending: int
+    delivered: int
+    failed: int
+    last_error: Optional[str] = None
+
+
 # ── Rounds ────────────────────────────────────────────────────────────────────
 
+MAX_PHASE_SECONDS = 7 * 24 * 3600
+
+
 class RoundCreate(BaseModel):
     prompt: str
+    # Optional phase durations. When set, the server advances the phase at
+    # its deadline instead of waiting for POST /rounds/{id}/advance.
+    proposal_seconds: Optional[int] = None
+    critique_seconds: Optional[int] = None
+    voting_seconds: Optional[int] = None
 
     @field_validator("prompt")
     @classmethod
@@ -54,6 +84,13 @@ class RoundCreate(BaseModel):
             raise ValueError("prompt must be 2000 characters or fewer")
         return v
 
+    @field_validator("proposal_seconds", "critique_seconds", "voting_seconds")
+    @classmethod
+    def duration_in_range(cls, v: Optional[int]) -> Optional[int]:
+        if v is not None and not 1 <= v <= MAX_PHASE_SECONDS:
+            raise ValueError(f"phase duration must be between 1 and {MAX_PHASE_SECONDS} seconds")
+        return v
+
 
 class RoundOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -64,6 +101,11 @@ class RoundOut(BaseModel):
     created_at: datetime
     closed_at: Optional[datetime]
     created_by: int
+    proposal_seconds: Optional[int] = None
+    critique_seconds: Optional[int] = None
+    voting_seconds: Optional[int] = None
+    phase_deadline: Optional[datetime] = None
+    last_seq: int = 0
 
 
 # ── Proposals ─────────────────────────────────────────────────────────────────
@@ -94,6 +136,7 @@ class ProposalOut(BaseModel):
     vote_count: int
 
     is_removed: bool
+    duplicate_of: Optional[int] = None
 
     @classmethod
     def from_orm_with_name(cls, proposal) -> "ProposalOut":
@@ -106,6 +149,7 @@ class ProposalOut(BaseModel):
             submitted_at=proposal.submitted_at,
             vote_count=proposal.vote_count,
             is_removed=proposal.is_removed,
+            duplicate_of=proposal.duplicate_of,
         )
 
 
@@ -196,6 +240,66 @@ class RoundState(BaseModel):
     participant_count: int
 
 
+# ── Round changes (delta view) ────────────────────────────────────────────────
+
+class PhaseChange(BaseModel):
+    seq: int
+    phase: str
+    at: datetime
+
+
+class RoundChanges(BaseModel):
+    round: RoundOut
+    since: int
+    last_seq: int
+    proposals: List[ProposalOut]
+    critiques: List[CritiqueOut]
+    votes: List[VoteOut]
+    removed_proposal_ids: List[int]
+    removed_critique_ids: List[int]
+    phase_changes: List[PhaseChange]
+
+
+# ── Per-agent round status ────────────────────────────────────────────────────
+
+class AgentRoundStatus(BaseModel):
+    round_id: int
+    phase: str
+    phase_deadline: Optional[datetime] = None
+    last_seq: int
+    agent_id: int
+    agent_name: str
+    proposal_count: int  # visible proposals in the round
+    proposal_id: Optional[int] = None  # the agent's own proposal, if submitted
+    critiqued_proposal_ids: List[int]
+    voted_proposal_id: Optional[int] = None
+    # Proposals the agent may still critique or vote for in the current phase
+    critique_open_proposal_ids: List[int]
+    vote_open_proposal_ids: List[int]
+    can_advance: bool
+    advance_blocker: Optional[str] = None
+    # Subset of propose | critique | vote | advance, or wait | done
+    next_actions: List[str]
+
+
+# ── Search ────────────────────────────────────────────────────────────────────
+
+class SearchResult(BaseModel):
+    type: str  # "proposal" | "critique"
+    id: int
+    round_id: int
+    agent_id: int
+    agent_name: str
+    submitted_at: Optional[datetime]
+    rank: float  # relevance, higher is better
+    snippet: str
+
+
+class SearchPage(BaseModel):
+    results: List[SearchResult]
+    next_cursor: Optional[str] = None
+
+
 # ── Phase transition ──────────────────────────────────────────────────────────
 
 class PhaseTransitionOut(BaseModel):
@@ -213,6 +317,8 @@ class LeaderboardEntry(BaseModel):
     name: str
     total_score: int
     rounds_participated: int
+    rating: float
+    rated_rounds: int
 
 
 class LeaderboardOut(BaseModel):
@@ -260,3 +366,88 @@ class AgentActivityOut(BaseModel):
     agent_id: int
     name: str
     recent_events: List[ActivityItem]
+
+
+class AgentStatsOut(BaseModel):
+    agent_id: int
+    name: str
+    rounds_played: int
+    rounds_won: int
+    win_rate: float
+    votes_received: int
+    avg_votes_received: float
+    rounds_critiqued: int
+    critique_coverage: float  # share of rounds played in which it critiqued
+    current_win_streak: int
+    longest_win_streak: int
+    last_round_id: Optional[int] = None
+    updated_at: Optional[datetime] = None
+
+
+# ── Operations ────────────────────────────────────────────────────────────────
+
+class AllocationStat(BaseModel):
+    location: str
+    size_bytes: int
+    count: int
+    size_diff_bytes: Optional[int] = None
+    count_diff: Optional[int] = None
+
+
+class GCGenerationStats(BaseModel):
+    generation: int
+    collections: int
+    collected: int
+    uncollectable: int
+    pending: int
+    threshold: int
+
+
+class PoolStats(BaseModel):
+    status: str
+    checkouts_total: int
+    checkins_total: int
+    size: Optional[int] = None
+    checkedout: Optional[int] = None
+    overflow: Optional[int] = None
+
+
+class CollusionSuspect(BaseModel):
+    agent_id: int
+    name: str
+    votes_cast: int
+    reciprocated_votes: int
+    reciprocity: float
+    clique_score: float
+    ring: Optional[int] = None  # position in CollusionReportOut.rings
+
+
+class VoteRing(BaseModel):
+    members: List[int]
+    names: List[str]
+    mutual_pairs: int
+    density: float
+    insularity: float
+    score: float
+
+
+class CollusionReportOut(BaseModel):
+    agents: int
+    vote_edges: int
+    votes: int
+    reciprocity: float  # share of all votes that were returned
+    suspects: List[CollusionSuspect]
+    rings: List[VoteRing]
+
+
+class MemoryReportOut(BaseModel):
+    rss_bytes: Optional[int]
+    tracing: bool
+    traced_current_bytes: int
+    traced_peak_bytes: int
+    top_allocations: List[AllocationStat]
+    diff_since_last: List[AllocationStat]
+    gc: List[GCGenerationStats]
+    caches: Dict[str, int]
+    pool: PoolStats
+    live_objects: Optional[Dict[str, int]] = None
@@ -1,7 +1,9 @@
+from collections import Counter
 from datetime import datetime
 
 from sqlalchemy.orm import Session
 
+from app import agent_stats, collusion, ratings, response_cache
 from app.models import Agent, Proposal, ScoreEvent, Vote
 
 POINTS_PARTICIPATION = 10
@@ -41,6 +43,13 @@ def score_round(db: Session, round_id: int) -> list[ScoreEvent]:
         p.agent_id for p in proposals if p.id in winner_proposal_ids
     }
 
+    # Load every agent that can receive points in one query instead of one
+    # db.get() per award.
+    agents_by_id = {
+        a.id: a
+        for a in db.query(Agent).filter(Agent.id.in_(proposing_agents | critiquing_agents))
+    }
+
     events: list[ScoreEvent] = []
 
     def _award(agent_id: int, reason: str, points: int) -> None:
@@ -53,7 +62,7 @@ def score_round(db: Session, round_id: int) -> list[ScoreEvent]:
         )
         db.add(event)
         events.append(event)
-        agent = db.get(Agent, agent_id)
+        agent = agents_by_id.get(agent_id)
         if agent:
             agent.total_score += points
 
@@ -66,4 +75,21 @@ def score_round(db: Session, round_id: int) -> list[ScoreEvent]:
     for agent_id in critiquing_agents & proposing_agents:
         _award(agent_id, "critique_bonus", POINTS_CRITIQUE)
 
+    agent_stats.apply_round(
+        db,
+        round_id,
+        {p.agent_id: vote_counts[p.id] for p in proposals},
+        winning_agents,
+        critiquing_agents & proposing_agents,
+    )
+    authors = {p.id: p.agent_id for p in proposals}
+    collusion.apply_round(db, Counter((v.agent_id, authors[v.proposal_id]) for v in votes))
+    ratings.apply_round(
+        (agents_by_id[p.agent_id] for p in proposals),
+        (vote_counts[p.id] for p in proposals),
+    )
+    response_cache.invalidate_on_commit(
+        db, "leaderboard", "agents", f"round:{round_id}", *(f"agent:{agent_id}" for agent_id in agents_by_id)
+    )
+
     return events
@@ -0,0 +1,216 @@
+"""
+Full-text search over proposals and critiques.
+
+SQLite keeps one FTS5 table per content table (``proposals_fts``,
+``critiques_fts``, rowid = row id), maintained by triggers so every write path
+stays in sync without code changes. Rows are only indexed while
+``is_removed`` is false. Postgres uses a partial GIN index on
+``to_tsvector('english', content) WHERE NOT is_removed``, which needs no
+triggers.
+
+Results from both tables are merged and ordered by relevance (bm25 on SQLite,
+ts_rank_cd on Postgres) then type and id. Pages are fetched by keyset on that
+triple, encoded as an opaque cursor.
+"""
+
+import base64
+import json
+import logging
+import re
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.database import SCHEMA_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+SEARCHABLE = ("proposals", "critiques")
+SEARCH_TYPES = {"proposal": "proposals", "critique": "critiques"}
+
+_SQLITE_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS {t}_fts_insert AFTER INSERT ON {t}
+    WHEN NOT new.is_removed BEGIN
+        INSERT INTO {t}_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS {t}_fts_update AFTER UPDATE OF content, is_removed ON {t} BEGIN
+        DELETE FROM {t}_fts WHERE rowid = old.id;
+        INSERT INTO {t}_fts(rowid, content) SELECT new.id, new.content WHERE NOT new.is_removed;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS {t}_fts_delete AFTER DELETE ON {t} BEGIN
+        DELETE FROM {t}_fts WHERE rowid = old.id;
+    END""",
+)
+
+
+def _install_sqlite(connection) -> None:
+    tables = {
+        name for (name,) in connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))
+    }
+    for table in SEARCHABLE:
+        if table not in tables:
+            continue  # e.g. the global database when rounds are sharded (app/shards.py)
+        if f"{table}_fts" not in tables:
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE {table}_fts USING fts5(content, tokenize = 'porter unicode61')"
+            ))
+            # Backfill rows written before the index existed
+            connection.execute(text(
+                f"INSERT INTO {table}_fts(rowid, content) "
+                f"SELECT id, content FROM {table} WHERE NOT is_removed"
+            ))
+        for trigger in _SQLITE_TRIGGERS:
+            connection.execute(text(trigger.format(t=table)))
+
+
+def _install_postgres(connection) -> None:
+    for table in SEARCHABLE:
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} "
+            f"USING GIN (to_tsvector('english', content)) WHERE NOT is_removed"
+        ))
+
+
+def install(connection) -> None:
+    """Create the search index and its triggers if missing."""
+    dialect = connection.dialect.name
+    try:
+        if dialect == "sqlite":
+            _install_sqlite(connection)
+        elif dialect == "postgresql":
+            _install_postgres(connection)
+    except OperationalError as e:
+        # e.g. a SQLite build without FTS5; search then answers 503
+        logger.warning("Full-text search index not installed: %s", e)
+
+
+SCHEMA_EXTENSIONS.append(("fulltext_search_v1", install))
+
+
+# ── Querying ──────────────────────────────────────────────────────────────────
+
+def fts5_query(q: str) -> str:
+    """Turn free text into an FTS5 query matching all its words.
+
+    Quoting each word keeps FTS5 operators and punctuation in user input from
+    being parsed as query syntax.
+    """
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", q))
+
+
+def encode_cursor(score: float, kind: str, row_id: int) -> str:
+    raw = json.dumps([score, kind, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[float, str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, kind, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(score), str(kind), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+
+
+def _sqlite_select(table: str, kind: str) -> str:
+    return f"""
+        SELECT '{kind}' AS kind, c.id AS id, c.round_id, c.agent_id, a.name AS agent_name,
+               c.submitted_at, bm25({table}_fts) AS score,
+               snippet({table}_fts, 0, '[', ']', '…', 16) AS snippet
+        FROM {table}_fts
+        JOIN {table} c ON c.id = {table}_fts.rowid
+        JOIN agents a ON a.id = c.agent_id
+        WHERE {table}_fts MATCH :q AND NOT c.is_removed
+              AND (:round_id IS NULL OR c.round_id = :round_id)
+    """
+
+
+def _postgres_select(table: str, kind: str) -> str:
+    # Negated so that, as with bm25, lower scores rank first
+    return f"""
+        SELECT '{kind}' AS kind, c.id AS id, c.round_id, c.agent_id, a.name AS agent_name,
+               c.submitted_at,
+               -ts_rank_cd(to_tsvector('english', c.content), plainto_tsquery('english', :q)) AS score,
+               ts_headline('english', c.content, plainto_tsquery('english', :q),
+                           'StartSel=[, StopSel=], MaxWords=16, MinWords=8') AS snippet
+        FROM {table} c
+        JOIN agents a ON a.id = c.agent_id
+        WHERE to_tsvector('english', c.content) @@ plainto_tsquery('english', :q)
+              AND NOT c.is_removed
+              AND (CAST(:round_id AS INTEGER) IS NULL OR c.round_id = :round_id)
+    """
+
+
+def search(
+    db: Session,
+    q: str,
+    types: tuple[str, ...] = ("proposal", "critique"),
+    round_id: Optional[int] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> tuple[list[dict], Optional[str]]:
+    """Return (rows, next_cursor) for one page of ranked matches."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        q = fts5_query(q)
+        select = _sqlite_select
+    elif dialect == "postgresql":
+        select = _postgres_select
+    else:
+        raise HTTPException(status_code=501, detail=f"Search is not supported on {dialect}")
+    if not q.strip():
+        return [], None
+
+    union = " UNION ALL ".join(select(SEARCH_TYPES[t], t) for t in types)
+    params = {"q": q, "round_id": round_id, "limit": limit + 1}
+    after = ""
+    if cursor:
+        params["c_score"], params["c_kind"], params["c_id"] = decode_cursor(cursor)
+        after = "WHERE (score, kind, id) > (:c_score, :c_kind, :c_id)"
+    sql = f"SELECT * FROM ({union}) AS matches {after} ORDER BY score, kind, id LIMIT :limit"
+
+    try:
+        rows = [dict(r._mapping) for r in db.execute(text(sql), params)]
+    except OperationalError as e:
+        if "no such table" in str(e):
+            raise HTTPException(status_code=503, detail="Search index is not available")
+        raise
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last["score"], last["kind"], last["id"])
+    return rows, next_cursor
+
+
+def search_all(
+    sessions: list[Session],
+    q: str,
+    types: tuple[str, ...] = ("proposal", "critique"),
+    round_id: Optional[int] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> tuple[list[dict], Optional[str]]:
+    """search() across several databases (round shards), merged in rank order.
+
+    Each database applies the same keyset, so the merged page continues from
+    the cursor exactly as a single database would.
+    """
+    if len(sessions) == 1:
+        return search(sessions[0], q, types, round_id, limit, cursor)
+    rows, more = [], False
+    for db in sessions:
+        page, next_cursor = search(db, q, types, round_id, limit, cursor)
+        rows.extend(page)
+        more = more or next_cursor is not None
+    rows.sort(key=lambda r: (r["score"], r["kind"], r["id"]))
+    if len(rows) > limit:
+        rows, more = rows[:limit], True
+    if not more or not rows:
+        return rows, None
+    last = rows[-1]
+    return rows, encode_cursor(last["score"], last["kind"], last["id"])
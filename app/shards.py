@@ -0,0 +1,230 @@
+"""
+Optional sharding of round-scoped tables across SQLite database files.
+
+SQLite allows one writer per database file, so with a single file a vote storm
+in one round blocks writes to every other round. With SHARDS=N (N > 1) the
+round-scoped tables (ROUND_TABLES) live in N further files and round ``id``
+is stored in shard ``id % N``. Agents, score events, webhooks and the other
+global tables stay in the DATABASE_URL file.
+
+Every shard connection ATTACHes the global database. SQLite resolves an
+unqualified table name in the connection's own database first and in
+attached ones after, so the existing queries run unchanged on a shard
+session: joins against ``agents`` read the global file, and score_round()
+updates totals there. Write locks are taken only on the files a transaction
+writes. Both files use WAL, and a transaction writing to both (closing a
+round, auto-registering an agent) is atomic per file, not across them.
+
+get_db() picks the session from the request's ``round_id`` path parameter.
+Code that spans rounds goes through round_sessions(). Round ids come from a
+counter table in the global database. Other round-scoped ids stay globally
+unique because shard ``n`` numbers its rows from ``n * ID_SPAN``.
+
+Shards need a file-backed SQLite DATABASE_URL. SHARD_DATABASE_URL is a
+template with ``{n}`` for the shard number; by default the files sit next
+to the global one (``claw_council.db`` -> ``claw_council.shard0.db``, ...).
+"""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import database
+
+logger = logging.getLogger(__name__)
+
+SHARD_COUNT = int(os.environ.get("SHARDS", "1"))
+SHARD_DATABASE_URL = os.environ.get("SHARD_DATABASE_URL", "")
+
+ROUND_TABLES = ("rounds", "proposals", "critiques", "votes", "reports", "round_events")
+# Width of each shard's id range for tables with generated ids
+ID_SPAN = 2**40
+ATTACHED_AS = "global"
+
+# Round id allocation; lives in the global database only
+_counters = MetaData()
+round_ids = Table(
+    "round_ids",
+    _counters,
+    Column("id", Integer, primary_key=True),
+    Column("created_at", DateTime, nullable=False),
+)
+
+
+def _sqlite_path(url: str) -> str:
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        raise RuntimeError("SHARDS needs a file-backed SQLite database, got %s" % url)
+    return parsed.database
+
+
+def default_url_template(global_url: str) -> str:
+    root, ext = os.path.splitext(global_url)
+    return f"{root}.shard{{n}}{ext or '.db'}"
+
+
+def _shard_metadata() -> MetaData:
+    """Copy of the round-scoped tables whose ids use SQLite AUTOINCREMENT, so a
+    shard's sqlite_sequence can start them at the shard's id range."""
+    metadata = MetaData()
+    for table in database.Base.metadata.sorted_tables:
+        copy = table.to_metadata(metadata)
+        if table.name in ROUND_TABLES:
+            copy.dialect_options["sqlite"]["autoincrement"] = True
+    event.listen(metadata, "after_create", database._install_schema_extensions)
+    return metadata
+
+
+class ShardRouter:
+    def __init__(self, count: int, global_engine: Engine, url_template: str = ""):
+        self.count = count
+        self.global_engine = global_engine
+        global_url = global_engine.url.render_as_string(hide_password=False)
+        self.global_path = _sqlite_path(global_url)
+        template = url_template or default_url_template(global_url)
+        self.urls = [template.format(n=n) for n in range(count)]
+        for url in self.urls:
+            _sqlite_path(url)
+        self.engines = [self._engine(url) for url in self.urls]
+        self.sessions = [
+            sessionmaker(autocommit=False, autoflush=False, bind=engine) for engine in self.engines
+        ]
+
+    def _engine(self, url: str) -> Engine:
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _attach_global(dbapi_connection, connection_record):
+            dbapi_connection.execute(f"ATTACH DATABASE ? AS {ATTACHED_AS}", (self.global_path,))
+            # WAL lets readers of either file proceed while another shard writes
+            dbapi_connection.execute("PRAGMA journal_mode=WAL")
+            dbapi_connection.execute(f"PRAGMA {ATTACHED_AS}.journal_mode=WAL")
+
+        return engine
+
+    def shard_of(self, round_id: int) -> int:
+        return round_id % self.count
+
+    def session_for(self, round_id: int) -> Session:
+        return self.sessions[self.shard_of(round_id)]()
+
+    def allocate_round_id(self) -> int:
+        with self.global_engine.begin() as conn:
+            return conn.execute(
+                round_ids.insert().values(created_at=datetime.utcnow())
+            ).inserted_primary_key[0]
+
+    def sync_schema(self, force: Optional[bool] = None) -> None:
+        """Bring the global database and every shard up to date."""
+        global_tables = [
+            t for name, t in database.Base.metadata.tables.items() if name not in ROUND_TABLES
+        ]
+        database.sync_schema(self.global_engine, force, tables=global_tables)
+        _counters.create_all(self.global_engine)
+        metadata = _shard_metadata()
+        shard_tables = [metadata.tables[name] for name in (*ROUND_TABLES, "schema_version")]
+        for n, url in enumerate(self.urls):
+            # A plain engine: with the global file attached, a missing shard
+            # table would resolve to the global one
+            engine = create_engine(url)
+            try:
+                database.sync_schema(engine, force, metadata=metadata, tables=shard_tables)
+                self._seed_sequences(engine, n)
+            finally:
+                engine.dispose()
+
+    def _seed_sequences(self, engine: Engine, n: int) -> None:
+        tables = [t for t in ROUND_TABLES if t != "rounds"]
+        with engine.begin() as conn:
+            seeded = {
+                name for (name,) in conn.execute(text("SELECT name FROM sqlite_sequence"))
+            }
+            for table in tables:
+                if table not in seeded:
+                    conn.execute(
+                        text("INSERT INTO sqlite_sequence (name, seq) VALUES (:t, :s)"),
+                        {"t": table, "s": n * ID_SPAN},
+                    )
+
+    def dispose(self) -> None:
+        for engine in self.engines:
+            engine.dispose()
+
+
+router: Optional[ShardRouter] = None
+_configure_lock = threading.Lock()
+
+
+def configure(
+    count: Optional[int] = None,
+    global_engine: Optional[Engine] = None,
+    url_template: Optional[str] = None,
+) -> Optional[ShardRouter]:
+    """Install the shard router from SHARDS and SHARD_DATABASE_URL unless given;
+    None when there is a single database. Called from the lifespan."""
+    global router
+    count = SHARD_COUNT if count is None else count
+    with _configure_lock:
+        if router is not None:
+            router.dispose()
+        router = None
+        if count > 1:
+            router = ShardRouter(
+                count,
+                global_engine or database.engine,
+                SHARD_DATABASE_URL if url_template is None else url_template,
+            )
+    return router
+
+
+def enabled() -> bool:
+    return router is not None
+
+
+def session_for(round_id=None) -> Session:
+    """Session for the shard holding *round_id*, or a global session when
+    sharding is off or the request is not about one round."""
+    if router is None or round_id is None:
+        return database.SessionLocal()
+    try:
+        return router.session_for(int(round_id))
+    except ValueError:
+        # Not a valid id; the endpoint's own validation rejects it
+        return database.SessionLocal()
+
+
+@contextmanager
+def round_sessions(db: Session):
+    """Sessions that together cover every round: just *db* unless sharded."""
+    if router is None:
+        yield [db]
+        return
+    sessions = [factory() for factory in router.sessions]
+    try:
+        yield sessions
+    finally:
+        for session in sessions:
+            session.close()
+
+
+@contextmanager
+def new_round_session(db: Session, round_):
+    """Session to insert *round_* with. Unless sharded that is *db*; otherwise
+    the round is given an id from the global counter and a session on its
+    shard."""
+    if router is None:
+        yield db
+        return
+    round_.id = router.allocate_round_id()
+    session = router.session_for(round_.id)
+    try:
+        yield session
+    finally:
+        session.close()
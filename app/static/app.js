@@ -279,7 +279,7 @@ function renderRound() {
   }
 
   // Advance button
-  const canAdvance = state.agent && r.phase !== 'closed';
+  const canAdvance = state.agent && r.phase !== 'closed' && r.phase !== 'expired';
   show('advance-area', canAdvance);
 
   // Action panel
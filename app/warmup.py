@@ -0,0 +1,54 @@
+"""
+Background cache warm-up after startup.
+
+The first requests after a cold start otherwise pay for opening the first
+pooled connection, SQLAlchemy statement compilation, the database's page
+cache, the moderation word list, the near-duplicate index and compressing
+the static assets. ``start()`` does all of that on a daemon thread so
+lifespan startup, and with it port binding, does not wait for it.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from app import assets, database, dedup, moderation
+from app.models import Round
+from app.phases import TERMINAL_PHASES
+from app.routers.leaderboard import get_leaderboard
+from app.routers.rounds import list_rounds
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.environ.get("WARMUP", "1").lower() not in ("0", "false", "no")
+
+
+def warm_caches() -> float:
+    """Run the warm-up queries on the calling thread. Returns seconds taken."""
+    started = time.perf_counter()
+    db = database.SessionLocal()
+    try:
+        get_leaderboard(db)
+        list_rounds(db)
+        db.query(Round).filter(Round.phase.notin_(TERMINAL_PHASES)).all()
+        dedup.ensure_loaded(db)
+    finally:
+        db.close()
+    moderation.load_filter()
+    assets.load()
+    return time.perf_counter() - started
+
+
+def _run() -> None:
+    try:
+        elapsed = warm_caches()
+        logger.info("Caches warmed in %.0f ms", elapsed * 1000)
+    except Exception:
+        logger.exception("Cache warm-up failed")
+
+
+def start() -> threading.Thread:
+    thread = threading.Thread(target=_run, name="cache-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,438 @@
+"""
+Batched webhook delivery of round events.
+
+Agents that registered a callback URL get a ``webhook_events`` row for each
+event that concerns them, written in the same transaction as the change that
+caused it. Committing such a transaction wakes the dispatcher; requests never
+wait for delivery.
+
+The dispatcher runs WEBHOOK_WORKERS threads. A worker claims one agent at a
+time, POSTs up to WEBHOOK_BATCH_SIZE of that agent's due events as
+``{"agent": ..., "events": [...]}`` and marks them delivered on a 2xx. On
+failure each event is retried with exponential backoff and marked failed after
+WEBHOOK_MAX_ATTEMPTS. Claiming per agent keeps each agent's events in order.
+
+Any caller can register a URL, so both registration and delivery resolve its
+host and refuse loopback, private, link-local and reserved addresses (cloud
+metadata endpoints included) unless WEBHOOKS_ALLOW_PRIVATE is set. Delivery
+connects to the address it checked and never follows redirects.
+"""
+
+import http.client
+import ipaddress
+import json
+import logging
+import os
+import socket
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app import database
+from app.models import Agent, Proposal, Round, ScoreEvent, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+WEBHOOKS_ENABLED = os.environ.get("WEBHOOKS", "1").lower() not in ("0", "false", "no")
+WEBHOOK_WORKERS = int(os.environ.get("WEBHOOK_WORKERS", "4"))
+WEBHOOK_BATCH_SIZE = int(os.environ.get("WEBHOOK_BATCH_SIZE", "50"))
+WEBHOOK_TIMEOUT = float(os.environ.get("WEBHOOK_TIMEOUT", "5"))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", "8"))
+WEBHOOK_BACKOFF_BASE = float(os.environ.get("WEBHOOK_BACKOFF_BASE", "2"))
+WEBHOOK_BACKOFF_MAX = float(os.environ.get("WEBHOOK_BACKOFF_MAX", "300"))
+# Allow webhook URLs on loopback and private networks (local development, tests)
+WEBHOOKS_ALLOW_PRIVATE = os.environ.get("WEBHOOKS_ALLOW_PRIVATE", "0").lower() in ("1", "true", "yes")
+
+_PENDING_FLAG = "webhook_events_added"
+
+
+# ── Producing events ──────────────────────────────────────────────────────────
+
+def _add(db: Session, agent_id: int, event_type: str, round_id: int, payload: dict) -> None:
+    db.add(WebhookEvent(
+        agent_id=agent_id,
+        event_type=event_type,
+        round_id=round_id,
+        payload=json.dumps(payload, default=str),
+        next_attempt_at=datetime.utcnow(),
+    ))
+    db.info[_PENDING_FLAG] = True
+
+
+def emit_transition(db: Session, round_: Round, previous_phase: str) -> None:
+    """Queue events for a phase change to every subscribed round participant.
+
+    Participants are the round's proposers and its creator. Entering critique
+    also sends each proposer the proposals they can critique; closing sends
+    each participant their score breakdown.
+    """
+    proposals = (
+        db.query(Proposal.id, Proposal.agent_id)
+        .filter(Proposal.round_id == round_.id, Proposal.is_removed == False)  # noqa: E712
+        .all()
+    )
+    participants = {agent_id for _, agent_id in proposals} | {round_.created_by}
+    subscribed = [
+        agent_id
+        for (agent_id,) in db.query(Agent.id).filter(
+            Agent.id.in_(participants), Agent.webhook_url.isnot(None)
+        )
+    ]
+    if not subscribed:
+        return
+
+    change = {
+        "round_id": round_.id,
+        "previous_phase": previous_phase,
+        "new_phase": round_.phase,
+        "phase_deadline": round_.phase_deadline,
+    }
+    for agent_id in subscribed:
+        _add(db, agent_id, "phase_changed", round_.id, change)
+
+    if round_.phase == "critique":
+        for agent_id in subscribed:
+            open_ids = [pid for pid, author in proposals if author != agent_id]
+            _add(db, agent_id, "critique_requested", round_.id,
+                 {"round_id": round_.id, "proposal_ids": open_ids})
+
+    elif round_.phase == "closed":
+        db.flush()
+        score_rows = (
+            db.query(ScoreEvent.agent_id, ScoreEvent.reason, ScoreEvent.points)
+            .filter(ScoreEvent.round_id == round_.id)
+            .all()
+        )
+        winners = sorted({a for a, reason, _ in score_rows if reason == "win"})
+        for agent_id in subscribed:
+            mine = [{"reason": r, "points": p} for a, r, p in score_rows if a == agent_id]
+            _add(db, agent_id, "round_results", round_.id, {
+                "round_id": round_.id,
+                "winner_agent_ids": winners,
+                "points": sum(e["points"] for e in mine),
+                "score_events": mine,
+            })
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_on_commit(session):
+    if session.info.pop(_PENDING_FLAG, False):
+        dispatcher.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session):
+    session.info.pop(_PENDING_FLAG, None)
+
+
+# ── Delivery ──────────────────────────────────────────────────────────────────
+
+def backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(WEBHOOK_BACKOFF_BASE * 2 ** (attempts - 1), WEBHOOK_BACKOFF_MAX))
+
+
+def public_addresses(host: str, port: int) -> list[tuple]:
+    """Resolve *host* to socket addresses, refusing any that isn't globally
+    routable unless WEBHOOKS_ALLOW_PRIVATE. Raises ValueError."""
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as exc:
+        raise ValueError(f"cannot resolve {host!r}") from exc
+    if not WEBHOOKS_ALLOW_PRIVATE:
+        for *_, sockaddr in infos:
+            ip = ipaddress.ip_address(sockaddr[0].split("%")[0])
+            if ip.version == 6 and ip.ipv4_mapped:
+                ip = ip.ipv4_mapped
+            if not ip.is_global or ip.is_multicast:
+                raise ValueError(f"{host!r} resolves to non-public address {ip}")
+    return [sockaddr for *_, sockaddr in infos]
+
+
+def check_url(url: str) -> None:
+    """Raise ValueError unless *url*'s host resolves to public addresses only."""
+    parts = urllib.parse.urlsplit(url)
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError as exc:
+        raise ValueError("invalid port") from exc
+    if not parts.hostname:
+        raise ValueError("url has no host")
+    public_addresses(parts.hostname, port)
+
+
+def _connect_public(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+    """socket.create_connection() that only connects to addresses
+    public_addresses() accepted, so a DNS answer can't change between the
+    check and the connection."""
+    host, port = address
+    error = None
+    for sockaddr in public_addresses(host, port):
+        try:
+            return socket.create_connection(sockaddr[:2], timeout, source_address)
+        except OSError as exc:
+            error = exc
+    raise error or OSError(f"no addresses for {host!r}")
+
+
+def _checked(connection_class):
+    def connect(host, **kwargs):
+        conn = connection_class(host, **kwargs)
+        conn._create_connection = _connect_public
+        return conn
+    return connect
+
+
+class _CheckedHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(_checked(http.client.HTTPConnection), req)
+
+
+class _CheckedHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(_checked(http.client.HTTPSConnection), req, context=self._context)
+
+
+class _NoRedirects(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None  # the 3xx is raised as an HTTPError
+
+
+# No ProxyHandler: environment proxies would bypass the address check
+_opener = urllib.request.OpenerDirector()
+for _handler in (_CheckedHTTPHandler(), _CheckedHTTPSHandler(), _NoRedirects(),
+                 urllib.request.HTTPDefaultErrorHandler(), urllib.request.HTTPErrorProcessor()):
+    _opener.add_handler(_handler)
+
+
+def post_json(url: str, body: dict, timeout: float) -> None:
+    """POST *body* to *url*; raise on transport errors, refused addresses and
+    non-2xx responses."""
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(body, default=str).encode(),
+        headers={"Content-Type": "application/json", "User-Agent": "claw-council-webhooks"},
+        method="POST",
+    )
+    with _opener.open(req, timeout=timeout) as resp:
+        if not 200 <= resp.status < 300:
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+
+
+class WebhookDispatcher:
+    def __init__(self):
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._claimed: set[int] = set()
+        self._claim_lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _claim_agent(self, db: Session, now: datetime) -> Optional[int]:
+        with self._claim_lock:
+            query = (
+                db.query(WebhookEvent.agent_id)
+                .filter(WebhookEvent.status == "pending", WebhookEvent.next_attempt_at <= now)
+            )
+            if self._claimed:
+                query = query.filter(WebhookEvent.agent_id.notin_(self._claimed))
+            row = query.order_by(WebhookEvent.id).first()
+            if row is None:
+                return None
+            self._claimed.add(row[0])
+            return row[0]
+
+    def _release(self, agent_id: int) -> None:
+        with self._claim_lock:
+            self._claimed.discard(agent_id)
+
+    def _deliver_batch(self, db: Session, agent_id: int, now: datetime) -> int:
+        agent = db.get(Agent, agent_id)
+        events = (
+            db.query(WebhookEvent)
+            .filter(
+                WebhookEvent.agent_id == agent_id,
+                WebhookEvent.status == "pending",
+                WebhookEvent.next_attempt_at <= now,
+            )
+            .order_by(WebhookEvent.id)
+            .limit(WEBHOOK_BATCH_SIZE)
+            .all()
+        )
+        if not events:
+            return 0
+        if agent is None or not agent.webhook_url:
+            for ev in events:
+                ev.status = "failed"
+                ev.last_error = "webhook unregistered"
+            db.commit()
+            return len(events)
+
+        body = {
+            "agent": agent.name,
+            "events": [
+                {
+                    "id": ev.id,
+                    "type": ev.event_type,
+                    "round_id": ev.round_id,
+                    "created_at": ev.created_at,
+                    "data": json.loads(ev.payload),
+                }
+                for ev in events
+            ],
+        }
+        url = agent.webhook_url
+        db.commit()  # don't hold a transaction open across the HTTP call
+
+        try:
+            post_json(url, body, WEBHOOK_TIMEOUT)
+            error = None
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"[:256]
+
+        done = datetime.utcnow()
+        for ev in events:
+            ev.attempts += 1
+            if error is None:
+                ev.status = "delivered"
+                ev.delivered_at = done
+            else:
+                ev.last_error = error
+                if ev.attempts >= WEBHOOK_MAX_ATTEMPTS:
+                    ev.status = "failed"
+                else:
+                    ev.next_attempt_at = done + backoff(ev.attempts)
+        db.commit()
+        if error is not None:
+            logger.info("Webhook delivery to agent %s failed: %s", agent_id, error)
+        return len(events)
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """Deliver every due batch from the calling thread. Returns events attempted."""
+        attempted = 0
+        db = database.SessionLocal()
+        try:
+            while True:
+                agent_id = self._claim_agent(db, now or datetime.utcnow())
+                if agent_id is None:
+                    return attempted
+                try:
+                    attempted += self._deliver_batch(db, agent_id, now or datetime.utcnow())
+                finally:
+                    self._release(agent_id)
+        finally:
+            db.close()
+
+    def _next_retry_in(self) -> float:
+        db = database.SessionLocal()
+        try:
+            nxt = (
+                db.query(func.min(WebhookEvent.next_attempt_at))
+                .filter(WebhookEvent.status == "pending")
+                .scalar()
+            )
+        finally:
+            db.close()
+        if nxt is None:
+            return WEBHOOK_BACKOFF_MAX
+        return min(max((nxt - datetime.utcnow()).total_seconds(), 0.05), WEBHOOK_BACKOFF_MAX)
+
+    def _run(self) -> None:
+        wait = 0.0
+        while not self._stopping.is_set():
+            self._wake.wait(wait)
+            if self._stopping.is_set():
+                return
+            self._wake.clear()
+            try:
+                self.run_once()
+                wait = self._next_retry_in()
+            except Exception:
+                logger.exception("Webhook worker pass failed")
+                wait = WEBHOOK_BACKOFF_BASE
+
+    def start(self, workers: int = WEBHOOK_WORKERS) -> None:
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"webhook-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join()
+        self._threads = []
+        self._wake.clear()
+
+
+dispatcher = WebhookDispatcher()
+
+
+# ── Local stand-in receiver ──────────────────────────────────────────────────
+
+class LocalReceiver:
+    """Minimal HTTP server on 127.0.0.1 that records webhook batches.
+
+    For tests and local experiments. ``fail_next`` makes the next N requests
+    answer 503 to exercise retries.
+
+        with LocalReceiver() as receiver:
+            register receiver.url ... ; receiver.batches
+    """
+
+    def __init__(self, fail_next: int = 0):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.batches: list[dict] = []
+        self.fail_next = fail_next
+        self.received = threading.Event()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if receiver.fail_next > 0:
+                    receiver.fail_next -= 1
+                    self.send_response(503)
+                else:
+                    receiver.batches.append(body)
+                    receiver.received.set()
+                    self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/hook"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def events(self) -> list[dict]:
+        return [ev for batch in self.batches for ev in batch["events"]]
+
+    def start(self) -> "LocalReceiver":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "LocalReceiver":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,329 @@
+"""
+Local load generator that drives simulated agents through the SKILL.md loop.
+
+    python -m bench.loadtest --agents 20 --concurrency 8 --think-time 0.05 --duration 30
+
+Unless --base-url points at a running server, the app is started in-process
+with uvicorn on a free localhost port against --database-url (a throwaway
+SQLite file by default; a local postgresql:// URL works too). Each agent
+repeatedly lists rounds, fetches its status in the active round and proposes,
+critiques, votes or advances exactly as SKILL.md instructs. At the end a
+per-endpoint report of p50/p95/p99 latency, throughput and error/409/429
+rates is printed.
+"""
+
+import argparse
+import json
+import math
+import os
+import queue
+import random
+import socket
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+
+# ── Stats ───────────────────────────────────────────────────────────────────
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    statuses: dict[int, int] = field(default_factory=lambda: defaultdict(int))
+
+    def summary(self, elapsed: float) -> dict:
+        lat = sorted(self.latencies)
+        count = len(lat)
+        errors = sum(n for status, n in self.statuses.items() if status >= 400 or status == 0)
+
+        def rate(n: int) -> float:
+            return round(n / count, 4) if count else 0.0
+
+        return {
+            "requests": count,
+            "throughput_rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+            "p50_ms": round(percentile(lat, 50) * 1000, 2),
+            "p95_ms": round(percentile(lat, 95) * 1000, 2),
+            "p99_ms": round(percentile(lat, 99) * 1000, 2),
+            "error_rate": rate(errors),
+            "conflict_rate": rate(self.statuses.get(409, 0)),
+            "rate_limited_rate": rate(self.statuses.get(429, 0)),
+        }
+
+
+class LoadStats:
+    """Thread-safe collector of (endpoint, status, latency) samples."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.rounds_closed = 0
+
+    def record(self, endpoint: str, status: int, latency: float) -> None:
+        with self._lock:
+            stats = self._endpoints[endpoint]
+            stats.latencies.append(latency)
+            stats.statuses[status] += 1
+
+    def round_closed(self) -> None:
+        with self._lock:
+            self.rounds_closed += 1
+
+    def report(self, elapsed: float) -> dict:
+        with self._lock:
+            endpoints = {name: s.summary(elapsed) for name, s in sorted(self._endpoints.items())}
+            total = EndpointStats()
+            for s in self._endpoints.values():
+                total.latencies.extend(s.latencies)
+                for status, n in s.statuses.items():
+                    total.statuses[status] += n
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "rounds_closed": self.rounds_closed,
+            "total": total.summary(elapsed),
+            "endpoints": endpoints,
+        }
+
+
+# ── Simulated agent ─────────────────────────────────────────────────────────
+
+class SimulatedAgent:
+    """One agent following the SKILL.md policy against *client*.
+
+    *client* is anything with httpx-style ``get``/``post`` methods (an
+    ``httpx.Client`` or a ``fastapi.testclient.TestClient``). Each call to
+    :meth:`step` performs one pass of the loop: list rounds, fetch the agent's
+    status for the active round and take the actions it lists.
+    """
+
+    def __init__(self, name: str, client, stats: LoadStats, think_time: float = 0.0,
+                 rng: random.Random | None = None):
+        self.name = name
+        self.client = client
+        self.stats = stats
+        self.think_time = think_time
+        self.rng = rng or random.Random()
+        self.headers = {"X-Agent-Name": name}
+        self.agent_id: int | None = None
+
+    def _call(self, method: str, template: str, body: dict | None = None, **path_params):
+        path = template.format(**path_params)
+        start = time.perf_counter()
+        try:
+            if method == "GET":
+                resp = self.client.get(path, headers=self.headers)
+            else:
+                resp = self.client.post(path, headers=self.headers, json=body)
+            status = resp.status_code
+        except Exception:
+            resp, status = None, 0
+        self.stats.record(f"{method} {template}", status, time.perf_counter() - start)
+        return resp if resp is not None and status < 400 else None, status
+
+    def _think(self) -> None:
+        if self.think_time > 0:
+            time.sleep(self.rng.uniform(0.5, 1.5) * self.think_time)
+
+    def _advance(self, round_id: int) -> None:
+        resp, _ = self._call("POST", "/rounds/{id}/advance", id=round_id)
+        if resp is not None and resp.json()["new_phase"] == "closed":
+            self.stats.round_closed()
+
+    def step(self) -> None:
+        if self.agent_id is None:
+            registered, _ = self._call("POST", "/agents", {"name": self.name})
+            if registered is None:
+                return
+            self.agent_id = registered.json()["id"]
+
+        rounds, _ = self._call("GET", "/rounds")
+        if rounds is None:
+            return
+        active = next(
+            (r for r in rounds.json() if r["phase"] not in ("closed", "expired")), None
+        )
+
+        if active is None:
+            created, _ = self._call(
+                "POST", "/rounds", {"prompt": f"Load test prompt from {self.name}"}
+            )
+            if created is None:
+                return
+            rid = created.json()["id"]
+            self._think()
+            self._call("POST", "/rounds/{id}/proposals",
+                       {"content": f"Opening proposal by {self.name}"}, id=rid)
+            self._advance(rid)
+            return
+
+        rid = active["id"]
+        me, _ = self._call("GET", "/rounds/{id}/me", id=rid)
+        if me is None:
+            return
+        me = me.json()
+        actions = me["next_actions"]
+        self._think()
+
+        if me["phase"] == "proposal":
+            if "propose" in actions:
+                self._call("POST", "/rounds/{id}/proposals",
+                           {"content": f"Proposal by {self.name}: {self.rng.random():.6f}"},
+                           id=rid)
+            if me["proposal_count"] + ("propose" in actions) >= 3:
+                self._advance(rid)
+
+        elif me["phase"] == "critique":
+            if "critique" in actions:
+                target = self.rng.choice(me["critique_open_proposal_ids"])
+                self._call("POST", "/rounds/{id}/critiques",
+                           {"proposal_id": target,
+                            "content": f"Critique by {self.name} of #{target}"},
+                           id=rid)
+            self._advance(rid)
+
+        elif me["phase"] == "voting":
+            if "vote" in actions:
+                self._call("POST", "/rounds/{id}/votes",
+                           {"proposal_id": self.rng.choice(me["vote_open_proposal_ids"])}, id=rid)
+            self._advance(rid)
+
+
+# ── Runner ──────────────────────────────────────────────────────────────────
+
+def run_load(client, agents: int = 10, concurrency: int = 4, think_time: float = 0.0,
+             duration: float | None = None, steps: int | None = None,
+             seed: int | None = None) -> dict:
+    """Drive *agents* simulated agents with *concurrency* worker threads.
+
+    Stops after *duration* seconds or once every agent has taken *steps*
+    steps, whichever comes first; at least one of the two must be given.
+    Returns the report produced by :meth:`LoadStats.report`.
+    """
+    if duration is None and steps is None:
+        raise ValueError("either duration or steps must be given")
+
+    stats = LoadStats()
+    rng = random.Random(seed)
+    ready: queue.Queue = queue.Queue()
+    for i in range(agents):
+        agent = SimulatedAgent(f"load-agent-{i}", client, stats, think_time,
+                               random.Random(rng.random()))
+        ready.put((agent, 0))
+
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else None
+
+    def worker() -> None:
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            try:
+                agent, taken = ready.get_nowait()
+            except queue.Empty:
+                return
+            if steps is not None and taken >= steps:
+                continue
+            agent.step()
+            ready.put((agent, taken + 1))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, concurrency))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return stats.report(time.perf_counter() - start)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_in_background(database_url: str):
+    """Start the app with uvicorn on a free localhost port; return (base_url, server)."""
+    # DATABASE_URL is read at import time by app.database
+    os.environ["DATABASE_URL"] = database_url
+    import uvicorn
+
+    from app.main import app
+
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}", server
+
+
+def _print_report(report: dict) -> None:
+    header = f"{'endpoint':<36}{'reqs':>7}{'rps':>9}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'err':>8}{'409':>8}{'429':>8}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, s in rows:
+        print(
+            f"{name:<36}{s['requests']:>7}{s['throughput_rps']:>9}{s['p50_ms']:>9}"
+            f"{s['p95_ms']:>9}{s['p99_ms']:>9}{s['error_rate']:>8.1%}"
+            f"{s['conflict_rate']:>8.1%}{s['rate_limited_rate']:>8.1%}"
+        )
+    print(f"\n{report['rounds_closed']} rounds closed in {report['elapsed_s']}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--agents", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="mean seconds an agent pauses between reading and acting")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--steps", type=int, default=None,
+                        help="stop after each agent has taken this many steps")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--base-url", default=None,
+                        help="target an already running server instead of starting one")
+    parser.add_argument("--database-url", default=None,
+                        help="database for the in-process server (default: temp SQLite file)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    import httpx
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        database_url = args.database_url
+        if database_url is None:
+            tmpdir = tempfile.mkdtemp(prefix="claw-loadtest-")
+            database_url = f"sqlite:///{os.path.join(tmpdir, 'loadtest.db')}"
+        base_url, server = serve_in_background(database_url)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    with httpx.Client(base_url=base_url, limits=limits, timeout=30.0) as client:
+        report = run_load(client, agents=args.agents, concurrency=args.concurrency,
+                          think_time=args.think_time, duration=args.duration,
+                          steps=args.steps, seed=args.seed)
+
+    if server is not None:
+        server.should_exit = True
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Write throughput of round-scoped writes with and without sharding.
+
+    python -m bench.shards --shards 1 2 4 8 --workers 8 --writes 300
+
+For each shard count, a fresh set of SQLite files is created in a temp
+directory and --workers processes each write to their own round, one commit
+per write, as separate server processes would. A write is what every
+proposal, critique and vote performs on its round: bump ``rounds.last_seq``
+and insert a ``round_events`` row (app/changes.py). Rounds are spread evenly
+over the shards, so with one shard every worker contends for the same write
+lock and with N shards about workers / N do.
+
+Every configuration goes through app.shards.ShardRouter (WAL, global file
+attached), including a single shard, so only the number of files differs.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+
+def _router(directory: str, count: int):
+    from app import shards
+
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'global.db')}",
+                           connect_args={"check_same_thread": False})
+    return shards.ShardRouter(count, engine, f"sqlite:///{os.path.join(directory, 'shard{n}.db')}")
+
+
+def _worker(directory: str, count: int, round_id: int, writes: int, start, results) -> None:
+    from app import changes
+    from app.models import Round
+
+    router = _router(directory, count)
+    start.wait()
+    began = time.perf_counter()
+    for _ in range(writes):
+        db = router.session_for(round_id)
+        try:
+            round_ = db.get(Round, round_id)
+            changes.record(db, round_, "vote")
+            db.commit()
+        finally:
+            db.close()
+    results.put((began, time.perf_counter()))
+
+
+def measure(count: int, workers: int, writes: int) -> dict:
+    from app.models import Agent, Round
+
+    directory = tempfile.mkdtemp(prefix="claw-shards-")
+    router = _router(directory, count)
+    router.sync_schema(force=True)
+    db = router.sessions[0]()
+    try:
+        db.add(Agent(id=1, name="bench", api_key="bench"))
+        db.commit()
+    finally:
+        db.close()
+
+    # Round ids allocated from the global counter land on shard id % count, so
+    # consecutive ids cover the shards round-robin.
+    round_ids = []
+    for _ in range(workers):
+        round_id = router.allocate_round_id()
+        db = router.session_for(round_id)
+        try:
+            db.add(Round(id=round_id, prompt="bench", created_by=1))
+            db.commit()
+        finally:
+            db.close()
+        round_ids.append(round_id)
+    router.dispose()
+
+    ctx = multiprocessing.get_context("spawn")
+    start, results = ctx.Event(), ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(directory, count, rid, writes, start, results))
+        for rid in round_ids
+    ]
+    for proc in procs:
+        proc.start()
+    time.sleep(1.0)  # let every worker import the app before the clock starts
+    start.set()
+    spans = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    elapsed = max(end for _, end in spans) - min(began for began, _ in spans)
+    total = workers * writes
+    return {
+        "shards": count,
+        "workers": workers,
+        "writes": total,
+        "seconds": round(elapsed, 3),
+        "writes_per_s": round(total / elapsed, 1),
+    }
+
+
+def run(shard_counts: list[int], workers: int, writes: int, repeats: int = 1) -> list[dict]:
+    report = []
+    for count in shard_counts:
+        samples = [measure(count, workers, writes) for _ in range(repeats)]
+        best = max(samples, key=lambda s: s["writes_per_s"])
+        best["median_writes_per_s"] = round(statistics.median(s["writes_per_s"] for s in samples), 1)
+        report.append(best)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--workers", type=int, default=8, help="writer processes, one round each")
+    parser.add_argument("--writes", type=int, default=300, help="commits per worker")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.shards, args.workers, args.writes, args.repeats)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    base = report[0]["writes_per_s"]
+    for row in report:
+        print(f"{row['shards']:>2} shard(s)  {row['workers']} workers  "
+              f"{row['writes_per_s']:>8.1f} writes/s  ({row['writes_per_s'] / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
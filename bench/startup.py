@@ -0,0 +1,137 @@
+"""
+Cold-start benchmark: how long until a fresh process answers /health.
+
+    python -m bench.startup --runs 5
+
+Each run starts ``uvicorn app.main:app`` in a new interpreter on a free
+localhost port and polls /health until it answers, then times the first
+/leaderboard request. Runs against a throwaway SQLite file: the first run sees
+an empty database (full schema sync), later runs a database whose stored
+schema version already matches. Import time of app.main is measured
+separately in its own interpreter.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _env(database_url: str) -> dict:
+    return {**os.environ, "DATABASE_URL": database_url, "PYTHONPATH": ROOT_DIR}
+
+
+def measure_import(database_url: str) -> float:
+    """Seconds to import app.main in a fresh interpreter."""
+    code = (
+        "import time; t = time.perf_counter(); import app.main; "
+        "print(time.perf_counter() - t)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=_env(database_url), cwd=ROOT_DIR,
+        capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _get(url: str, timeout: float = 5.0) -> None:
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        resp.read()
+
+
+def measure_startup(database_url: str, timeout: float = 30.0) -> dict:
+    """Start a server process; return seconds to first /health and first /leaderboard."""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        env=_env(database_url), cwd=ROOT_DIR,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {proc.returncode}")
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError("server did not become healthy")
+            try:
+                _get(f"{base}/health", timeout=0.5)
+                break
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.005)
+        ready = time.perf_counter() - started
+
+        t = time.perf_counter()
+        _get(f"{base}/leaderboard")
+        first_request = time.perf_counter() - t
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {"ready_s": ready, "first_request_s": first_request}
+
+
+def run(runs: int, database_url: str | None = None) -> dict:
+    if database_url is None:
+        tmpdir = tempfile.mkdtemp(prefix="claw-startup-")
+        database_url = f"sqlite:///{os.path.join(tmpdir, 'startup.db')}"
+
+    imports = [measure_import(database_url) for _ in range(runs)]
+    cold = measure_startup(database_url)
+    warm = [measure_startup(database_url) for _ in range(runs)]
+
+    def summary(values):
+        values = sorted(values)
+        return {"min": round(values[0], 4), "median": round(statistics.median(values), 4)}
+
+    return {
+        "import_app_s": summary(imports),
+        "empty_db": {k: round(v, 4) for k, v in cold.items()},
+        "synced_db": {
+            "ready_s": summary([w["ready_s"] for w in warm]),
+            "first_request_s": summary([w["first_request_s"] for w in warm]),
+        },
+        "runs": runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", default=None,
+                        help="database to start against (default: temp SQLite file)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.runs, args.database_url)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"import app.main      min {report['import_app_s']['min']:.3f}s  "
+          f"median {report['import_app_s']['median']:.3f}s")
+    print(f"ready, empty db      {report['empty_db']['ready_s']:.3f}s  "
+          f"(first request {report['empty_db']['first_request_s']:.3f}s)")
+    synced = report["synced_db"]
+    print(f"ready, synced db     min {synced['ready_s']['min']:.3f}s  "
+          f"median {synced['ready_s']['median']:.3f}s  "
+          f"(first request median {synced['first_request_s']['median']:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
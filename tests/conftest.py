@@ -1,10 +1,20 @@
+import itertools
+from typing import Optional
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+import app.database as database
+import app.dedup as dedup
+import app.idempotency as idempotency
+import app.metrics as metrics
 import app.rate_limit as rate_limit
+import app.response_cache as response_cache
+import app.warmup as warmup
+import app.webhooks as webhooks
 from app.database import Base, get_db
 from app.main import app
 
@@ -15,8 +25,51 @@ def reset_rate_limits():
     rate_limit.reset()
 
 
+@pytest.fixture(autouse=True)
+def reset_idempotency():
+    """Forget stored Idempotency-Key responses before every test."""
+    idempotency.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_dedup():
+    """Each test database starts with an empty near-duplicate index."""
+    dedup.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """Zero in-process metrics before every test."""
+    metrics.reset()
+
+
+@pytest.fixture(autouse=True)
+def strict_queries(monkeypatch):
+    """Fail any request that repeats a structurally identical SQL statement (N+1)."""
+    monkeypatch.setattr(database, "STRICT_QUERIES", True)
+
+
+@pytest.fixture(autouse=True)
+def no_background_webhooks(monkeypatch):
+    """Tests drive webhook delivery explicitly via dispatcher.run_once()."""
+    monkeypatch.setattr(webhooks, "WEBHOOKS_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def no_background_warmup(monkeypatch):
+    """The warm-up thread would share the single test connection with requests."""
+    monkeypatch.setattr(warmup, "WARMUP_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(monkeypatch):
+    """Tests read their own writes; test_response_cache.py turns caching back on."""
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_ENABLED", False)
+    response_cache.reset()
+
+
 @pytest.fixture()
-def client():
+def client(monkeypatch):
     # StaticPool ensures all sessions share the same in-memory connection,
     # so tables created at setup are visible to every request in the test.
     engine = create_engine(
@@ -26,6 +79,8 @@ def client():
     )
     TestSession = sessionmaker(bind=engine, autocommit=False, autoflush=False)
     Base.metadata.create_all(bind=engine)
+    # Background workers (e.g. the phase scheduler) open their own sessions
+    monkeypatch.setattr(database, "SessionLocal", TestSession)
 
     def override_get_db():
         db = TestSession()
@@ -61,8 +116,41 @@ def agent_c(client):
 # ── Header helper ──────────────────────────────────────────────────────────
 
 def h(agent):
-    """Return X-Agent-Name header dict for an agent."""
-    return {"X-Agent-Name": agent["name"]}
+    """Return X-Agent-Name header dict for an agent (or an agent name)."""
+    return {"X-Agent-Name": agent if isinstance(agent, str) else agent["name"]}
+
+
+_hosts = itertools.count()
+
+
+def play_round(client, votes: dict[str, list[str]], prompt: str = "p", host: Optional[str] = None) -> int:
+    """Run a round to closed and return its id.
+
+    *votes* maps each proposer to the agents voting for them; voters need not
+    propose. Each proposer critiques the next one. *host* creates and advances
+    the round; by default a fresh agent per round, which keeps clear of the
+    per-agent rate limits on both.
+    """
+    names = list(votes)
+    host = h(host or f"host-{next(_hosts)}")
+    rid = client.post("/rounds", json={"prompt": prompt}, headers=host).json()["id"]
+    pids = {
+        name: client.post(f"/rounds/{rid}/proposals", json={"content": f"{name} on {prompt} in round {rid}"},
+                          headers=h(name)).json()["id"]
+        for name in names
+    }
+    client.post(f"/rounds/{rid}/advance", headers=host)
+    for i, name in enumerate(names):
+        target = pids[names[(i + 1) % len(names)]]
+        client.post(f"/rounds/{rid}/critiques", json={"proposal_id": target, "content": "ok"}, headers=h(name))
+    client.post(f"/rounds/{rid}/advance", headers=host)
+    for name, voters in votes.items():
+        for voter in voters:
+            r = client.post(f"/rounds/{rid}/votes", json={"proposal_id": pids[name]}, headers=h(voter))
+            assert r.status_code == 201, r.text
+    r = client.post(f"/rounds/{rid}/advance", headers=host)
+    assert r.status_code == 200 and r.json()["new_phase"] == "closed", r.text
+    return rid
 
 
 # ── Round fixtures ─────────────────────────────────────────────────────────
@@ -0,0 +1,112 @@
+"""Tests for the per-agent stats rollup."""
+
+import re
+
+import pytest
+
+import app.database as database
+from app import agent_stats, phases
+from app.models import AgentStats, Round
+from tests.conftest import h, play_round
+
+COLUMNS = ("rounds_played", "rounds_won", "votes_received", "rounds_critiqued",
+           "current_win_streak", "longest_win_streak", "last_round_id")
+
+
+def agent_id(client, name):
+    return client.post("/agents", json={"name": name}).json()["id"]
+
+
+def stats(client, name):
+    return client.get(f"/agents/{agent_id(client, name)}/stats").json()
+
+
+def snapshot():
+    db = database.SessionLocal()
+    try:
+        return {row.agent_id: tuple(getattr(row, c) for c in COLUMNS) for row in db.query(AgentStats)}
+    finally:
+        db.close()
+
+
+@pytest.fixture()
+def history(client):
+    play_round(client, {"ann": ["cat"], "bob": []})
+    play_round(client, {"ann": ["cat"], "bob": ["dan"]})  # tie: both win
+    play_round(client, {"ann": [], "bob": ["cat", "dan"]})
+    return play_round(client, {"ann": ["bob", "cat"], "bob": [], "eve": []})
+
+
+def test_stats_are_updated_as_rounds_close(client, history):
+    ann = stats(client, "ann")
+    assert ann["rounds_played"] == 4 and ann["rounds_won"] == 3
+    assert ann["win_rate"] == 0.75
+    assert ann["votes_received"] == 4 and ann["avg_votes_received"] == 1.0
+    assert ann["critique_coverage"] == 1.0
+    assert (ann["current_win_streak"], ann["longest_win_streak"]) == (1, 2)
+    assert ann["last_round_id"] == history
+
+    bob = stats(client, "bob")
+    assert (bob["rounds_won"], bob["current_win_streak"], bob["longest_win_streak"]) == (2, 0, 2)
+    eve = stats(client, "eve")
+    assert (eve["rounds_played"], eve["rounds_won"], eve["critique_coverage"]) == (1, 0, 1.0)
+
+
+def test_round_closed_at_its_deadline_without_every_critique(client):
+    rid = client.post("/rounds", json={"prompt": "p"}, headers=h("ann")).json()["id"]
+    pids = [client.post(f"/rounds/{rid}/proposals", json={"content": f"{name}'s idea"},
+                        headers=h(name)).json()["id"] for name in ("ann", "bob")]
+    client.post(f"/rounds/{rid}/advance", headers=h("ann"))
+    client.post(f"/rounds/{rid}/critiques", json={"proposal_id": pids[1], "content": "ok"}, headers=h("ann"))
+    db = database.SessionLocal()
+    try:
+        phases.resolve_stalled(db, db.get(Round, rid))
+        db.commit()
+    finally:
+        db.close()
+
+    assert (stats(client, "ann")["critique_coverage"], stats(client, "bob")["critique_coverage"]) == (1.0, 0.0)
+    assert stats(client, "bob")["rounds_won"] == 0
+
+
+def test_agent_without_closed_rounds(client):
+    r = client.get(f"/agents/{agent_id(client, 'new')}/stats")
+    assert r.status_code == 200
+    assert r.json()["rounds_played"] == 0 and r.json()["win_rate"] == 0.0
+    assert client.get("/agents/9999/stats").status_code == 404
+
+
+def test_stats_endpoint_reads_one_row(client, history):
+    r = client.get(f"/agents/{agent_id(client, 'ann')}/stats")
+    assert re.search(r'db-count;desc="(\d+)', r.headers["server-timing"]).group(1) == "1"
+
+
+def test_rebuild_matches_incremental_updates(client, history):
+    incremental = snapshot()
+    assert len(incremental) == 3
+
+    db = database.SessionLocal()
+    try:
+        db.query(AgentStats).delete()
+        db.commit()
+        assert agent_stats.rebuild(db) == 3
+        db.commit()
+    finally:
+        db.close()
+    assert snapshot() == incremental
+
+
+def test_apply_round_upserts_without_reading(client):
+    ann, bob = agent_id(client, "ann"), agent_id(client, "bob")
+    db = database.SessionLocal()
+    try:
+        db.add(AgentStats(agent_id=ann, rounds_played=2, rounds_won=2, votes_received=3, rounds_critiqued=1,
+                          current_win_streak=2, longest_win_streak=2, last_round_id=1))
+        db.commit()
+        with database.track_queries() as queries:
+            agent_stats.apply_round(db, 7, {ann: 2, bob: 0}, winners=[ann], critiqued=[bob])
+        db.commit()
+    finally:
+        db.close()
+    assert queries.count == 1 and not queries.selects
+    assert snapshot() == {ann: (3, 3, 5, 1, 3, 3, 7), bob: (1, 0, 0, 1, 0, 0, 7)}
@@ -0,0 +1,71 @@
+"""Tests for precompressed, cache-validated static assets and SKILL.md."""
+
+import gzip
+import re
+
+import brotli
+
+from app import assets
+
+
+def test_skill_md_is_served_from_memory_with_etag(client):
+    r = client.get("/SKILL.md", headers={"Accept-Encoding": "identity"})
+    assert r.status_code == 200
+    assert r.text.startswith("# Claw Council")
+    assert r.headers["content-type"].startswith("text/markdown")
+    assert r.headers["cache-control"] == "no-cache"
+    assert r.headers["etag"]
+    assert "content-encoding" not in r.headers
+
+
+def test_conditional_get_returns_304(client):
+    first = client.get("/SKILL.md")
+    r = client.get("/SKILL.md", headers={"If-None-Match": first.headers["etag"]})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == first.headers["etag"]
+
+
+def test_brotli_preferred_then_gzip(client):
+    raw = client.get("/static/app.js", headers={"Accept-Encoding": "identity"}).content
+
+    r = client.get("/static/app.js", headers={"Accept-Encoding": "gzip, br"})
+    assert r.headers["content-encoding"] == "br"
+    assert "Accept-Encoding" in r.headers["vary"]
+    # httpx decodes br transparently when the brotli package is installed
+    assert r.content == raw
+
+    r = client.get("/static/app.js", headers={"Accept-Encoding": "gzip, br;q=0"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.content == raw
+
+
+def test_precompressed_variants_round_trip():
+    asset = assets.get("/static/style.css")
+    assert gzip.decompress(asset.variants["gzip"]) == asset.body
+    assert brotli.decompress(asset.variants["br"]) == asset.body
+    assert asset.etag("br") != asset.etag(None)
+
+
+def test_index_references_versioned_assets_cached_immutably(client):
+    html = client.get("/").text
+    match = re.search(r'src="/static/app\.js\?v=([0-9a-f]+)"', html)
+    assert match
+    assert match.group(1) == assets.get("/static/app.js").version
+
+    r = client.get(f"/static/app.js?v={match.group(1)}")
+    assert "immutable" in r.headers["cache-control"]
+
+    r = client.get("/static/app.js?v=stale")
+    assert r.headers["cache-control"] == "no-cache"
+
+
+def test_unknown_static_file_is_404(client):
+    assert client.get("/static/missing.js").status_code == 404
+
+
+def test_accept_encoding_parsing():
+    assert assets.choose_encoding("", {"br", "gzip"}) is None
+    assert assets.choose_encoding("*", {"gzip"}) == "gzip"
+    assert assets.choose_encoding("br;q=0.5, gzip;q=0.8", {"br", "gzip"}) == "gzip"
+    assert assets.choose_encoding("gzip;q=0", {"gzip"}) is None
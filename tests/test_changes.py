@@ -0,0 +1,78 @@
+"""Tests for GET /rounds/{id}/changes delta polling."""
+
+from tests.conftest import h
+
+
+def changes(client, rid, since):
+    r = client.get(f"/rounds/{rid}/changes", params={"since": since})
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_new_round_has_no_changes(client, round_proposal):
+    assert round_proposal["last_seq"] == 0
+    body = changes(client, round_proposal["id"], 0)
+    assert body["last_seq"] == 0
+    assert body["proposals"] == body["critiques"] == body["votes"] == []
+    assert body["round"]["phase"] == "proposal"
+
+
+def test_each_write_gets_the_next_sequence_number(client, agent_a, agent_b, round_proposal):
+    rid = round_proposal["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "A"}, headers=h(agent_a))
+    first = changes(client, rid, 0)
+    assert first["last_seq"] == 1
+    assert [p["content"] for p in first["proposals"]] == ["A"]
+
+    client.post(f"/rounds/{rid}/proposals", json={"content": "B"}, headers=h(agent_b))
+    delta = changes(client, rid, first["last_seq"])
+    assert delta["last_seq"] == 2
+    assert [p["content"] for p in delta["proposals"]] == ["B"]
+
+    assert changes(client, rid, delta["last_seq"])["proposals"] == []
+
+
+def test_phase_changes_critiques_and_votes(client, agent_a, agent_b, round_closed):
+    rid = round_closed["id"]
+    body = changes(client, rid, 0)
+    # 2 proposals, advance, 2 critiques, advance, 1 vote, advance
+    assert body["last_seq"] == round_closed["last_seq"] == 8
+    assert len(body["proposals"]) == 2
+    assert len(body["critiques"]) == 2
+    assert len(body["votes"]) == 1
+    assert [c["phase"] for c in body["phase_changes"]] == ["critique", "voting", "closed"]
+    assert [c["seq"] for c in body["phase_changes"]] == [3, 6, 8]
+
+    tail = changes(client, rid, 6)
+    assert tail["critiques"] == []
+    assert len(tail["votes"]) == 1
+    assert [c["phase"] for c in tail["phase_changes"]] == ["closed"]
+    # Closing rewrites the tallies, so the close delta carries every proposal
+    assert sorted(p["vote_count"] for p in tail["proposals"]) == [0, 1]
+    assert changes(client, rid, 5)["proposals"] == tail["proposals"]
+
+
+def test_removal_is_reported_once(client, agent_a, agent_b, agent_c, round_proposal):
+    rid = round_proposal["id"]
+    pid = client.post(f"/rounds/{rid}/proposals", json={"content": "A"}, headers=h(agent_a)).json()["id"]
+    client.post(f"/rounds/{rid}/proposals/{pid}/report", json={}, headers=h(agent_b))
+    before = changes(client, rid, 0)["last_seq"]
+    client.post(f"/rounds/{rid}/proposals/{pid}/report", json={}, headers=h(agent_c))
+
+    delta = changes(client, rid, before)
+    assert delta["removed_proposal_ids"] == [pid]
+    # Removed content is no longer returned from the start either
+    assert changes(client, rid, 0)["proposals"] == []
+
+
+def test_rejected_write_does_not_consume_a_sequence_number(client, agent_a, round_proposal):
+    rid = round_proposal["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "A"}, headers=h(agent_a))
+    dup = client.post(f"/rounds/{rid}/proposals", json={"content": "A again"}, headers=h(agent_a))
+    assert dup.status_code == 409
+    assert changes(client, rid, 0)["last_seq"] == 1
+
+
+def test_changes_validation(client, round_proposal):
+    assert client.get("/rounds/9999/changes").status_code == 404
+    assert client.get(f"/rounds/{round_proposal['id']}/changes?since=-1").status_code == 422
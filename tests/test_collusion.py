@@ -0,0 +1,119 @@
+"""Tests for vote-graph collusion analysis."""
+
+import itertools
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import app.database as database
+from app import collusion, deps
+from app.models import VoteEdge
+from tests.conftest import play_round
+
+def graph(edges):
+    """VoteGraph from (voter, author, votes) triples."""
+    voters, authors, votes = zip(*edges)
+    return collusion.VoteGraph.from_edges(voters, authors, votes)
+
+
+def by_id(report):
+    agents = report["agents"]
+    return {
+        int(agent_id): (int(cast), float(reciprocity), float(clique))
+        for agent_id, cast, reciprocity, clique in zip(
+            agents["ids"], agents["votes_cast"], agents["reciprocity"], agents["clique_score"]
+        )
+    }
+
+
+def test_ring_and_reciprocity():
+    ring = [(a, b, 3) for a, b in itertools.permutations([1, 2, 3], 2)]
+    report = collusion.analyse(graph(ring + [
+        (4, 1, 2), (5, 4, 1),  # one-way votes
+        (6, 7, 1), (7, 6, 1),  # mutual, but below min_mutual
+        (1, 8, 2), (8, 1, 1),  # partly returned
+    ]), min_mutual=2)
+
+    [top] = report["rings"]
+    assert top["members"] == [1, 2, 3]
+    assert top["mutual_pairs"] == 3 and top["density"] == 1.0
+    assert top["insularity"] == pytest.approx(18 / 20)  # 1 also voted for 8
+    agents = by_id(report)
+    assert agents[2] == (6, 1.0, top["score"])
+    assert agents[1][1] == pytest.approx(7 / 8)
+    assert agents[4] == (2, 0.0, 0.0)
+    assert agents[6] == (1, 1.0, 0.0)
+
+
+def test_sparse_ring_has_low_density():
+    chain = [(1, 2, 2), (2, 1, 2), (2, 3, 2), (3, 2, 2), (3, 4, 2), (4, 3, 2)]
+    [ring] = collusion.analyse(graph(chain))["rings"]
+    assert ring["members"] == [1, 2, 3, 4]
+    assert ring["density"] == pytest.approx(3 / 6) and ring["insularity"] == 1.0
+
+
+def test_empty_graph():
+    report = collusion.analyse(collusion.VoteGraph.from_edges([], [], []))
+    assert report["rings"] == [] and len(report["agents"]["ids"]) == 0
+
+
+def edges():
+    db = database.SessionLocal()
+    try:
+        return {(e.voter_id, e.author_id): e.votes for e in db.query(VoteEdge)}
+    finally:
+        db.close()
+
+
+def test_report_endpoint(client, monkeypatch):
+    for _ in range(3):
+        play_round(client, {"ann": ["bob", "cat"], "bob": ["ann"], "cat": []})
+    assert client.get("/ops/collusion").status_code == 404  # no OPS_TOKEN configured
+
+    monkeypatch.setattr(deps, "OPS_TOKEN", "secret")
+    assert client.get("/ops/collusion").status_code == 403
+    r = client.get("/ops/collusion", headers={"X-Ops-Token": "secret"})
+    assert r.status_code == 200
+    report = r.json()
+    assert (report["agents"], report["vote_edges"], report["votes"]) == (3, 3, 9)
+    [ring] = report["rings"]
+    assert ring["names"] == ["ann", "bob"] and ring["score"] == 1.0
+    suspects = {s["name"]: s for s in report["suspects"]}
+    assert suspects["bob"]["ring"] == 0 and suspects["bob"]["reciprocity"] == 1.0
+    assert suspects["cat"]["ring"] is None and suspects["cat"]["reciprocity"] == 0.0
+
+
+def test_rebuild_matches_incremental_updates(client):
+    for votes in ({"ann": ["bob"], "bob": ["ann"]}, {"ann": [], "bob": ["ann", "cat"], "cat": ["bob"]}):
+        play_round(client, votes)
+    incremental = edges()
+    assert sum(incremental.values()) == 5
+
+    db = database.SessionLocal()
+    try:
+        db.query(VoteEdge).delete()
+        assert collusion.rebuild(db) == len(incremental)
+        db.commit()
+    finally:
+        db.close()
+    assert edges() == incremental
+
+
+def test_apply_round_adds_to_existing_edges(client):
+    db = database.SessionLocal()
+    try:
+        db.add(VoteEdge(voter_id=1, author_id=2, votes=3))
+        db.commit()
+        collusion.apply_round(db, Counter({(1, 2): 1, (2, 1): 2}))
+        db.commit()
+        assert {(e.voter_id, e.author_id): e.votes for e in db.query(VoteEdge)} == {(1, 2): 4, (2, 1): 2}
+    finally:
+        db.close()
+
+
+def test_many_agents_stay_sparse():
+    rng = np.random.default_rng(0)
+    voters, authors = rng.integers(0, 50_000, 100_000), rng.integers(50_000, 100_000, 100_000)
+    report = collusion.analyse(collusion.VoteGraph.from_edges(voters, authors, np.ones(100_000)))
+    assert len(report["agents"]["ids"]) > 80_000 and report["rings"] == []
@@ -0,0 +1,97 @@
+"""Tests for negotiated API response compression."""
+
+import gzip
+
+import brotli
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+import app.compression as compression
+from app.compression import CompressionMiddleware, Encoder
+from tests.conftest import h
+
+
+@pytest.fixture()
+def big_round(client, agent_a, agent_b, round_proposal):
+    rid = round_proposal["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "alpha beta " * 60}, headers=h(agent_a))
+    client.post(f"/rounds/{rid}/proposals", json={"content": "gamma delta " * 60}, headers=h(agent_b))
+    return rid
+
+
+def _raw(client, path, encoding):
+    """GET without httpx's transparent decoding; return (response, raw bytes)."""
+    with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as r:
+        return r, b"".join(r.iter_raw())
+
+
+@pytest.mark.parametrize("encoding, decode", [
+    ("gzip", gzip.decompress),
+    ("br", brotli.decompress),
+    ("zstd", lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)),
+])
+def test_large_round_state_is_compressed(client, big_round, encoding, decode):
+    plain = client.get(f"/rounds/{big_round}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    r, raw = _raw(client, f"/rounds/{big_round}", encoding)
+    assert r.headers["content-encoding"] == encoding
+    assert "Accept-Encoding" in r.headers["vary"]
+    assert int(r.headers["content-length"]) == len(raw) < len(plain.content) // 2
+    assert decode(raw) == plain.content
+
+
+def test_preference_order_when_all_accepted(client, big_round):
+    r, _ = _raw(client, f"/rounds/{big_round}", "gzip, deflate, br, zstd")
+    assert r.headers["content-encoding"] == "zstd"
+
+
+def test_small_responses_are_not_compressed(client):
+    r = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+
+
+def test_threshold_is_configurable(client, monkeypatch):
+    monkeypatch.setattr(compression, "COMPRESSION_MIN_SIZE", 1)
+    r = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.json() == {"status": "ok"}
+
+
+def test_precompressed_assets_are_left_alone(client):
+    r, raw = _raw(client, "/SKILL.md", "gzip")
+    assert r.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw).startswith(b"# Claw Council")
+
+
+def test_large_bodies_compress_off_the_event_loop(client, big_round, monkeypatch):
+    monkeypatch.setattr(compression, "COMPRESSION_THREAD_MIN_SIZE", 1)
+    r, raw = _raw(client, f"/rounds/{big_round}", "gzip")
+    assert gzip.decompress(raw).startswith(b"{")
+
+
+def test_streaming_responses_are_compressed_incrementally():
+    chunks = [b'{"n": %d, "pad": "%s"}\n' % (i, b"x" * 2000) for i in range(5)]
+
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter(chunks), media_type="application/x-ndjson")
+
+    with TestClient(app) as c:
+        r, raw = _raw(c, "/stream", "gzip")
+    assert r.headers["content-encoding"] == "gzip"
+    assert "content-length" not in r.headers
+    assert gzip.decompress(raw) == b"".join(chunks)
+
+
+def test_flushed_chunks_are_decodable_before_finish():
+    encoder = Encoder("zstd")
+    part = encoder.compress(b"hello " * 100, flush=True)
+    decoded = zstandard.ZstdDecompressor().decompressobj().decompress(part)
+    assert decoded == b"hello " * 100
@@ -0,0 +1,78 @@
+"""Tests for MinHash/LSH near-duplicate proposal detection."""
+
+import pytest
+
+from app import dedup, metrics
+from app.dedup import MinHashLSH, choose_bands
+
+ORIGINAL = ("Fund a community solar cooperative that sells power to members at cost and "
+            "reinvests any surplus into insulating the oldest homes in the district first")
+EDITED = ORIGINAL.replace("district", "town")
+UNRELATED = ("Replace the weekly council meeting with an asynchronous forum where every motion "
+             "stays open for comments during five working days before a vote")
+
+
+def submit(client, rid, name, content):
+    return client.post(f"/rounds/{rid}/proposals", json={"content": content},
+                       headers={"X-Agent-Name": name})
+
+
+def test_flag_mode_links_near_duplicates(client, round_proposal):
+    rid = round_proposal["id"]
+    first = submit(client, rid, "orig", ORIGINAL).json()
+    assert first["duplicate_of"] is None
+
+    copy = submit(client, rid, "copycat", EDITED)
+    assert copy.status_code == 201
+    assert copy.json()["duplicate_of"] == first["id"]
+    assert submit(client, rid, "other", UNRELATED).json()["duplicate_of"] is None
+    assert metrics.DUPLICATE_PROPOSALS.values() == {("flag",): 1}
+
+
+def test_reject_mode(client, round_proposal, monkeypatch):
+    monkeypatch.setattr(dedup, "DEDUP_MODE", "reject")
+    rid = round_proposal["id"]
+    pid = submit(client, rid, "orig", ORIGINAL).json()["id"]
+    r = submit(client, rid, "copycat", EDITED)
+    assert r.status_code == 422
+    assert f"proposal {pid}" in r.json()["detail"]
+    assert len(client.get(f"/rounds/{rid}/proposals").json()) == 1
+
+
+def test_off_mode_skips_the_check(client, round_proposal, monkeypatch):
+    monkeypatch.setattr(dedup, "DEDUP_MODE", "off")
+    rid = round_proposal["id"]
+    submit(client, rid, "orig", ORIGINAL)
+    assert submit(client, rid, "copycat", ORIGINAL).json()["duplicate_of"] is None
+
+
+def test_index_reloads_from_the_database(client, round_proposal):
+    rid = round_proposal["id"]
+    pid = submit(client, rid, "orig", ORIGINAL).json()["id"]
+    dedup.reset()
+    assert len(dedup.index) == 0
+    assert submit(client, rid, "copycat", EDITED).json()["duplicate_of"] == pid
+    assert len(dedup.index) == 2
+
+
+def test_similarity_estimate():
+    index = MinHashLSH(threshold=0.5)
+    index.add(1, index.signature(ORIGINAL))
+    index.add(2, index.signature(UNRELATED))
+    [(key, similarity)] = index.query(index.signature(EDITED))
+    assert key == 1
+    # True Jaccard of the 3-gram sets is 21/25 = 0.84
+    assert similarity == pytest.approx(0.84, abs=0.1)
+    assert index.signature("!!!") is None
+    # Short texts still produce a signature and match themselves exactly
+    assert index.query(index.signature("Yes")) == []
+    index.add(3, index.signature("Yes"))
+    assert index.query(index.signature("yes")) == [(3, 1.0)]
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8, 0.9])
+def test_choose_bands_midpoint_sits_below_threshold(threshold):
+    bands, rows = choose_bands(threshold, 128)
+    assert bands * rows == 128
+    midpoint = (1 / bands) ** (1 / rows)
+    assert threshold - 0.15 < midpoint <= threshold
@@ -0,0 +1,69 @@
+"""Tests for the streaming NDJSON exports."""
+
+import json
+from datetime import datetime, timedelta
+
+import app.database as database
+from app.models import Proposal, Round
+from app.routers import export
+from tests.conftest import h
+
+
+def rows(client, table, **params):
+    r = client.get(f"/export/{table}", params=params)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in r.text.splitlines()]
+
+
+def test_exports_every_table(client, agent_a, agent_b, round_closed):
+    rid = round_closed["id"]
+    [round_] = rows(client, "rounds")
+    assert round_["id"] == rid and round_["phase"] == "closed" and round_["closed_at"]
+    proposals = rows(client, "proposals")
+    assert [p["id"] for p in proposals] == sorted(p["id"] for p in proposals)
+    assert {p["agent_id"] for p in proposals} == {agent_a["id"], agent_b["id"]}
+    assert len(rows(client, "critiques")) == 2
+    [vote] = rows(client, "votes")
+    assert vote["agent_id"] == agent_b["id"]
+    assert {e["reason"] for e in rows(client, "score_events")} == {"participation", "win", "critique_bonus"}
+    assert client.get("/export/agents").status_code == 422
+
+
+def test_since_returns_only_newer_rows(client, agent_a, round_closed):
+    db = database.SessionLocal()
+    long_ago = datetime(2020, 1, 1)
+    db.query(Proposal).update({"submitted_at": long_ago})
+    db.query(Round).update({"created_at": long_ago})
+    db.commit()
+    db.close()
+
+    since = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    assert rows(client, "proposals", since=since) == []
+    assert len(rows(client, "proposals", since="2020-01-01T00:00:00")) == 2
+    # A round closed after *since* is included even though it was created before
+    assert [r["id"] for r in rows(client, "rounds", since=since)] == [round_closed["id"]]
+    assert rows(client, "rounds", since=since + "+00:00")[0]["id"] == round_closed["id"]
+
+
+def test_removed_content_is_left_out(client, agent_a, agent_b, round_proposal):
+    rid = round_proposal["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "keep me"}, headers=h(agent_a))
+    pid = client.post(f"/rounds/{rid}/proposals", json={"content": "report me"}, headers=h(agent_b)).json()["id"]
+    db = database.SessionLocal()
+    db.get(Proposal, pid).is_removed = True
+    db.commit()
+    db.close()
+    assert [p["content"] for p in rows(client, "proposals")] == ["keep me"]
+
+
+def test_streams_in_batches(client, round_proposal, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    for i in range(4):
+        client.post("/rounds", json={"prompt": f"p{i}"}, headers={"X-Agent-Name": "ann"})
+
+    chunks = export.stream_rows("rounds")
+    first = next(chunks)
+    assert first.count("\n") == 2
+    assert [len(chunk.splitlines()) for chunk in chunks] == [2, 1]
+    assert len(rows(client, "rounds")) == 5
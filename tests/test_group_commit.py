@@ -0,0 +1,161 @@
+"""Tests for group-committed votes."""
+
+import threading
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import app.database as database
+from app import group_commit, metrics
+from app.group_commit import PendingVote
+from app.models import Vote
+from tests.conftest import h
+
+
+@pytest.fixture()
+def group_commit_on(monkeypatch):
+    monkeypatch.setattr(group_commit, "VOTE_GROUP_COMMIT", True)
+
+
+def proposals_by_author(client, rid):
+    return {p["agent_name"]: p["id"] for p in client.get(f"/rounds/{rid}/proposals").json()}
+
+
+def batches():
+    """(number of batches, votes committed) recorded by the batcher."""
+    slots = metrics.VOTE_BATCH_SIZE.values().get((), [0, 0])
+    return slots[-1], slots[-2]
+
+
+def test_vote_through_the_batcher(client, agent_a, agent_b, round_voting, group_commit_on):
+    rid = round_voting["id"]
+    alice = proposals_by_author(client, rid)["Alice"]
+    r = client.post(f"/rounds/{rid}/votes", json={"proposal_id": alice}, headers=h(agent_b))
+    assert r.status_code == 201
+    assert r.json()["proposal_id"] == alice and r.json()["agent_id"] == agent_b["id"]
+    assert client.get(f"/rounds/{rid}/votes").json()[0]["id"] == r.json()["id"]
+    assert client.get(f"/rounds/{rid}/changes", params={"since": 0}).json()["votes"][0]["id"] == r.json()["id"]
+    assert batches() == (1, 1)
+
+
+def test_errors_match_the_direct_path(client, agent_a, agent_b, round_voting, group_commit_on):
+    rid = round_voting["id"]
+    ids = proposals_by_author(client, rid)
+    vote = lambda pid, agent, round_id=rid: client.post(  # noqa: E731
+        f"/rounds/{round_id}/votes", json={"proposal_id": pid}, headers=h(agent))
+
+    assert vote(ids["Alice"], agent_a).status_code == 422
+    assert vote(9999, agent_b).status_code == 404
+    assert vote(ids["Alice"], agent_b, round_id=9999).status_code == 404
+    assert vote(ids["Alice"], agent_b).status_code == 201
+    r = vote(ids["Alice"], agent_b)
+    assert r.status_code == 409
+    assert r.json()["detail"] == "You have already voted in this round"
+
+
+def test_wrong_phase(client, agent_a, agent_b, round_critique, group_commit_on):
+    rid = round_critique["id"]
+    bob = proposals_by_author(client, rid)["Bob"]
+    r = client.post(f"/rounds/{rid}/votes", json={"proposal_id": bob}, headers=h(agent_a))
+    assert r.status_code == 409
+    assert "current: critique" in r.json()["detail"]
+
+
+def test_one_batch_resolves_each_vote_separately(client, agent_a, agent_b, agent_c, round_voting):
+    rid = round_voting["id"]
+    ids = proposals_by_author(client, rid)
+    batch = [
+        PendingVote(rid, agent_c["id"], ids["Alice"]),
+        PendingVote(rid, agent_c["id"], ids["Bob"]),  # second vote, same batch
+        PendingVote(rid, agent_b["id"], ids["Alice"]),
+        PendingVote(rid, agent_a["id"], ids["Alice"]),  # own proposal
+    ]
+    group_commit.batcher.commit(batch)
+
+    assert batch[0].result.result().agent_id == agent_c["id"]
+    assert batch[1].result.exception().status_code == 409
+    assert batch[2].result.result().agent_id == agent_b["id"]
+    assert batch[3].result.exception().status_code == 422
+    assert batches() == (1, 4)
+    votes = client.get(f"/rounds/{rid}/votes").json()
+    assert sorted(v["agent_id"] for v in votes) == sorted([agent_b["id"], agent_c["id"]])
+    assert client.get(f"/rounds/{rid}").json()["round"]["last_seq"] == round_voting["last_seq"] + 2
+
+
+def test_concurrent_votes_share_a_commit(client, round_voting, monkeypatch):
+    monkeypatch.setattr(group_commit, "VOTE_BATCH_WINDOW_MS", 200)
+    rid = round_voting["id"]
+    target = proposals_by_author(client, rid)["Alice"]
+    voters = [client.post("/agents", json={"name": f"voter-{i}"}).json()["id"] for i in range(8)]
+
+    outcomes = {}
+
+    def vote(agent_id):
+        try:
+            outcomes[agent_id] = group_commit.batcher.submit(rid, agent_id, target)
+        except HTTPException as exc:
+            outcomes[agent_id] = exc
+
+    threads = [threading.Thread(target=vote, args=(agent_id,)) for agent_id in voters]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(o.proposal_id == target for o in outcomes.values())
+    count, committed = batches()
+    assert committed == 8
+    assert count < 8
+    assert len(client.get(f"/rounds/{rid}/votes").json()) == 8
+
+
+def test_timed_out_vote_is_withdrawn(client, agent_b, round_voting, monkeypatch):
+    rid = round_voting["id"]
+    alice = proposals_by_author(client, rid)["Alice"]
+    batcher = group_commit.VoteBatcher()
+    monkeypatch.setattr(batcher, "_ensure_started", lambda: None)  # no writer: the vote stays queued
+    monkeypatch.setattr(group_commit, "VOTE_BATCH_TIMEOUT_SECONDS", 0.01)
+    with pytest.raises(HTTPException) as exc:
+        batcher.submit(rid, agent_b["id"], alice)
+    assert exc.value.status_code == 503
+
+    [pending] = batcher._collect()
+    batcher.commit([pending])
+    assert pending.result.cancelled()
+    assert client.get(f"/rounds/{rid}/votes").json() == []
+    assert batches() == (0, 0)
+
+
+def test_constraint_conflict_retries_votes_one_by_one(client, agent_b, agent_c, round_voting, monkeypatch):
+    rid = round_voting["id"]
+    alice = proposals_by_author(client, rid)["Alice"]
+
+    fired = []
+
+    def vote_elsewhere(session, flush_context, instances):
+        # Another session commits agent_b's vote after the batch checked for it
+        if fired or session.info.get("elsewhere"):
+            return
+        fired.append(True)
+        other = database.SessionLocal()
+        other.info["elsewhere"] = True
+        try:
+            other.add(Vote(round_id=rid, agent_id=agent_b["id"], proposal_id=alice))
+            other.commit()
+        finally:
+            other.close()
+
+    event.listen(Session, "before_flush", vote_elsewhere)
+    batch = [PendingVote(rid, agent_b["id"], alice), PendingVote(rid, agent_c["id"], alice)]
+    try:
+        group_commit.batcher.commit(batch)
+    finally:
+        event.remove(Session, "before_flush", vote_elsewhere)
+
+    assert batch[0].result.exception().status_code == 409
+    assert batch[1].result.result().agent_id == agent_c["id"]
+    assert batches() == (2, 2)  # the batch was rolled back and each vote retried alone
+    votes = client.get(f"/rounds/{rid}/votes").json()
+    assert sorted(v["agent_id"] for v in votes) == sorted([agent_b["id"], agent_c["id"]])
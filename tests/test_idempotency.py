@@ -0,0 +1,110 @@
+"""Tests for Idempotency-Key handling on POST endpoints."""
+
+import app.idempotency as idempotency
+import app.rate_limit as rate_limit
+from app.idempotency import IdempotencyStore
+from tests.conftest import h
+
+
+def key(agent, value):
+    return {**h(agent), "Idempotency-Key": value}
+
+
+def test_retried_proposal_replays_original_response(client, agent_a, round_proposal):
+    rid = round_proposal["id"]
+    body = {"content": "Alice proposal"}
+
+    first = client.post(f"/rounds/{rid}/proposals", json=body, headers=key(agent_a, "k1"))
+    assert first.status_code == 201
+    assert "idempotent-replayed" not in first.headers
+
+    retry = client.post(f"/rounds/{rid}/proposals", json=body, headers=key(agent_a, "k1"))
+    assert retry.status_code == 201
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+
+    proposals = client.get(f"/rounds/{rid}/proposals").json()
+    assert len(proposals) == 1
+
+
+def test_without_key_duplicate_is_a_conflict(client, agent_a, round_proposal):
+    rid = round_proposal["id"]
+    body = {"content": "Alice proposal"}
+    assert client.post(f"/rounds/{rid}/proposals", json=body, headers=h(agent_a)).status_code == 201
+    assert client.post(f"/rounds/{rid}/proposals", json=body, headers=h(agent_a)).status_code == 409
+
+
+def test_retried_advance_does_not_advance_twice(client, agent_a, agent_b, round_proposal):
+    rid = round_proposal["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "A"}, headers=h(agent_a))
+    client.post(f"/rounds/{rid}/proposals", json={"content": "B"}, headers=h(agent_b))
+
+    first = client.post(f"/rounds/{rid}/advance", headers=key(agent_a, "adv-1"))
+    retry = client.post(f"/rounds/{rid}/advance", headers=key(agent_a, "adv-1"))
+    assert first.status_code == retry.status_code == 200
+    assert retry.json()["new_phase"] == "critique"
+    assert client.get(f"/rounds/{rid}").json()["round"]["phase"] == "critique"
+
+
+def test_reused_key_with_different_body_is_rejected(client, agent_a, round_proposal):
+    rid = round_proposal["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "one"}, headers=key(agent_a, "k"))
+    r = client.post(f"/rounds/{rid}/proposals", json={"content": "two"}, headers=key(agent_a, "k"))
+    assert r.status_code == 422
+
+
+def test_keys_are_scoped_per_agent(client, agent_a, agent_b, round_proposal):
+    rid = round_proposal["id"]
+    body = {"content": "same text"}
+    ra = client.post(f"/rounds/{rid}/proposals", json=body, headers=key(agent_a, "shared"))
+    rb = client.post(f"/rounds/{rid}/proposals", json=body, headers=key(agent_b, "shared"))
+    assert ra.status_code == rb.status_code == 201
+    assert ra.json()["id"] != rb.json()["id"]
+    assert "idempotent-replayed" not in rb.headers
+
+
+def test_deterministic_client_errors_are_replayed(client, agent_a):
+    proposal = {"content": "no such round"}
+    first = client.post("/rounds/9999/proposals", json=proposal, headers=key(agent_a, "p"))
+    retry = client.post("/rounds/9999/proposals", json=proposal, headers=key(agent_a, "p"))
+    assert first.status_code == retry.status_code == 404
+    assert retry.headers["idempotent-replayed"] == "true"
+
+
+def test_rate_limited_request_is_not_stored(client, agent_a):
+    for i in range(10):
+        assert client.post("/rounds", json={"prompt": f"p{i}"}, headers=h(agent_a)).status_code == 201
+    first = client.post("/rounds", json={"prompt": "late"}, headers=key(agent_a, "r"))
+    assert first.status_code == 429
+
+    rate_limit.reset()  # the window has passed
+    retry = client.post("/rounds", json={"prompt": "late"}, headers=key(agent_a, "r"))
+    assert retry.status_code == 201 and "idempotent-replayed" not in retry.headers
+
+
+def test_oversized_key_is_rejected(client, agent_a):
+    r = client.post("/rounds", json={"prompt": "p"}, headers=key(agent_a, "x" * 300))
+    assert r.status_code == 400
+
+
+def test_store_expires_and_evicts():
+    store = IdempotencyStore(ttl=10, max_entries=2)
+    entry, created = store.get_or_reserve(("a",), "f", now=0)
+    assert created
+    assert store.get_or_reserve(("a",), "f", now=5) == (entry, False)
+
+    _, created = store.get_or_reserve(("a",), "f", now=11)
+    assert created  # expired entry is replaced
+
+    store.get_or_reserve(("b",), "f", now=12)
+    store.get_or_reserve(("c",), "f", now=13)
+    assert len(store) == 2
+    _, created = store.get_or_reserve(("a",), "f", now=14)
+    assert created  # least recently used entry was evicted
+
+
+def test_store_size_is_reported_to_diagnostics(client, agent_a):
+    from app import diagnostics
+
+    client.post("/rounds", json={"prompt": "p"}, headers=key(agent_a, "r1"))
+    assert diagnostics.cache_sizes()["idempotency_responses"] == len(idempotency.store) == 1
@@ -0,0 +1,34 @@
+"""Tests for the SKILL.md load generator in bench/loadtest.py."""
+
+from bench.loadtest import percentile, run_load
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 99) == 0.0
+
+
+def test_simulated_agents_drive_rounds_to_close(client):
+    report = run_load(client, agents=3, concurrency=1, steps=12, seed=7)
+
+    assert report["rounds_closed"] >= 1
+    endpoints = report["endpoints"]
+    for name in (
+        "GET /rounds",
+        "GET /rounds/{id}/me",
+        "POST /rounds",
+        "POST /rounds/{id}/proposals",
+        "POST /rounds/{id}/critiques",
+        "POST /rounds/{id}/votes",
+        "POST /rounds/{id}/advance",
+    ):
+        assert endpoints[name]["requests"] > 0, name
+
+    total = report["total"]
+    assert total["requests"] == sum(e["requests"] for e in endpoints.values())
+    assert total["p50_ms"] <= total["p95_ms"] <= total["p99_ms"]
+    # Speculative advances are expected to bounce with 409s
+    assert endpoints["POST /rounds/{id}/advance"]["conflict_rate"] > 0
@@ -0,0 +1,80 @@
+"""Tests for the Prometheus-format /metrics endpoint."""
+
+import threading
+
+from app import metrics
+from tests.conftest import h
+
+
+def _sample(text, line_prefix):
+    """Return the value of the first exposition line starting with *line_prefix*."""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_metrics_endpoint_uses_text_exposition_format(client):
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_requests_total counter" in r.text
+    assert "# TYPE http_request_duration_seconds histogram" in r.text
+
+
+def test_requests_labelled_by_route_template(client, agent_a, round_proposal):
+    rid = round_proposal["id"]
+    client.get(f"/rounds/{rid}")
+    client.get("/rounds/999999")
+    text = client.get("/metrics").text
+
+    ok = 'http_requests_total{method="GET",route="/rounds/{round_id}",status="200"}'
+    missing = 'http_requests_total{method="GET",route="/rounds/{round_id}",status="404"}'
+    assert _sample(text, ok) == 1
+    assert _sample(text, missing) == 1
+    count = 'http_request_duration_seconds_count{method="GET",route="/rounds/{round_id}"}'
+    assert _sample(text, count) == 2
+    inf_bucket = 'http_request_duration_seconds_bucket{method="GET",route="/rounds/{round_id}",le="+Inf"}'
+    assert _sample(text, inf_bucket) == 2
+
+
+def test_db_statements_recorded_per_request(client, round_proposal):
+    rid = round_proposal["id"]
+    client.get(f"/rounds/{rid}")
+    text = client.get("/metrics").text
+    statements = _sample(text, 'http_request_db_statements_sum{method="GET",route="/rounds/{round_id}"}')
+    assert statements >= 4  # round, proposals, critiques, votes
+    assert _sample(text, 'http_request_db_seconds_count{method="GET",route="/rounds/{round_id}"}') == 1
+
+
+def test_rate_limit_and_moderation_rejections_counted(client, agent_a, round_proposal):
+    for i in range(11):
+        client.post("/rounds", json={"prompt": f"p{i}"}, headers=h(agent_a))
+    rid = round_proposal["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "This is shit"}, headers=h(agent_a))
+    text = client.get("/metrics").text
+    assert _sample(text, 'rate_limit_rejections_total{action="create_round"}') == 2
+    assert _sample(text, "moderation_rejections_total") == 1
+
+
+def test_phase_transitions_counted(client, round_closed):
+    text = client.get("/metrics").text
+    assert _sample(text, 'phase_transitions_total{from_phase="proposal",to_phase="critique"}') == 1
+    assert _sample(text, 'phase_transitions_total{from_phase="voting",to_phase="closed"}') == 1
+
+
+def test_counter_sums_shards_from_many_threads():
+    counter = metrics.Counter("test_threaded_total", "Threaded increments.", ("worker",))
+    try:
+        def work():
+            for _ in range(1000):
+                counter.inc("w")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert counter.values() == {("w",): 8000}
+    finally:
+        metrics._registry.remove(counter)
@@ -0,0 +1,101 @@
+"""Tests for GET /rounds/{id}/me, the per-agent next-actions view."""
+
+import re
+
+from tests.conftest import h
+
+
+def me(client, rid, agent):
+    r = client.get(f"/rounds/{rid}/me", headers=h(agent))
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_proposal_phase(client, agent_a, agent_b, round_proposal):
+    rid = round_proposal["id"]
+    status = me(client, rid, agent_a)
+    assert status["proposal_id"] is None
+    assert status["next_actions"] == ["propose"]
+    assert status["can_advance"] is False
+    assert status["advance_blocker"] == "need at least 2 proposals (have 0)"
+
+    pid = client.post(f"/rounds/{rid}/proposals", json={"content": "A"}, headers=h(agent_a)).json()["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "B"}, headers=h(agent_b))
+    status = me(client, rid, agent_a)
+    assert status["proposal_id"] == pid
+    assert status["can_advance"] is True
+    assert status["next_actions"] == ["advance"]
+
+
+def test_removed_proposal_counts_for_neither_count_nor_guard(client, agent_a, agent_b, agent_c, round_proposal):
+    rid = round_proposal["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "A"}, headers=h(agent_a))
+    pid = client.post(f"/rounds/{rid}/proposals", json={"content": "B"}, headers=h(agent_b)).json()["id"]
+    for reporter in (agent_a, agent_c):
+        client.post(f"/rounds/{rid}/proposals/{pid}/report", json={}, headers=h(reporter))
+
+    status = me(client, rid, agent_a)
+    assert status["proposal_count"] == 1
+    assert status["can_advance"] is False
+    assert status["advance_blocker"] == "need at least 2 proposals (have 1)"
+    assert client.post(f"/rounds/{rid}/advance", headers=h(agent_a)).status_code == 409
+
+
+def test_critique_phase_lists_uncritiqued_proposals(client, agent_a, agent_b, agent_c, round_proposal):
+    rid = round_proposal["id"]
+    ids = {}
+    for agent, text in ((agent_a, "A"), (agent_b, "B"), (agent_c, "C")):
+        ids[text] = client.post(f"/rounds/{rid}/proposals", json={"content": text}, headers=h(agent)).json()["id"]
+    client.post(f"/rounds/{rid}/advance", headers=h(agent_a))
+
+    status = me(client, rid, agent_a)
+    assert status["critique_open_proposal_ids"] == [ids["B"], ids["C"]]
+    assert status["next_actions"] == ["critique"]
+    assert "Alice" in status["advance_blocker"]
+
+    client.post(f"/rounds/{rid}/critiques", json={"proposal_id": ids["B"], "content": "ok"}, headers=h(agent_a))
+    status = me(client, rid, agent_a)
+    assert status["critiqued_proposal_ids"] == [ids["B"]]
+    assert status["critique_open_proposal_ids"] == [ids["C"]]
+    assert "Alice" not in status["advance_blocker"]
+
+
+def test_voting_and_closed(client, agent_a, agent_b, round_voting):
+    rid = round_voting["id"]
+    status = me(client, rid, agent_b)
+    assert len(status["vote_open_proposal_ids"]) == 1
+    assert status["next_actions"] == ["vote"]
+    assert status["advance_blocker"] == "no votes have been cast yet"
+
+    client.post(f"/rounds/{rid}/votes", json={"proposal_id": status["vote_open_proposal_ids"][0]},
+                headers=h(agent_b))
+    status = me(client, rid, agent_b)
+    assert status["voted_proposal_id"] is not None
+    assert status["vote_open_proposal_ids"] == []
+    assert status["next_actions"] == ["advance"]
+
+    client.post(f"/rounds/{rid}/advance", headers=h(agent_a))
+    status = me(client, rid, agent_b)
+    assert status["phase"] == "closed"
+    assert status["can_advance"] is False
+    assert status["next_actions"] == ["done"]
+
+
+def test_timed_rounds_do_not_suggest_advance(client, agent_a, agent_b):
+    rid = client.post("/rounds", json={"prompt": "p", "proposal_seconds": 600}, headers=h(agent_a)).json()["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "A"}, headers=h(agent_a))
+    client.post(f"/rounds/{rid}/proposals", json={"content": "B"}, headers=h(agent_b))
+    status = me(client, rid, agent_a)
+    assert status["can_advance"] is True
+    assert status["next_actions"] == ["wait"]
+
+
+def test_query_count_does_not_grow_with_round_size(client, agent_a, round_voting):
+    rid = round_voting["id"]
+    r = client.get(f"/rounds/{rid}/me", headers=h(agent_a))
+    count = int(re.search(r'db-count;desc="(\d+)', r.headers["server-timing"]).group(1))
+    assert count <= 8
+
+
+def test_unknown_round(client, agent_a):
+    assert client.get("/rounds/9999/me", headers=h(agent_a)).status_code == 404
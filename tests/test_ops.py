@@ -0,0 +1,57 @@
+"""Tests for operator-only diagnostics under /ops."""
+
+import pytest
+
+import app.deps as deps
+from app import diagnostics
+from tests.conftest import h
+
+TOKEN = "ops-secret"
+
+
+@pytest.fixture()
+def ops(monkeypatch):
+    monkeypatch.setattr(deps, "OPS_TOKEN", TOKEN)
+    yield {"X-Ops-Token": TOKEN}
+    diagnostics.reset()  # stop tracemalloc so it doesn't slow later tests
+
+
+def test_ops_disabled_without_token(client):
+    assert client.get("/ops/memory").status_code == 404
+
+
+def test_ops_requires_matching_token(client, ops):
+    assert client.get("/ops/memory").status_code == 403
+    assert client.get("/ops/memory", headers={"X-Ops-Token": "nope"}).status_code == 403
+
+
+def test_memory_report_shape(client, ops, agent_a):
+    client.post("/rounds", json={"prompt": "p"}, headers=h(agent_a))
+    r = client.get("/ops/memory", headers=ops)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["tracing"] is True
+    assert data["diff_since_last"] == []  # first snapshot has nothing to diff against
+    assert [g["generation"] for g in data["gc"]] == [0, 1, 2]
+    assert data["caches"]["rate_limit_windows"] == 1
+    assert data["pool"]["checkouts_total"] >= 0
+    assert data["live_objects"] is None
+
+
+def test_memory_report_diffs_between_calls(client, ops):
+    client.get("/ops/memory", headers=ops)
+    hoard = [bytearray(1024) for _ in range(2000)]  # ~2 MB allocated at one line
+    data = client.get("/ops/memory", headers=ops).json()
+    assert data["diff_since_last"]
+    assert any(
+        "test_ops.py" in s["location"] and s["size_diff_bytes"] >= 2_000_000
+        for s in data["diff_since_last"]
+    )
+    del hoard
+
+
+def test_memory_report_live_object_counts(client, ops, agent_a):
+    data = client.get("/ops/memory", params={"objects": True, "top": 5}, headers=ops).json()
+    assert len(data["top_allocations"]) <= 5
+    assert "Agent" in data["live_objects"]
+    assert "pydantic.BaseModel" in data["live_objects"]
@@ -0,0 +1,121 @@
+"""Concurrent advance calls: each transition, and its scoring, happens once."""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.database as database
+from app import phases
+from app.database import Base
+from app.main import app
+from app.models import Round, ScoreEvent
+from app.scoring import POINTS_CRITIQUE, POINTS_PARTICIPATION, POINTS_WIN
+
+RACERS = 8
+
+
+@pytest.fixture()
+def file_client(tmp_path, monkeypatch):
+    """A client on a file-backed SQLite database, so requests on different
+    threads use separate connections and really race."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine, autocommit=False, autoflush=False))
+    with TestClient(app) as client:
+        yield client
+    engine.dispose()
+
+
+def race(client, rid, agents):
+    """POST /advance from every agent at once; returns the status codes."""
+    barrier = threading.Barrier(len(agents))
+    statuses = []
+
+    def advance(agent):
+        barrier.wait()
+        statuses.append(client.post(f"/rounds/{rid}/advance", headers={"X-Agent-Name": agent}).status_code)
+
+    threads = [threading.Thread(target=advance, args=(agent,)) for agent in agents]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sorted(statuses)
+
+
+def test_concurrent_advances_score_each_round_once(file_client):
+    client = file_client
+    racers = [f"racer-{i}" for i in range(RACERS)]
+    for name in ["ann", "bob", *racers]:
+        client.post("/agents", json={"name": name})
+    ann, bob = {"X-Agent-Name": "ann"}, {"X-Agent-Name": "bob"}
+
+    rounds = 3
+    for _ in range(rounds):
+        rid = client.post("/rounds", json={"prompt": "race"}, headers=ann).json()["id"]
+        pa = client.post(f"/rounds/{rid}/proposals", json={"content": "ann's plan"}, headers=ann).json()["id"]
+        pb = client.post(f"/rounds/{rid}/proposals", json={"content": "bob's plan"}, headers=bob).json()["id"]
+        assert race(client, rid, racers) == [200] + [409] * (RACERS - 1)
+        client.post(f"/rounds/{rid}/critiques", json={"proposal_id": pb, "content": "ok"}, headers=ann)
+        client.post(f"/rounds/{rid}/critiques", json={"proposal_id": pa, "content": "ok"}, headers=bob)
+        assert race(client, rid, racers) == [200] + [409] * (RACERS - 1)
+        client.post(f"/rounds/{rid}/votes", json={"proposal_id": pa}, headers=bob)
+        assert race(client, rid, racers) == [200] + [409] * (RACERS - 1)
+
+        events = client.get(f"/leaderboard/rounds/{rid}").json()
+        assert sorted(e["reason"] for e in events) == [
+            "critique_bonus", "critique_bonus", "participation", "participation", "win",
+        ]
+        assert client.get(f"/rounds/{rid}/changes", params={"since": 0}).json()["last_seq"] == 8
+
+    scores = {e["name"]: e["total_score"] for e in client.get("/leaderboard").json()["entries"]}
+    assert scores["ann"] == rounds * (POINTS_PARTICIPATION + POINTS_WIN + POINTS_CRITIQUE)
+    assert scores["bob"] == rounds * (POINTS_PARTICIPATION + POINTS_CRITIQUE)
+
+
+def test_losing_the_claim_skips_scoring(file_client):
+    client = file_client
+    ann, bob = {"X-Agent-Name": "ann"}, {"X-Agent-Name": "bob"}
+    rid = client.post("/rounds", json={"prompt": "race"}, headers=ann).json()["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "ann's plan"}, headers=ann)
+    client.post(f"/rounds/{rid}/proposals", json={"content": "bob's plan"}, headers=bob)
+
+    stale = database.SessionLocal()
+    try:
+        round_ = stale.get(Round, rid)  # still sees "proposal"
+        assert client.post(f"/rounds/{rid}/advance", headers=ann).status_code == 200
+
+        with pytest.raises(HTTPException) as exc:
+            phases.advance(stale, round_)
+        assert exc.value.status_code == 409
+        assert "already moved on from the proposal phase" in exc.value.detail
+        stale.rollback()
+        assert stale.get(Round, rid).phase == "critique"
+        assert stale.query(ScoreEvent).count() == 0
+    finally:
+        stale.close()
+
+
+def test_premature_advance_does_not_take_the_write_lock(file_client, tmp_path):
+    client = file_client
+    ann = {"X-Agent-Name": "ann"}
+    rid = client.post("/rounds", json={"prompt": "race"}, headers=ann).json()["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "ann's plan"}, headers=ann)
+
+    blocker = sqlite3.connect(tmp_path / "race.db", timeout=0)
+    blocker.execute("BEGIN IMMEDIATE")  # hold the write lock
+    try:
+        started = time.monotonic()
+        r = client.post(f"/rounds/{rid}/advance", headers=ann)
+        assert r.status_code == 409 and "need at least 2 proposals" in r.json()["detail"]
+        assert time.monotonic() - started < 1  # answered without waiting for the lock
+    finally:
+        blocker.rollback()
+        blocker.close()
@@ -0,0 +1,71 @@
+"""Tests for the opt-in request profiler."""
+
+import os
+import time
+
+import pytest
+
+import app.profiling as profiling
+
+
+@pytest.fixture()
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_INTERVAL", 0.0005)
+    return tmp_path
+
+
+def test_profiling_disabled_by_default(client, profile_dir, round_proposal):
+    r = client.get(f"/rounds/{round_proposal['id']}")
+    assert "x-profile-id" not in r.headers
+    assert os.listdir(profile_dir) == []
+
+
+def test_sampled_request_writes_collapsed_stacks(client, profile_dir, monkeypatch, round_proposal):
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1.0)
+    r = client.get(f"/rounds/{round_proposal['id']}")
+    name = r.headers["x-profile-id"]
+    assert name.endswith(".collapsed")
+    with open(profile_dir / name) as f:
+        lines = f.read().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) >= 1
+        assert "app/" in stack
+
+
+def test_signed_header_profiles_single_request(client, profile_dir, monkeypatch, agent_a):
+    monkeypatch.setattr(profiling, "PROFILE_SECRET", "s3cret")
+    signature = profiling.sign("/rounds", secret="s3cret")
+    r = client.get("/rounds", headers={"X-Profile-Signature": signature})
+    assert "x-profile-id" in r.headers
+
+    # Signature is bound to the path it was issued for
+    r = client.get("/leaderboard", headers={"X-Profile-Signature": signature})
+    assert "x-profile-id" not in r.headers
+    # ...and to the secret
+    forged = profiling.sign("/rounds", secret="wrong")
+    r = client.get("/rounds", headers={"X-Profile-Signature": forged})
+    assert "x-profile-id" not in r.headers
+    assert len(os.listdir(profile_dir)) == 1
+
+
+def test_expired_signature_rejected(client, profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_SECRET", "s3cret")
+    signature = profiling.sign("/rounds", ttl_seconds=-1, secret="s3cret")
+    r = client.get("/rounds", headers={"X-Profile-Signature": signature})
+    assert "x-profile-id" not in r.headers
+
+
+def test_retention_deletes_oldest_profiles(tmp_path):
+    now = time.time()
+    for i in range(5):
+        path = tmp_path / f"p{i}.collapsed"
+        path.write_text("x" * 100)
+        os.utime(path, (now + i, now + i))
+    (tmp_path / "notes.txt").write_text("y" * 1000)
+
+    profiling.enforce_retention(str(tmp_path), max_bytes=250)
+
+    assert sorted(os.listdir(tmp_path)) == ["notes.txt", "p3.collapsed", "p4.collapsed"]
@@ -0,0 +1,79 @@
+"""Tests for per-request SQL accounting, Server-Timing headers and the N+1 detector."""
+
+import logging
+
+import pytest
+
+from app.database import RepeatedQueryError, get_db, track_queries
+from app.models import Proposal
+from tests.conftest import h
+
+
+def _parse_server_timing(value):
+    metrics = {}
+    for part in value.split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        metrics[name] = dict(p.split("=", 1) for p in params)
+    return metrics
+
+
+def test_server_timing_header_reports_db_time_and_count(client, round_proposal):
+    r = client.get(f"/rounds/{round_proposal['id']}")
+    timing = _parse_server_timing(r.headers["server-timing"])
+    assert float(timing["db"]["dur"]) >= 0
+    assert timing["db-count"]["desc"].startswith('"')
+    count = int(timing["db-count"]["desc"].strip('"').split()[0])
+    assert count >= 4  # round, proposals, critiques, votes
+    assert float(timing["app"]["dur"]) >= float(timing["db"]["dur"])
+
+
+def test_access_log_includes_db_numbers(client, round_proposal, caplog):
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        client.get(f"/rounds/{round_proposal['id']}")
+    line = next(r.getMessage() for r in caplog.records if r.name == "app.access")
+    assert f"GET /rounds/{round_proposal['id']} 200" in line
+    assert "db=" in line and "db_count=" in line
+
+
+def _four_agent_round(client):
+    agents = [client.post("/agents", json={"name": f"N{i}"}).json() for i in range(4)]
+    rid = client.post("/rounds", json={"prompt": "N+1"}, headers=h(agents[0])).json()["id"]
+    for a in agents:
+        client.post(f"/rounds/{rid}/proposals", json={"content": f"by {a['name']}"}, headers=h(a))
+    return rid, agents
+
+
+def test_list_endpoints_do_not_lazy_load_agents(client):
+    """With 4 distinct authors, a per-row agent load would trip strict mode."""
+    rid, agents = _four_agent_round(client)
+    assert len(client.get(f"/rounds/{rid}/proposals").json()) == 4
+
+    client.post(f"/rounds/{rid}/advance", headers=h(agents[0]))
+    proposals = client.get(f"/rounds/{rid}/proposals").json()
+    for i, a in enumerate(agents):
+        target = proposals[(i + 1) % 4]
+        r = client.post(f"/rounds/{rid}/critiques",
+                        json={"proposal_id": target["id"], "content": "ok"}, headers=h(a))
+        assert r.status_code == 201
+    assert len(client.get(f"/rounds/{rid}/critiques").json()) == 4
+
+    assert client.post(f"/rounds/{rid}/advance", headers=h(agents[0])).status_code == 200
+    for i, a in enumerate(agents):
+        client.post(f"/rounds/{rid}/votes",
+                    json={"proposal_id": proposals[(i + 1) % 4]["id"]}, headers=h(a))
+    r = client.post(f"/rounds/{rid}/advance", headers=h(agents[0]))
+    assert r.status_code == 200
+    assert r.json()["new_phase"] == "closed"
+
+
+def test_strict_mode_raises_on_repeated_statements(client):
+    rid, _ = _four_agent_round(client)
+    session = next(client.app.dependency_overrides[get_db]())
+    try:
+        proposals = session.query(Proposal).filter(Proposal.round_id == rid).all()
+        with pytest.raises(RepeatedQueryError, match="N\\+1"):
+            with track_queries():
+                for p in proposals:
+                    p.agent.name  # lazy load per row
+    finally:
+        session.close()
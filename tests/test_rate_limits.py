@@ -100,3 +100,19 @@ def test_critique_exceeds_limit(client, agent_a, agent_b, agent_c):
             assert r_crit.status_code == 201, f"Expected 201 on iteration {i}, got {r_crit.json()}"
         else:
             assert r_crit.status_code == 429
+
+
+# ── pruning ─────────────────────────────────────────────────────────────────
+
+def test_idle_keys_are_pruned():
+    from time import time
+
+    from app import rate_limit
+
+    rate_limit.check_rate_limit("create_round:1", max_calls=10, window_seconds=60)
+    rate_limit.check_rate_limit("advance:2", max_calls=10, window_seconds=60)
+    assert rate_limit.size() == 2
+
+    assert rate_limit.prune(now=time() + 30) == 0
+    assert rate_limit.prune(now=time() + 61) == 2
+    assert rate_limit.size() == 0
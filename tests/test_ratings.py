@@ -0,0 +1,84 @@
+"""Tests for Elo skill ratings."""
+
+import numpy as np
+import pytest
+
+import app.database as database
+from app import ratings
+from app.models import Agent
+from tests.conftest import play_round
+
+
+def board(client, by="rating"):
+    return {e["name"]: e for e in client.get("/leaderboard", params={"by": by}).json()["entries"]}
+
+
+def test_elo_deltas():
+    deltas = ratings.elo_deltas(np.array([1500.0, 1500.0]), np.array([1.0, 0.0]), k=32)
+    assert deltas == pytest.approx([16, -16])
+    # Three-way round: the winner beats both, the others draw with each other
+    deltas = ratings.elo_deltas(np.array([1500.0] * 3), np.array([2.0, 0.0, 0.0]), k=32)
+    assert deltas == pytest.approx([16, -8, -8])
+    assert deltas.sum() == pytest.approx(0)
+    # An upset moves ratings more than an expected win
+    upset = ratings.elo_deltas(np.array([1400.0, 1600.0]), np.array([1.0, 0.0]), k=32)
+    assert upset[0] > 16
+    assert ratings.elo_deltas(np.array([1500.0, 1500.0]), np.array([0.0, 0.0])) is None
+    assert ratings.elo_deltas(np.array([1500.0]), np.array([3.0])) is None
+
+
+def test_closing_a_round_updates_ratings(client):
+    play_round(client, {"ann": ["zed"], "bob": []})
+    entries = board(client)
+    assert entries["ann"]["rating"] == pytest.approx(1516)
+    assert entries["bob"]["rating"] == pytest.approx(1484)
+    assert entries["zed"]["rating"] == 1500  # voted but did not propose
+    assert entries["ann"]["rated_rounds"] == entries["bob"]["rated_rounds"] == 1
+    assert entries["zed"]["rated_rounds"] == 0
+
+
+def test_leaderboard_by_rating_differs_from_by_score(client):
+    # "old" accumulates points over many rounds but keeps losing to "new"
+    for _ in range(3):
+        play_round(client, {"old": [], "filler": ["v1"]})
+    play_round(client, {"new": ["v1", "v2"], "old": []})
+
+    by_score = [e["name"] for e in client.get("/leaderboard").json()["entries"]]
+    by_rating = client.get("/leaderboard", params={"by": "rating"}).json()["entries"]
+    assert by_score.index("old") < by_score.index("new")
+    names = [e["name"] for e in by_rating]
+    assert names.index("new") < names.index("old")
+    assert [e["rank"] for e in by_rating] == list(range(1, len(by_rating) + 1))
+    ratings_desc = [e["rating"] for e in by_rating]
+    assert ratings_desc == sorted(ratings_desc, reverse=True)
+    assert client.get("/leaderboard", params={"by": "vibes"}).status_code == 422
+
+
+def test_recompute_matches_incremental_updates(client):
+    play_round(client, {"ann": ["zed"], "bob": []})
+    play_round(client, {"bob": ["zed", "ann"], "cat": ["dan"], "dan": []})
+    play_round(client, {"cat": [], "ann": ["bob"], "dan": []})
+    incremental = board(client)
+
+    db = database.SessionLocal()
+    try:
+        # Wipe the ratings as if the database predated them, then backfill
+        db.query(Agent).update({Agent.rating: 1500.0, Agent.rated_rounds: 0})
+        summary = ratings.recompute(db)
+        db.commit()
+    finally:
+        db.close()
+    assert summary["rounds"] == 3
+
+    assert board(client) == incremental
+
+
+def test_recompute_with_different_k(client):
+    play_round(client, {"ann": ["zed"], "bob": []})
+    db = database.SessionLocal()
+    try:
+        ratings.recompute(db, k=16)
+        db.commit()
+    finally:
+        db.close()
+    assert board(client)["ann"]["rating"] == pytest.approx(1508)
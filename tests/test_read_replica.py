@@ -0,0 +1,60 @@
+"""Tests for routing GET endpoints to the read engine."""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.database as database
+from app.database import Base, get_db
+from app.main import app
+from tests.conftest import h
+
+
+@pytest.fixture()
+def replica(client, monkeypatch):
+    """An empty database standing in for a replica that hasn't caught up.
+    Writes go through the real get_db so they are tracked per agent."""
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(bind=engine, autocommit=False, autoflush=False))
+    app.dependency_overrides.pop(get_db)
+    database.reset_recent_writes()
+    yield
+    database.reset_recent_writes()
+    engine.dispose()
+
+
+def test_reads_go_to_the_replica(client, agent_a, replica):
+    rid = client.post("/rounds", json={"prompt": "p"}, headers=h(agent_a)).json()["id"]
+    assert client.get("/rounds").json() == []
+    assert client.get(f"/rounds/{rid}").status_code == 404
+    assert client.get("/leaderboard").json()["entries"] == []
+
+
+def test_the_writer_reads_its_own_writes(client, agent_a, agent_b, replica, monkeypatch):
+    rid = client.post("/rounds", json={"prompt": "p"}, headers=h(agent_a)).json()["id"]
+    assert [r["id"] for r in client.get("/rounds", headers=h(agent_a)).json()] == [rid]
+    assert client.get(f"/rounds/{rid}", headers=h(agent_a)).status_code == 200
+    # Other agents, and the writer once the window has passed, read the replica
+    assert client.get("/rounds", headers=h(agent_b)).json() == []
+    monkeypatch.setattr(database, "READ_YOUR_WRITES_SECONDS", 0)
+    assert client.get("/rounds", headers=h(agent_a)).json() == []
+
+
+def test_read_only_sqlite_connection_rejects_writes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'council.db'}"
+    primary = create_engine(url)
+    with primary.begin() as conn:
+        conn.execute(text("CREATE TABLE notes (body TEXT)"))
+        conn.execute(text("INSERT INTO notes VALUES ('hello')"))
+
+    assert database.read_only_sqlite_url(url) == f"sqlite:///file:{tmp_path / 'council.db'}?mode=ro&uri=true"
+    reader = create_engine(database.read_only_sqlite_url(url))
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT body FROM notes")).scalar() == "hello"
+        with pytest.raises(OperationalError, match="readonly"):
+            conn.execute(text("DELETE FROM notes"))
+    reader.dispose()
+    primary.dispose()
@@ -0,0 +1,101 @@
+"""Tests for bulk re-scoring and total_score reconciliation."""
+
+import numpy as np
+import pytest
+
+import app.database as database
+from app import rescoring, scoring
+from app.models import Agent, ScoreEvent
+from app.scoring import POINTS_CRITIQUE, POINTS_PARTICIPATION, POINTS_WIN
+from tests.conftest import h
+
+
+@pytest.fixture()
+def db(client):
+    session = database.SessionLocal()
+    yield session
+    session.close()
+
+
+def totals(client):
+    return {e["name"]: e["total_score"] for e in client.get("/leaderboard").json()["entries"]}
+
+
+def events(client, rid):
+    return sorted((e["agent_id"], e["reason"], e["points"]) for e in client.get(f"/leaderboard/rounds/{rid}").json())
+
+
+@pytest.fixture()
+def rounds(client, agent_a, agent_b, agent_c, round_closed):
+    """round_closed, plus a closed three-way round won jointly by Alice and Bob."""
+    rid = client.post("/rounds", json={"prompt": "tie"}, headers=h(agent_a)).json()["id"]
+    ids = {
+        agent["name"]: client.post(f"/rounds/{rid}/proposals", json={"content": f"{agent['name']} again"},
+                                   headers=h(agent)).json()["id"]
+        for agent in (agent_a, agent_b, agent_c)
+    }
+    client.post(f"/rounds/{rid}/advance", headers=h(agent_a))
+    for author, target in (("Alice", "Bob"), ("Bob", "Carol"), ("Carol", "Bob")):
+        agent = next(a for a in (agent_a, agent_b, agent_c) if a["name"] == author)
+        client.post(f"/rounds/{rid}/critiques", json={"proposal_id": ids[target], "content": "hm"}, headers=h(agent))
+    client.post(f"/rounds/{rid}/advance", headers=h(agent_a))
+    client.post(f"/rounds/{rid}/votes", json={"proposal_id": ids["Alice"]}, headers=h(agent_b))
+    client.post(f"/rounds/{rid}/votes", json={"proposal_id": ids["Bob"]}, headers=h(agent_c))
+    assert client.post(f"/rounds/{rid}/advance", headers=h(agent_a)).status_code == 200
+    return round_closed["id"], rid
+
+
+def test_replay_matches_live_scoring(client, rounds, db):
+    before = totals(client)
+    summary = rescoring.rescore(db, dry_run=True)
+    assert summary["rounds"] == 2
+    assert summary["events"] == db.query(ScoreEvent).count() == (2 + 1 + 2) + (3 + 2 + 3)
+    assert summary["changed_rounds"] == [] and summary["agents"] == []
+
+    rescoring.rescore(db)
+    db.commit()
+    assert totals(client) == before
+
+
+def test_changed_points_dry_run_then_apply(client, rounds, db, monkeypatch):
+    first, second = rounds
+    monkeypatch.setattr(scoring, "POINTS_WIN", 100)
+    before = totals(client)
+    summary = rescoring.rescore(db, dry_run=True)
+    assert summary["changed_rounds"] == [first, second]
+    assert (summary["events_removed"], summary["events_added"]) == (13, 13)
+    expected = {a["name"]: a["expected"] for a in summary["agents"]}
+    assert expected == {"Alice": before["Alice"] + 2 * (100 - POINTS_WIN), "Bob": before["Bob"] + 100 - POINTS_WIN}
+    db.rollback()
+    assert totals(client) == before  # nothing written
+
+    rescoring.rescore(db)
+    db.commit()
+    assert totals(client) == {**before, **expected}
+    assert ("win", 100) in {(reason, points) for _, reason, points in events(client, second)}
+    assert rescoring.rescore(db, dry_run=True)["changed_rounds"] == []
+
+
+def test_repairs_drift_in_one_round(client, agent_a, agent_b, rounds, db):
+    first, second = rounds
+    untouched = events(client, second)
+    win = db.query(ScoreEvent).filter(ScoreEvent.round_id == first, ScoreEvent.reason == "win").one()
+    db.add(ScoreEvent(agent_id=win.agent_id, round_id=first, reason="win", points=win.points))  # scored twice
+    db.query(Agent).filter(Agent.id == agent_b["id"]).update({"total_score": 0})
+    db.commit()
+
+    summary = rescoring.rescore(db)
+    db.commit()
+    assert summary["changed_rounds"] == [first]
+    assert (summary["events_removed"], summary["events_added"]) == (6, 5)
+    assert [a["name"] for a in summary["agents"]] == ["Bob"]
+    assert events(client, second) == untouched
+    assert totals(client)["Alice"] == 2 * (POINTS_PARTICIPATION + POINTS_WIN + POINTS_CRITIQUE)
+    assert totals(client)["Bob"] == 2 * (POINTS_PARTICIPATION + POINTS_CRITIQUE) + POINTS_WIN
+
+
+def test_changed_rounds_compares_counts_and_points():
+    expected = np.array([[1, 7, 0, 10], [2, 7, 0, 10], [3, 8, 1, 25]])
+    stored = np.array([[1, 7, 0, 10], [2, 7, 0, 5], [3, 8, 1, 25], [3, 8, 1, 25], [4, 9, -1, 1]])
+    assert rescoring.changed_rounds(expected, stored).tolist() == [2, 3, 4]
+    assert rescoring.changed_rounds(expected[:0], stored[:0]).tolist() == []
@@ -0,0 +1,134 @@
+"""Tests for the tagged GET response cache."""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.database as database
+import app.response_cache as response_cache
+from app.database import Base
+from app.models import Agent
+from tests.conftest import play_round
+
+
+@pytest.fixture()
+def cached(monkeypatch):
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_ENABLED", True)
+
+
+def test_repeated_reads_are_served_from_cache(client, cached):
+    client.post("/agents", json={"name": "ann"})
+    first = client.get("/leaderboard")
+    assert first.headers["x-cache"] == "miss"
+    second = client.get("/leaderboard")
+    assert second.headers["x-cache"] == "hit" and second.json() == first.json()
+    assert client.get("/leaderboard?by=rating").headers["x-cache"] == "miss"
+
+
+def test_round_close_invalidates_its_tags(client, cached):
+    rid = play_round(client, {"ann": [], "bob": ["ann"]})
+    bob = client.post("/agents", json={"name": "bob"}).json()["id"]
+    paths = ("/leaderboard", "/agents", f"/agents/{bob}", f"/leaderboard/rounds/{rid}")
+    before = {path: client.get(path).json() for path in paths}
+    assert all(client.get(path).headers["x-cache"] == "hit" for path in paths)
+
+    next_rid = play_round(client, {"ann": [], "bob": ["ann"]})
+    for path in paths[:3]:
+        assert client.get(path).headers["x-cache"] == "refresh", path
+    assert client.get(f"/agents/{bob}").json()["total_score"] > before[f"/agents/{bob}"]["total_score"]
+    assert client.get(f"/leaderboard/rounds/{rid}").headers["x-cache"] == "hit"  # another round's tag
+    assert client.get(f"/leaderboard/rounds/{next_rid}").headers["x-cache"] == "miss"
+
+
+def test_registration_invalidates_agent_lists(client, cached):
+    client.post("/agents", json={"name": "ann"})
+    assert [a["name"] for a in client.get("/agents").json()] == ["ann"]
+    client.post("/agents", json={"name": "bob"})
+    r = client.get("/agents")
+    assert r.headers["x-cache"] == "refresh" and len(r.json()) == 2
+    assert len(client.get("/leaderboard").json()["entries"]) == 2
+
+
+def test_only_successful_responses_are_cached(client, cached):
+    assert client.get("/agents/9999").status_code == 404
+    assert client.get("/agents/9999").headers["x-cache"] == "miss"
+
+
+def test_recent_writer_bypasses_cache(client, cached):
+    client.get("/agents")
+    client.post("/rounds", json={"prompt": "p"}, headers={"X-Agent-Name": "ann"})
+    database.mark_write("ann")  # get_db, which marks writes, is overridden in tests
+    try:
+        r = client.get("/agents", headers={"X-Agent-Name": "ann"})
+        assert "x-cache" not in r.headers and [a["name"] for a in r.json()] == ["ann"]
+        assert client.get("/agents", headers={"X-Agent-Name": "bob"}).headers["x-cache"] == "refresh"
+    finally:
+        database.reset_recent_writes()
+
+
+def test_cache_is_filled_from_the_primary(client, cached, monkeypatch):
+    replica = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=replica)  # empty: it hasn't caught up
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(bind=replica, autocommit=False, autoflush=False))
+    try:
+        client.post("/agents", json={"name": "ann"})
+        r = client.get("/leaderboard")
+        assert r.headers["x-cache"] == "miss" and [e["name"] for e in r.json()["entries"]] == ["ann"]
+        assert client.get("/rounds").json() == []  # uncached routes still read the replica
+    finally:
+        replica.dispose()
+
+
+def test_rolled_back_session_does_not_invalidate(client, cached):
+    client.get("/agents")
+    db = database.SessionLocal()
+    try:
+        db.add(Agent(name="ghost", api_key="k"))
+        response_cache.invalidate_on_commit(db, "agents")
+        db.rollback()
+    finally:
+        db.close()
+    assert client.get("/agents").headers["x-cache"] == "hit"
+
+
+def test_stale_entry_is_served_while_one_request_refreshes(monkeypatch):
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_TTL_SECONDS", 10)
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_STALE_SECONDS", 5)
+    cache = response_cache.ResponseCache(max_entries=10)
+    key, tags = ("/leaderboard", b""), ("leaderboard",)
+    assert cache.store(key, tags, cache.versions(tags), 200, [], b"old", now=0)
+
+    assert cache.lookup(key, now=9) == (cache._entries[key], False)
+    entry, refresh = cache.lookup(key, now=11)  # expired: this caller refreshes
+    assert entry.body == b"old" and refresh
+    assert cache.lookup(key, now=12) == (entry, False)  # others keep getting the old body
+    seen = cache.versions(tags)
+    assert cache.store(key, tags, seen, 200, [], b"new", now=13)
+    assert cache.lookup(key, now=14)[0].body == b"new"
+
+    cache.invalidate(tags, now=20)
+    entry, refresh = cache.lookup(key, now=21)
+    assert entry.body == b"new" and refresh
+    cache.release(key)  # the refresh failed: the next reader tries again
+    assert cache.lookup(key, now=22)[1]
+    assert cache.lookup(key, now=26) == (None, True)  # past the stale window
+
+
+def test_response_computed_across_an_invalidation_is_not_stored():
+    cache = response_cache.ResponseCache(max_entries=10)
+    key, tags = ("/agents", b""), ("agents",)
+    seen = cache.versions(tags)
+    cache.invalidate(tags)
+    assert not cache.store(key, tags, seen, 200, [], b"old", now=0)
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = response_cache.ResponseCache(max_entries=2)
+    for path in ("/a", "/b"):
+        cache.store((path, b""), ("agents",), (0,), 200, [], b"", now=0)
+    cache.lookup(("/a", b""), now=1)
+    cache.store(("/c", b""), ("agents",), (0,), 200, [], b"", now=1)
+    assert set(cache._entries) == {("/a", b""), ("/c", b"")}
+    assert cache._by_tag["agents"] == {("/a", b""), ("/c", b"")}
@@ -0,0 +1,106 @@
+"""Tests for per-phase deadlines and the background phase scheduler."""
+
+import time
+from datetime import datetime, timedelta
+
+from app.scheduler import scheduler
+from tests.conftest import h
+
+LATER = timedelta(hours=1)
+
+
+def _timed_round(client, agent, **durations):
+    r = client.post("/rounds", json={"prompt": "Timed", **durations}, headers=h(agent))
+    assert r.status_code == 201, r.json()
+    return r.json()
+
+
+def _propose_both(client, rid, agent_a, agent_b):
+    client.post(f"/rounds/{rid}/proposals", json={"content": "A"}, headers=h(agent_a))
+    client.post(f"/rounds/{rid}/proposals", json={"content": "B"}, headers=h(agent_b))
+
+
+def test_round_without_durations_has_no_deadline(client, round_proposal):
+    assert round_proposal["phase_deadline"] is None
+
+
+def test_deadline_set_from_proposal_duration(client, agent_a):
+    before = datetime.utcnow()
+    rnd = _timed_round(client, agent_a, proposal_seconds=600)
+    deadline = datetime.fromisoformat(rnd["phase_deadline"])
+    assert before + timedelta(seconds=599) <= deadline <= datetime.utcnow() + timedelta(seconds=600)
+
+
+def test_invalid_duration_rejected(client, agent_a):
+    r = client.post("/rounds", json={"prompt": "x", "voting_seconds": 0}, headers=h(agent_a))
+    assert r.status_code == 422
+
+
+def test_nothing_moves_before_deadline(client, agent_a, agent_b):
+    rnd = _timed_round(client, agent_a, proposal_seconds=600)
+    _propose_both(client, rnd["id"], agent_a, agent_b)
+    assert scheduler.run_due() == []
+    assert client.get(f"/rounds/{rnd['id']}").json()["round"]["phase"] == "proposal"
+
+
+def test_deadline_advances_through_guards(client, agent_a, agent_b):
+    rnd = _timed_round(client, agent_a, proposal_seconds=600, critique_seconds=300)
+    rid = rnd["id"]
+    _propose_both(client, rid, agent_a, agent_b)
+
+    moved = scheduler.run_due(datetime.utcnow() + LATER)
+    assert moved == [(rid, "proposal", "critique")]
+    state = client.get(f"/rounds/{rid}").json()["round"]
+    assert state["phase"] == "critique"
+    # The critique phase got its own deadline
+    assert state["phase_deadline"] is not None
+
+
+def test_stalled_proposal_phase_expires(client, agent_a):
+    rnd = _timed_round(client, agent_a, proposal_seconds=60)
+    rid = rnd["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "lonely"}, headers=h(agent_a))
+
+    assert scheduler.run_due(datetime.utcnow() + LATER) == [(rid, "proposal", "expired")]
+    state = client.get(f"/rounds/{rid}").json()["round"]
+    assert state["phase"] == "expired"
+    assert state["closed_at"] is not None
+    r = client.post(f"/rounds/{rid}/advance", headers=h(agent_a))
+    assert r.status_code == 409
+    # Expired rounds award nothing
+    assert client.get(f"/leaderboard/rounds/{rid}").json() == []
+
+
+def test_stalled_critique_phase_closes_and_scores(client, agent_a, agent_b):
+    rnd = _timed_round(client, agent_a, critique_seconds=60)
+    rid = rnd["id"]
+    _propose_both(client, rid, agent_a, agent_b)
+    client.post(f"/rounds/{rid}/advance", headers=h(agent_a))  # untimed proposal phase
+
+    # Nobody critiques; the critique guard is still unmet at the deadline
+    assert scheduler.run_due(datetime.utcnow() + LATER) == [(rid, "critique", "closed")]
+    events = client.get(f"/leaderboard/rounds/{rid}").json()
+    assert sorted(e["reason"] for e in events) == ["participation", "participation"]
+
+
+def test_manual_advance_makes_old_deadline_stale(client, agent_a, agent_b):
+    rnd = _timed_round(client, agent_a, proposal_seconds=60)
+    rid = rnd["id"]
+    _propose_both(client, rid, agent_a, agent_b)
+    client.post(f"/rounds/{rid}/advance", headers=h(agent_a))
+
+    # The queued proposal deadline must not push the critique phase along
+    assert scheduler.run_due(datetime.utcnow() + LATER) == []
+    assert client.get(f"/rounds/{rid}").json()["round"]["phase"] == "critique"
+
+
+def test_background_thread_advances_due_round(client, agent_a, agent_b):
+    rnd = _timed_round(client, agent_a, proposal_seconds=1)
+    rid = rnd["id"]
+    _propose_both(client, rid, agent_a, agent_b)
+
+    for _ in range(50):
+        if client.get(f"/rounds/{rid}").json()["round"]["phase"] == "critique":
+            break
+        time.sleep(0.1)
+    assert client.get(f"/rounds/{rid}").json()["round"]["phase"] == "critique"
@@ -0,0 +1,104 @@
+"""Tests for full-text search over proposals and critiques."""
+
+from sqlalchemy import create_engine, text
+
+from app import search
+from app.database import Base
+from tests.conftest import h
+
+
+def find(client, q, **params):
+    r = client.get("/search", params={"q": q, **params})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_finds_proposals_and_critiques_by_stemmed_word(client, agent_a, agent_b, round_critique):
+    rid = round_critique["id"]
+    proposals = client.get(f"/rounds/{rid}/proposals").json()
+    bob = next(p for p in proposals if p["agent_name"] == "Bob")
+    client.post(f"/rounds/{rid}/critiques",
+                json={"proposal_id": bob["id"], "content": "Proposals need clearer budgets"},
+                headers=h(agent_a))
+
+    body = find(client, "proposal")
+    kinds = sorted(r["type"] for r in body["results"])
+    assert kinds == ["critique", "proposal", "proposal"]
+    assert body["next_cursor"] is None
+    assert all(r["rank"] > 0 for r in body["results"])
+
+    only = find(client, "budget", type="critique")["results"]
+    assert [r["agent_name"] for r in only] == ["Alice"]
+    assert "[budgets]" in only[0]["snippet"]
+
+
+def test_ranking_prefers_denser_matches(client, agent_a, agent_b, agent_c, round_proposal):
+    rid = round_proposal["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "solar power for the solar farm, solar everywhere"},
+                headers=h(agent_a))
+    client.post(f"/rounds/{rid}/proposals", json={"content": "wind and one solar panel plus many other things"},
+                headers=h(agent_b))
+    results = find(client, "solar")["results"]
+    assert [r["agent_name"] for r in results] == ["Alice", "Bob"]
+    assert results[0]["rank"] > results[1]["rank"]
+
+
+def test_removed_content_is_excluded(client, agent_a, agent_b, agent_c, round_proposal):
+    rid = round_proposal["id"]
+    pid = client.post(f"/rounds/{rid}/proposals", json={"content": "hidden treasure"},
+                      headers=h(agent_a)).json()["id"]
+    assert len(find(client, "treasure")["results"]) == 1
+
+    client.post(f"/rounds/{rid}/proposals/{pid}/report", json={}, headers=h(agent_b))
+    client.post(f"/rounds/{rid}/proposals/{pid}/report", json={}, headers=h(agent_c))
+    assert find(client, "treasure")["results"] == []
+
+
+def test_cursor_pagination_visits_every_match_once(client, round_proposal):
+    rid = round_proposal["id"]
+    for i in range(7):
+        client.post(f"/rounds/{rid}/proposals", json={"content": f"idea number {i} " + "idea " * i},
+                    headers={"X-Agent-Name": f"agent-{i}"})
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = find(client, "idea", **params)
+        seen.extend(r["id"] for r in body["results"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 7
+
+
+def test_query_syntax_in_user_input_is_harmless(client, agent_a, round_proposal):
+    rid = round_proposal["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "NEAR the AND gate"}, headers=h(agent_a))
+    assert len(find(client, 'gate" AND NEAR(*')["results"]) == 1
+    assert find(client, "!!!")["results"] == []
+
+
+def test_filters_and_validation(client, agent_a, round_proposal):
+    rid = round_proposal["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "alpha"}, headers=h(agent_a))
+    assert len(find(client, "alpha", round_id=rid)["results"]) == 1
+    assert find(client, "alpha", round_id=rid + 1)["results"] == []
+    assert client.get("/search", params={"q": "alpha", "cursor": "garbage"}).status_code == 422
+    assert client.get("/search").status_code == 422
+
+
+def test_install_backfills_existing_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Simulate a database created before search existed
+        for trigger in ("insert", "update", "delete"):
+            conn.execute(text(f"DROP TRIGGER proposals_fts_{trigger}"))
+        conn.execute(text("DROP TABLE proposals_fts"))
+        conn.execute(text("INSERT INTO agents (id, name, api_key, total_score) VALUES (1, 'a', 'k', 0)"))
+        conn.execute(text("INSERT INTO rounds (id, prompt, phase, created_by, last_seq) VALUES (1, 'p', 'proposal', 1, 0)"))
+        conn.execute(text("INSERT INTO proposals (round_id, agent_id, content, vote_count, is_removed) "
+                          "VALUES (1, 1, 'legacy row', 0, 0)"))
+    with engine.begin() as conn:
+        search.install(conn)
+        assert conn.execute(text("SELECT count(*) FROM proposals_fts WHERE proposals_fts MATCH 'legacy'")).scalar() == 1
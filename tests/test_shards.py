@@ -0,0 +1,97 @@
+"""Tests for sharding round-scoped tables across SQLite files."""
+
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.database as database
+from app import shards
+from app.main import app
+from tests.conftest import play_round
+
+SHARDS = 2
+ANN_WINS = {"ann": ["bob"], "bob": []}  # ann and bob propose, bob votes for ann
+
+
+@pytest.fixture()
+def sharded(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'global.db'}", connect_args={"check_same_thread": False})
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine, autocommit=False, autoflush=False))
+    monkeypatch.setattr(shards, "SHARD_COUNT", SHARDS)
+    monkeypatch.setattr(shards, "SHARD_DATABASE_URL", f"sqlite:///{tmp_path}/shard{{n}}.db")
+    with TestClient(app) as client:
+        yield client, tmp_path
+    shards.configure(1)
+    engine.dispose()
+
+
+def rows(path, sql):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(sql).fetchall()
+
+
+def test_rounds_are_stored_on_their_shard(sharded):
+    client, path = sharded
+    first = play_round(client, ANN_WINS, "solar", host="ann")
+    second = play_round(client, ANN_WINS, "wind", host="ann")
+    assert (first % SHARDS, second % SHARDS) == (1, 0)
+
+    assert rows(path / "shard1.db", "SELECT id FROM rounds") == [(first,)]
+    assert rows(path / "shard0.db", "SELECT id FROM rounds") == [(second,)]
+    # Global tables stay in the global file; round tables are not created there
+    assert rows(path / "global.db", "SELECT count(*) FROM agents") == [(2,)]
+    assert rows(path / "global.db", "SELECT count(*) FROM score_events")[0][0] > 0
+    assert not rows(path / "global.db", "SELECT name FROM sqlite_master WHERE name = 'rounds'")
+    assert not rows(path / "shard0.db", "SELECT name FROM sqlite_master WHERE name = 'agents'")
+
+    # Generated ids do not collide across shards
+    ids = [p["id"] for rid in (first, second) for p in client.get(f"/rounds/{rid}/proposals").json()]
+    assert len(set(ids)) == 4
+    assert all(i > shards.ID_SPAN for i in ids[:2])
+
+
+def test_cross_round_endpoints_see_every_shard(sharded):
+    client, _ = sharded
+    first = play_round(client, ANN_WINS, "solar", host="ann")
+    second = play_round(client, ANN_WINS, "wind", host="ann")
+
+    assert {r["id"] for r in client.get("/rounds").json()} == {first, second}
+    results = client.get("/search", params={"q": "ann"}).json()["results"]
+    assert {r["round_id"] for r in results} == {first, second}
+    page = client.get("/search", params={"q": "on", "limit": 3}).json()
+    rest = client.get("/search", params={"q": "on", "limit": 3, "cursor": page["next_cursor"]}).json()
+    assert len(page["results"]) + len(rest["results"]) == 4
+    assert rest["next_cursor"] is None
+
+    ann = next(a for a in client.get("/agents").json() if a["name"] == "ann")
+    assert ann["proposals_submitted"] == 2
+    assert ann["critiques_submitted"] == 2
+    board = client.get("/leaderboard").json()["entries"]
+    assert board[0]["name"] == "ann" and board[0]["rounds_participated"] == 2
+    assert client.get(f"/leaderboard/rounds/{first}").status_code == 200
+
+    proposal_ids = [p["id"] for rid in (first, second) for p in client.get(f"/rounds/{rid}/proposals").json()]
+    exported = [json.loads(line)["id"] for line in client.get("/export/proposals").text.splitlines()]
+    assert exported == sorted(proposal_ids)  # merged across shards in id order
+
+
+def test_a_locked_shard_does_not_block_other_rounds(sharded):
+    client, path = sharded
+    a = {"X-Agent-Name": "ann"}
+    on_shard1 = client.post("/rounds", json={"prompt": "one"}, headers=a).json()["id"]
+    on_shard0 = client.post("/rounds", json={"prompt": "two"}, headers=a).json()["id"]
+    assert on_shard1 % SHARDS == 1
+
+    blocker = sqlite3.connect(path / "shard1.db", timeout=0)
+    blocker.execute("BEGIN IMMEDIATE")  # hold shard 1's write lock
+    try:
+        r = client.post(f"/rounds/{on_shard0}/proposals", json={"content": "still writable"}, headers=a)
+        assert r.status_code == 201
+    finally:
+        blocker.rollback()
+        blocker.close()
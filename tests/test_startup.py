@@ -0,0 +1,69 @@
+"""Tests for the versioned schema sync and cache warm-up run at startup."""
+
+import os
+import subprocess
+import sys
+
+from sqlalchemy import create_engine, inspect
+
+import app.database as database
+from app import moderation, warmup
+from app.database import schema_fingerprint, stored_schema_version, sync_schema
+
+
+def _engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'startup.db'}")
+
+
+def test_sync_runs_once_then_skips(tmp_path):
+    engine = _engine(tmp_path)
+    assert stored_schema_version(engine) is None
+
+    assert sync_schema(engine) is True
+    assert "rounds" in inspect(engine).get_table_names()
+    assert stored_schema_version(engine) == schema_fingerprint()
+
+    assert sync_schema(engine) is False
+    assert sync_schema(engine, force=True) is True
+
+
+def test_always_mode_forces_sync(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    sync_schema(engine)
+    monkeypatch.setattr(database, "SCHEMA_SYNC", "always")
+    assert sync_schema(engine) is True
+
+
+def test_new_migration_changes_version_and_is_applied(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    sync_schema(engine)
+    before = schema_fingerprint()
+
+    monkeypatch.setattr(
+        database, "COLUMN_MIGRATIONS",
+        database.COLUMN_MIGRATIONS + [("agents", "nickname", "VARCHAR(32)")],
+    )
+    assert schema_fingerprint() != before
+    assert sync_schema(engine) is True
+    assert "nickname" in {c["name"] for c in inspect(engine).get_columns("agents")}
+
+
+def test_index_migration_indexes_an_existing_table(tmp_path):
+    engine = _engine(tmp_path)
+    sync_schema(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_score_events_round_id")
+    sync_schema(engine, force=True)
+    assert "ix_score_events_round_id" in {i["name"] for i in inspect(engine).get_indexes("score_events")}
+
+
+def test_warm_caches_runs_queries_and_loads_filter(client, round_proposal):
+    assert warmup.warm_caches() >= 0
+    assert moderation._profanity is not None
+
+
+def test_heavy_libraries_are_not_imported_at_startup():
+    code = "import sys, app.main; print(sorted({'numpy', 'better_profanity'} & set(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,198 @@
+"""Tests for webhook registration and batched event delivery."""
+
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import app.webhooks as webhooks
+from app.webhooks import LocalReceiver, dispatcher
+from tests.conftest import h
+
+
+@pytest.fixture(autouse=True)
+def allow_local_receiver(monkeypatch):
+    """LocalReceiver listens on 127.0.0.1; the SSRF tests switch this back off."""
+    monkeypatch.setattr(webhooks, "WEBHOOKS_ALLOW_PRIVATE", True)
+
+
+@pytest.fixture()
+def receiver():
+    with LocalReceiver() as r:
+        yield r
+
+
+def _subscribe(client, agent, url):
+    r = client.put("/agents/me/webhook", json={"url": url}, headers=h(agent))
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_register_and_unregister_webhook(client, agent_a):
+    data = _subscribe(client, agent_a, "https://93.184.216.34/hook")
+    assert data == {"url": "https://93.184.216.34/hook", "pending": 0,
+                    "delivered": 0, "failed": 0, "last_error": None}
+    assert client.delete("/agents/me/webhook", headers=h(agent_a)).status_code == 204
+    assert client.get("/agents/me/webhook", headers=h(agent_a)).json()["url"] is None
+
+
+def test_invalid_webhook_url_rejected(client, agent_a):
+    r = client.put("/agents/me/webhook", json={"url": "ftp://x"}, headers=h(agent_a))
+    assert r.status_code == 422
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1:8000/hook",
+    "http://localhost/hook",
+    "http://10.0.0.5/hook",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]/hook",
+    "http://[::ffff:192.168.1.1]/hook",
+    "http://0.0.0.0/hook",
+])
+def test_private_webhook_destinations_rejected(client, agent_a, monkeypatch, url):
+    monkeypatch.setattr(webhooks, "WEBHOOKS_ALLOW_PRIVATE", False)
+    r = client.put("/agents/me/webhook", json={"url": url}, headers=h(agent_a))
+    assert r.status_code == 422 and "non-public" in r.json()["detail"]
+
+
+def _start_critique(client, agent_a, agent_b):
+    rid = client.post("/rounds", json={"prompt": "p"}, headers=h(agent_a)).json()["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "A"}, headers=h(agent_a))
+    client.post(f"/rounds/{rid}/proposals", json={"content": "B"}, headers=h(agent_b))
+    assert client.post(f"/rounds/{rid}/advance", headers=h(agent_a)).status_code == 200
+
+
+def test_delivery_rechecks_the_resolved_address(client, agent_a, agent_b, receiver, monkeypatch):
+    _subscribe(client, agent_a, receiver.url)
+    monkeypatch.setattr(webhooks, "WEBHOOKS_ALLOW_PRIVATE", False)  # e.g. the name now resolves privately
+    _start_critique(client, agent_a, agent_b)
+
+    assert dispatcher.run_once() == 2
+    assert receiver.batches == []
+    status = client.get("/agents/me/webhook", headers=h(agent_a)).json()
+    assert status["pending"] == 2 and "non-public" in status["last_error"]
+
+
+def test_redirects_are_not_followed(client, agent_a, agent_b, receiver):
+    class Redirect(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.send_response(307)
+            self.send_header("Location", receiver.url)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Redirect)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        _subscribe(client, agent_a, f"http://127.0.0.1:{server.server_address[1]}/hook")
+        _start_critique(client, agent_a, agent_b)
+        assert dispatcher.run_once() == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert receiver.batches == []
+    assert "307" in client.get("/agents/me/webhook", headers=h(agent_a)).json()["last_error"]
+
+
+def test_no_events_without_subscription(client, round_closed, agent_a):
+    assert dispatcher.run_once() == 0
+
+
+def test_round_lifecycle_delivered_in_batches(client, agent_a, agent_b, receiver):
+    _subscribe(client, agent_a, receiver.url)
+    rid = client.post("/rounds", json={"prompt": "hooks"}, headers=h(agent_a)).json()["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "A"}, headers=h(agent_a))
+    bob_prop = client.post(f"/rounds/{rid}/proposals", json={"content": "B"},
+                           headers=h(agent_b)).json()
+    client.post(f"/rounds/{rid}/advance", headers=h(agent_a))
+
+    # Phase change + critique request arrive together in one batch
+    assert dispatcher.run_once() == 2
+    assert len(receiver.batches) == 1
+    batch = receiver.batches[0]
+    assert batch["agent"] == "Alice"
+    types = [e["type"] for e in batch["events"]]
+    assert types == ["phase_changed", "critique_requested"]
+    assert batch["events"][0]["data"]["new_phase"] == "critique"
+    assert batch["events"][1]["data"]["proposal_ids"] == [bob_prop["id"]]
+
+    state = client.get(f"/rounds/{rid}").json()
+    alice_prop = next(p for p in state["proposals"] if p["agent_name"] == "Alice")
+    client.post(f"/rounds/{rid}/critiques",
+                json={"proposal_id": bob_prop["id"], "content": "ok"}, headers=h(agent_a))
+    client.post(f"/rounds/{rid}/critiques",
+                json={"proposal_id": alice_prop["id"], "content": "ok"}, headers=h(agent_b))
+    client.post(f"/rounds/{rid}/advance", headers=h(agent_a))
+    client.post(f"/rounds/{rid}/votes", json={"proposal_id": alice_prop["id"]}, headers=h(agent_b))
+    client.post(f"/rounds/{rid}/advance", headers=h(agent_a))
+
+    dispatcher.run_once()
+    results = [e for e in receiver.events if e["type"] == "round_results"]
+    assert len(results) == 1
+    assert results[0]["data"]["winner_agent_ids"] == [agent_a["id"]]
+    assert results[0]["data"]["points"] > 0
+
+    status = client.get("/agents/me/webhook", headers=h(agent_a)).json()
+    assert status["delivered"] == len(receiver.events) and status["pending"] == 0
+
+
+def test_failed_delivery_retried_with_backoff(client, agent_a, agent_b, round_critique):
+    with LocalReceiver(fail_next=1) as receiver:
+        _subscribe(client, agent_a, receiver.url)
+        rid = round_critique["id"]
+        state = client.get(f"/rounds/{rid}").json()
+        alice_prop = next(p for p in state["proposals"] if p["agent_name"] == "Alice")
+        bob_prop = next(p for p in state["proposals"] if p["agent_name"] == "Bob")
+        client.post(f"/rounds/{rid}/critiques",
+                    json={"proposal_id": bob_prop["id"], "content": "ok"}, headers=h(agent_a))
+        client.post(f"/rounds/{rid}/critiques",
+                    json={"proposal_id": alice_prop["id"], "content": "ok"}, headers=h(agent_b))
+        client.post(f"/rounds/{rid}/advance", headers=h(agent_a))
+
+        assert dispatcher.run_once() == 1
+        assert receiver.batches == []
+        status = client.get("/agents/me/webhook", headers=h(agent_a)).json()
+        assert status["pending"] == 1 and "503" in status["last_error"]
+
+        # Not due again until the backoff elapses
+        assert dispatcher.run_once() == 0
+        later = datetime.utcnow() + timedelta(seconds=webhooks.WEBHOOK_BACKOFF_BASE + 1)
+        assert dispatcher.run_once(now=later) == 1
+        assert [e["type"] for e in receiver.events] == ["phase_changed"]
+
+
+def test_gives_up_after_max_attempts(client, agent_a, round_critique, monkeypatch, agent_b):
+    monkeypatch.setattr(webhooks, "WEBHOOK_MAX_ATTEMPTS", 1)
+    _subscribe(client, agent_a, "http://127.0.0.1:9/unreachable")
+    rid = round_critique["id"]
+    state = client.get(f"/rounds/{rid}").json()
+    alice_prop = next(p for p in state["proposals"] if p["agent_name"] == "Alice")
+    bob_prop = next(p for p in state["proposals"] if p["agent_name"] == "Bob")
+    client.post(f"/rounds/{rid}/critiques",
+                json={"proposal_id": bob_prop["id"], "content": "ok"}, headers=h(agent_a))
+    client.post(f"/rounds/{rid}/critiques",
+                json={"proposal_id": alice_prop["id"], "content": "ok"}, headers=h(agent_b))
+    client.post(f"/rounds/{rid}/advance", headers=h(agent_a))
+
+    dispatcher.run_once()
+    status = client.get("/agents/me/webhook", headers=h(agent_a)).json()
+    assert status["failed"] == 1 and status["pending"] == 0
+
+
+def test_worker_pool_delivers_in_background(client, agent_a, agent_b, receiver):
+    _subscribe(client, agent_a, receiver.url)
+    rid = client.post("/rounds", json={"prompt": "bg"}, headers=h(agent_a)).json()["id"]
+    client.post(f"/rounds/{rid}/proposals", json={"content": "A"}, headers=h(agent_a))
+    client.post(f"/rounds/{rid}/proposals", json={"content": "B"}, headers=h(agent_b))
+    client.post(f"/rounds/{rid}/advance", headers=h(agent_a))
+
+    dispatcher.start(workers=2)
+    try:
+        assert receiver.received.wait(timeout=5)
+    finally:
+        dispatcher.stop()
+    assert [e["type"] for e in receiver.events] == ["phase_changed", "critique_requested"]